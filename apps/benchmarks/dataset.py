@@ -0,0 +1,85 @@
+import random
+from collections import namedtuple
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+
+from apps.orders import benchmarks as order_benchmarks, signals
+from apps.orders.models import Order
+from apps.payments.models import Payment, StripeEvent
+from apps.users.models import ROLES
+
+User = get_user_model()
+
+BENCH_PREFIX = 'benchapi'
+PASSWORD = 'bench-Password-123'
+
+# Payment outcomes of the seeded checkouts.
+PAYMENT_STATUSES = [Payment.STATUS_SUCCEEDED, Payment.STATUS_PENDING, Payment.STATUS_FAILED]
+PAYMENT_WEIGHTS = [0.7, 0.2, 0.1]
+
+Dataset = namedtuple('Dataset', ['prefix', 'users', 'orders', 'payments'])
+
+
+def seed_users(counts, prefix=BENCH_PREFIX):
+    """
+    `counts` users per role (`{'admin': 2, ...}`) who can log in with
+    `PASSWORD`. Returns the users by role.
+    """
+    users = {}
+    for role, _ in ROLES:
+        ids = order_benchmarks.seed_users(counts.get(role, 0), role, prefix=prefix, password=PASSWORD)
+        users[role] = list(User.objects.filter(pk__in=ids).order_by('id'))
+    return users
+
+
+def seed_payments(orders, share, prefix=BENCH_PREFIX, seed=0, batch_size=5000):
+    """
+    Give a `share` of `orders` a payment, with a realistic status mix, and
+    carry it into the rollups and `Order.payment_status`.
+    """
+    rng = random.Random(seed)
+    created = 0
+    for start in range(0, len(orders), batch_size):
+        batch = [order for order in orders[start:start + batch_size] if rng.random() < share]
+        payments = Payment.objects.bulk_create([
+            Payment(
+                order=order,
+                amount=order.cost,
+                status=rng.choices(PAYMENT_STATUSES, PAYMENT_WEIGHTS)[0],
+                stripe_payment_intent_id=f'cs_{prefix}_{order.pk}',
+            )
+            for order in batch
+        ])
+        signals.payments_bulk_updated([(payment, ('', None)) for payment in payments])
+        created += len(payments)
+    return created
+
+
+def seed(customers, delivery_men, admins, orders, payment_share, prefix=BENCH_PREFIX, seed=0):
+    users = seed_users({'user': customers, 'delivery_man': delivery_men, 'admin': admins}, prefix=prefix)
+    order_benchmarks.seed_orders(
+        orders,
+        [user.pk for user in users['user']],
+        [user.pk for user in users['delivery_man']] or [None],
+        seed=seed,
+    )
+    seeded = list(
+        Order.objects.filter(customer__username__startswith=f'{prefix}_')
+        .only('id', 'cost', 'created_at', 'status', 'customer_id', 'delivery_man_id')
+    )
+    payments = seed_payments(seeded, payment_share, prefix=prefix, seed=seed)
+    return Dataset(prefix, users, len(seeded), payments)
+
+
+def cleanup(prefix=BENCH_PREFIX):
+    StripeEvent.objects.filter(event_id__startswith=f'evt_{prefix}_').delete()
+    order_benchmarks.delete_seeded(prefix)
+
+
+def order_fields(rng, i):
+    return {
+        'description': f'Bench parcel {i}: {rng.choice(order_benchmarks.ADJECTIVES)} {rng.choice(order_benchmarks.ITEMS)}',
+        'address': f'House {rng.randrange(1, 999)}, {rng.choice(order_benchmarks.STREETS)}',
+        'cost': str(Decimal(rng.randrange(100, 50000)) / 100),
+    }
@@ -0,0 +1,122 @@
+import json
+import random
+import subprocess
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from apps.benchmarks import dataset, runner
+from apps.benchmarks.scenarios import SCENARIOS, Context
+
+FAKE_WEBHOOK_SECRET = 'whsec_benchmark'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users of every role, orders and payments, then drive every API endpoint and "
+        "report req/s, latency percentiles and queries per request as JSON, so runs can be "
+        "compared across commits. Stripe is replaced by the fake gateway. Run it against a "
+        "scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--delivery-men', type=int, default=50)
+        parser.add_argument('--admins', type=int, default=5)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--payment-share', type=float, default=0.6, help="Share of seeded orders with a payment.")
+        parser.add_argument('--requests', type=int, default=100, help="Requests per scenario.")
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--only', nargs='+', choices=list(SCENARIOS), help="Run only these scenarios.")
+        parser.add_argument(
+            '--url',
+            help="Base URL of a running server (e.g. http://localhost:8000) using the fake Stripe "
+                 "gateway and the same database. Default: in-process test client.",
+        )
+        parser.add_argument('--secret', help="Webhook signing secret. Default: STRIPE_WEBHOOK_SECRET, or a local one in-process.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--label', help="Free-form label stored in the report, e.g. a branch name.")
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows afterwards.')
+
+    def handle(self, *args, **options):
+        secret = options['secret'] or getattr(settings, 'STRIPE_WEBHOOK_SECRET', '')
+        if options['url']:
+            if not secret:
+                raise CommandError("Pass --secret with the server's STRIPE_WEBHOOK_SECRET to sign webhook events.")
+            transport, overrides = runner.HttpTransport(options['url']), nullcontext()
+        else:
+            secret = secret or FAKE_WEBHOOK_SECRET
+            transport = runner.ClientTransport()
+            overrides = override_settings(
+                STRIPE_GATEWAY_BACKEND='apps.payments.gateway.FakeBackend',
+                STRIPE_FAKE_LATENCY_MS=getattr(settings, 'STRIPE_FAKE_LATENCY_MS', 0),
+                STRIPE_CHECKOUT_ASYNC=False,
+                STRIPE_WEBHOOK_SECRET=secret,
+                # The test client sends Host: testserver, as under the test runner.
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            )
+
+        self.stderr.write(f"Seeding {options['orders']} orders...")
+        data = dataset.seed(
+            options['customers'], options['delivery_men'], options['admins'],
+            options['orders'], options['payment_share'], seed=options['seed'],
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        started_at = timezone.now()
+        results = []
+        try:
+            context = Context(data, random.Random(options['seed']), secret)
+            with overrides:
+                for name in options['only'] or SCENARIOS:
+                    url_name, build = SCENARIOS[name]
+                    requests = build(context, options['requests'])
+                    if not requests:
+                        self.stderr.write(self.style.WARNING(f"{name}: nothing to request, skipped"))
+                        continue
+                    samples, elapsed = runner.run(requests, transport, options['concurrency'])
+                    result = runner.summarize(name, url_name, samples, elapsed)
+                    results.append(result)
+                    self.stderr.write(
+                        f"{name:<26} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8}ms  "
+                        f"p99 {result['p99_ms']:>8}ms  queries {result['queries_mean']}  errors {result['errors']}"
+                    )
+        finally:
+            if not options['keep']:
+                dataset.cleanup()
+
+        report = {
+            'label': options['label'],
+            'commit': self._commit(),
+            'started_at': started_at.isoformat(),
+            'database': connection.vendor,
+            'transport': 'http' if options['url'] else 'client',
+            'concurrency': options['concurrency'],
+            'dataset': {
+                'users': {role: len(users) for role, users in data.users.items()},
+                'orders': data.orders,
+                'payments': data.payments,
+            },
+            'results': results,
+        }
+        content = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                output.write(content + '\n')
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(content)
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,111 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections
+from django.test import Client
+
+from apps.payments.replay import percentile
+
+Sample = namedtuple('Sample', ['status', 'latency', 'queries'])
+
+
+class ClientTransport:
+    """
+    Send requests in-process through the Django test client, one per
+    thread. Query counts come from `QueryBudgetMiddleware`.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+        return client
+
+    def __call__(self, request, headers):
+        meta = {'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers.items()}
+        if request.body is not None:
+            meta.update(data=request.body, content_type='application/json')
+        response = getattr(self._client(), request.method)(request.path, **meta)
+        if response.streaming:
+            for _ in response.streaming_content:
+                pass
+        # The test client keeps connections open; end the request as the server would.
+        close_old_connections()
+        return response.status_code, getattr(response, 'query_count', None)
+
+
+class HttpTransport:
+    """
+    Send requests to a running server. Query counts are only known when it
+    runs with DEBUG on (`X-Query-Count`).
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def __call__(self, request, headers):
+        if request.body is not None:
+            headers = {'Content-Type': 'application/json', **headers}
+        http_request = urllib.request.Request(
+            self.base_url + request.path, data=request.body, headers=headers, method=request.method.upper(),
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                response.read()
+                status, query_count = response.status, response.headers.get('X-Query-Count')
+        except urllib.error.HTTPError as exc:
+            status, query_count = exc.code, exc.headers.get('X-Query-Count')
+        except (urllib.error.URLError, OSError):
+            return 0, None
+        return status, int(query_count) if query_count is not None else None
+
+
+def run(requests, transport, concurrency=1):
+    """
+    Send `requests` with `concurrency` workers; returns the samples and
+    the wall time of the whole run.
+    """
+
+    def send(request):
+        headers = dict(request.headers)
+        if request.signer:
+            headers.update(request.signer(request.body))
+        start = time.perf_counter()
+        status, queries = transport(request, headers)
+        return Sample(status, time.perf_counter() - start, queries)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(send, requests))
+    return samples, time.perf_counter() - start
+
+
+def summarize(name, url_name, samples, elapsed):
+    latencies = [sample.latency * 1000 for sample in samples]
+    queries = [sample.queries for sample in samples if sample.queries is not None]
+    return {
+        'scenario': name,
+        'url_name': url_name,
+        'requests': len(samples),
+        'errors': sum(not 200 <= sample.status < 400 for sample in samples),
+        'statuses': dict(Counter(str(sample.status) for sample in samples)),
+        'rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'p50_ms': _round(percentile(latencies, 50)),
+        'p95_ms': _round(percentile(latencies, 95)),
+        'p99_ms': _round(percentile(latencies, 99)),
+        'max_ms': _round(max(latencies, default=None)),
+        'queries_mean': _round(sum(queries) / len(queries)) if queries else None,
+        'queries_max': max(queries, default=None),
+    }
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
@@ -0,0 +1,289 @@
+import json
+from collections import namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.orders import signals
+from apps.orders.models import Order
+from apps.payments.models import Payment
+from apps.payments.replay import sign
+from apps.users.tokens import RoleRefreshToken
+
+from .dataset import PASSWORD, order_fields
+
+# One HTTP request of a scenario, built before timing starts. `headers`
+# use HTTP names; `signer`, if set, adds headers computed from the body
+# at send time (webhook signatures expire).
+Request = namedtuple('Request', ['method', 'path', 'body', 'headers', 'signer'], defaults=(None, {}, None))
+
+
+class Context:
+    """
+    What scenarios build their requests from: the seeded users, a seeded
+    RNG and a cache of access tokens.
+    """
+
+    def __init__(self, dataset, rng, webhook_secret):
+        self.dataset = dataset
+        self.prefix = dataset.prefix
+        self.rng = rng
+        self.webhook_secret = webhook_secret
+        self._tokens = {}
+        self._serial = 0
+
+    def users(self, role):
+        return self.dataset.users[role]
+
+    def user(self, role):
+        return self.rng.choice(self.users(role))
+
+    def auth(self, user):
+        if user.pk not in self._tokens:
+            self._tokens[user.pk] = str(RoleRefreshToken.for_user(user).access_token)
+        return {'Authorization': f'Bearer {self._tokens[user.pk]}'}
+
+    def serial(self):
+        self._serial += 1
+        return f'{timezone.now():%H%M%S}_{self._serial}'
+
+    def owned_orders(self, user, **filters):
+        return list(Order.objects.filter(customer=user, **filters).values_list('id', flat=True)[:500])
+
+
+def _json(data):
+    return json.dumps(data).encode()
+
+
+def _get(path, headers=None):
+    return Request('get', path, None, headers or {})
+
+
+def _post(path, data, headers=None, method='post'):
+    return Request(method, path, _json(data), headers or {})
+
+
+def _new_orders(ctx, user, count, **fields):
+    """
+    Orders without a payment, for scenarios that consume one per request.
+    """
+    orders = []
+    for i in range(count):
+        values = order_fields(ctx.rng, i)
+        orders.append(Order(customer=user, **{**values, 'cost': Decimal(values['cost'])}, **fields))
+    Order.objects.bulk_create(orders)
+    signals.orders_bulk_created(orders)
+    return [order.pk for order in orders]
+
+
+def login(ctx, count):
+    path = reverse('login')
+    return [
+        _post(path, {'username_or_email': ctx.user('user').email, 'password': PASSWORD})
+        for _ in range(count)
+    ]
+
+
+def register(ctx, count):
+    path = reverse('register')
+    requests = []
+    for _ in range(count):
+        name = f'{ctx.prefix}_reg_{ctx.serial()}'
+        requests.append(_post(path, {
+            'username': name, 'email': f'{name}@example.com',
+            'password': PASSWORD, 'confirm_password': PASSWORD, 'role': 'user',
+        }))
+    return requests
+
+
+def token_obtain_pair(ctx, count):
+    path = reverse('token_obtain_pair')
+    return [_post(path, {'username': ctx.user('user').username, 'password': PASSWORD}) for _ in range(count)]
+
+
+def token_refresh(ctx, count):
+    # Refresh tokens are rotated and revoked, so each request needs its own.
+    path = reverse('token_refresh')
+    return [_post(path, {'refresh': str(RoleRefreshToken.for_user(ctx.user('user')))}) for _ in range(count)]
+
+
+def profile(ctx, count):
+    path = reverse('profile')
+    return [_get(path, ctx.auth(ctx.user('user'))) for _ in range(count)]
+
+
+def order_list(role):
+    def build(ctx, count):
+        path = reverse('order-list')
+        return [_get(path, ctx.auth(ctx.user(role))) for _ in range(count)]
+    return build
+
+
+def order_create(ctx, count):
+    path = reverse('order-create')
+    return [_post(path, order_fields(ctx.rng, i), ctx.auth(ctx.user('user'))) for i in range(count)]
+
+
+def order_batch_create(ctx, count, size=10):
+    path = reverse('order-batch-create')
+    return [
+        _post(path, {'orders': [order_fields(ctx.rng, j) for j in range(size)]}, ctx.auth(ctx.user('user')))
+        for _ in range(count)
+    ]
+
+
+def order_stats(ctx, count):
+    path = reverse('order-stats')
+    return [_get(path, ctx.auth(ctx.user('admin'))) for _ in range(count)]
+
+
+def order_export(ctx, count):
+    since = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    path = f"{reverse('order-export')}?created_from={since}"
+    return [_get(path, ctx.auth(ctx.user('admin'))) for _ in range(count)]
+
+
+def order_bulk_status(ctx, count, size=50):
+    path = reverse('order-bulk-status')
+    delivery_man = ctx.user('delivery_man')
+    order_ids = list(Order.objects.filter(delivery_man=delivery_man).values_list('id', flat=True)[:size])
+    if not order_ids:
+        order_ids = _new_orders(ctx, ctx.user('user'), size, delivery_man=delivery_man)
+    return [
+        _post(path, {'order_ids': order_ids, 'status': Order.STATUS_DELIVERED if i % 2 == 0 else Order.STATUS_PENDING},
+              ctx.auth(delivery_man))
+        for i in range(count)
+    ]
+
+
+def order_detail(ctx, count):
+    requests = []
+    for _ in range(count):
+        customer = ctx.user('user')
+        order_ids = ctx.owned_orders(customer) or _new_orders(ctx, customer, 1)
+        requests.append(_get(reverse('order-detail', args=[ctx.rng.choice(order_ids)]), ctx.auth(customer)))
+    return requests
+
+
+def order_update(ctx, count):
+    order_ids = list(Order.objects.filter(customer__username__startswith=f'{ctx.prefix}_').values_list('id', flat=True)[:5000])
+    if not order_ids:
+        return []
+    admin = ctx.user('admin')
+    return [
+        _post(reverse('order-update', args=[ctx.rng.choice(order_ids)]), {'status': ctx.rng.choice(Order.STATUS_CHOICES)[0]},
+              ctx.auth(admin), method='patch')
+        for _ in range(count)
+    ]
+
+
+def order_delete(ctx, count):
+    admin = ctx.user('admin')
+    return [
+        Request('delete', reverse('order-delete', args=[order_id]), None, ctx.auth(admin))
+        for order_id in _new_orders(ctx, ctx.user('user'), count)
+    ]
+
+
+def checkout_session(ctx, count):
+    path = reverse('checkout-session')
+    customer = ctx.user('user')
+    return [_post(path, {'order_id': order_id}, ctx.auth(customer)) for order_id in _new_orders(ctx, customer, count)]
+
+
+def _payments(ctx, **filters):
+    return list(
+        Payment.objects.filter(order__customer__username__startswith=f'{ctx.prefix}_', **filters)
+        .select_related('order__customer')[:5000]
+    )
+
+
+def checkout_status(ctx, count):
+    payments = _payments(ctx)
+    if not payments:
+        return []
+    return [
+        _get(reverse('checkout-status', args=[payment.pk]), ctx.auth(payment.order.customer))
+        for payment in (ctx.rng.choice(payments) for _ in range(count))
+    ]
+
+
+def retry_payment(ctx, count):
+    payments = _payments(ctx, status__in=[Payment.STATUS_PENDING, Payment.STATUS_FAILED])
+    if not payments:
+        return []
+    return [
+        _post(reverse('retry-payment', args=[payment.pk]), {}, ctx.auth(payment.order.customer))
+        for payment in (ctx.rng.choice(payments) for _ in range(count))
+    ]
+
+
+def stripe_webhook(ctx, count):
+    path = reverse('stripe-webhook')
+    payments = _payments(ctx, status=Payment.STATUS_PENDING)
+    if not payments:
+        return []
+    requests = []
+    for _ in range(count):
+        payment = ctx.rng.choice(payments)
+        event = {
+            'id': f'evt_{ctx.prefix}_{ctx.serial()}',
+            'object': 'event',
+            'type': 'checkout.session.completed',
+            'data': {'object': {'id': payment.stripe_payment_intent_id, 'object': 'checkout.session'}},
+        }
+        requests.append(Request('post', path, _json(event), {}, _webhook_signer(ctx.webhook_secret)))
+    return requests
+
+
+def _webhook_signer(secret):
+    return lambda body: {'Stripe-Signature': sign(body, secret)}
+
+
+def payment_export(ctx, count):
+    since = (timezone.now() - timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    path = f"{reverse('payment-export')}?created_from={since}"
+    return [_get(path, ctx.auth(ctx.user('admin'))) for _ in range(count)]
+
+
+def page(url_name):
+    def build(ctx, count):
+        return [_get(reverse(url_name)) for _ in range(count)]
+    return build
+
+
+# Scenario name -> (URL name, request builder), covering every route in
+# core/urls.py except the Django admin.
+SCENARIOS = {
+    'login': ('login', login),
+    'register': ('register', register),
+    'token_obtain_pair': ('token_obtain_pair', token_obtain_pair),
+    'token_refresh': ('token_refresh', token_refresh),
+    'profile': ('profile', profile),
+    'order-list:user': ('order-list', order_list('user')),
+    'order-list:delivery_man': ('order-list', order_list('delivery_man')),
+    'order-list:admin': ('order-list', order_list('admin')),
+    'order-create': ('order-create', order_create),
+    'order-batch-create': ('order-batch-create', order_batch_create),
+    'order-stats': ('order-stats', order_stats),
+    'order-export': ('order-export', order_export),
+    'order-bulk-status': ('order-bulk-status', order_bulk_status),
+    'order-detail': ('order-detail', order_detail),
+    'order-update': ('order-update', order_update),
+    'order-delete': ('order-delete', order_delete),
+    'checkout-session': ('checkout-session', checkout_session),
+    'checkout-status': ('checkout-status', checkout_status),
+    'retry-payment': ('retry-payment', retry_payment),
+    'stripe-webhook': ('stripe-webhook', stripe_webhook),
+    'payment-export': ('payment-export', payment_export),
+    'homepage': ('homepage', page('homepage')),
+    'schema': ('schema', page('schema')),
+    'swagger-ui': ('swagger-ui', page('swagger-ui')),
+    'redoc': ('redoc', page('redoc')),
+    'payment-success': ('payment-success', page('payment-success')),
+    'payment-cancel': ('payment-cancel', page('payment-cancel')),
+    'payment-success-page': ('payment-success-page', page('payment-success-page')),
+    'payment-cancel-page': ('payment-cancel-page', page('payment-cancel-page')),
+}
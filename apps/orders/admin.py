@@ -1,13 +1,22 @@
 from django.contrib import admin
+from django.db.models import Q
 from .models import Order
+from .search import search_condition
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
-    list_display = ('id', 'customer', 'status', 'created_at', 'updated_at')
-    search_fields = ('customer__username', 'status')
-    list_filter = ('status', 'created_at')
+    list_display = ('id', 'customer', 'status', 'payment_status', 'created_at', 'updated_at')
+    # Exact username, or the full-text index over description and address.
+    search_fields = ('=customer__username',)
+    list_filter = ('status', 'payment_status', 'created_at')
     ordering = ('-created_at',)
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.select_related('customer')
\ No newline at end of file
+        return queryset.select_related('customer')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        condition = Q(customer__username__iexact=search_term.strip()) | search_condition(search_term)
+        return queryset.filter(condition), False
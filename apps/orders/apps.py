@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class OrdersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.orders' 
\ No newline at end of file
+    name = 'apps.orders'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import reinstall
+
+        post_migrate.connect(reinstall, sender=self)
@@ -0,0 +1,137 @@
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from apps.payments.models import Payment
+
+from . import cache, rollups
+from .models import Order
+
+User = get_user_model()
+
+BENCH_PREFIX = 'bench'
+
+# Vocabulary for seeded descriptions and addresses, so text search has
+# words of very different selectivity to find.
+ITEMS = [
+    'documents', 'laptop', 'books', 'medicine', 'flowers', 'cake', 'shoes', 'phone',
+    'keys', 'passport', 'groceries', 'camera', 'guitar', 'painting', 'tablet', 'jacket',
+]
+ADJECTIVES = ['fragile', 'urgent', 'heavy', 'small', 'sealed', 'signed', 'cold', 'gift']
+STREETS = ['Dhanmondi', 'Gulshan', 'Banani', 'Uttara', 'Mirpur', 'Motijheel', 'Mohakhali', 'Bashundhara']
+
+
+@contextmanager
+def explicit_timestamps(model=Order):
+    """
+    Let bulk inserts keep the `created_at` / `updated_at` values we set,
+    instead of `auto_now_add` / `auto_now` stamping every row with now().
+    """
+    fields = [model._meta.get_field('created_at'), model._meta.get_field('updated_at')]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def seed_users(count, role, prefix=BENCH_PREFIX, batch_size=5000, password=None):
+    """
+    Bulk insert `count` users with `role`, sharing one password hash
+    (unusable without `password`): hashing each would take longer than the
+    benchmark. Returns the ids of every user seeded with that role.
+    """
+    password = make_password(password)
+    users = [
+        User(
+            username=f'{prefix}_{role}_{i}',
+            email=f'{prefix}_{role}_{i}@example.com',
+            role=role,
+            password=password,
+        )
+        for i in range(count)
+    ]
+    User.objects.bulk_create(users, batch_size=batch_size)
+    return list(
+        User.objects.filter(username__startswith=f'{prefix}_{role}_').values_list('id', flat=True)
+    )
+
+
+def seed_orders(count, customer_ids, delivery_man_ids, days=365, batch_size=5000, seed=0):
+    """
+    Bulk insert `count` orders spread over the last `days` days, with a
+    realistic status mix and roughly 80% of them assigned.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    span = int(timedelta(days=days).total_seconds())
+    statuses = [Order.STATUS_PENDING, Order.STATUS_DELIVERED, Order.STATUS_COMPLETE]
+    weights = [0.2, 0.1, 0.7]
+
+    created = 0
+    with explicit_timestamps():
+        while created < count:
+            batch = []
+            for _ in range(min(batch_size, count - created)):
+                created_at = now - timedelta(seconds=rng.randrange(span))
+                batch.append(Order(
+                    customer_id=rng.choice(customer_ids),
+                    delivery_man_id=rng.choice(delivery_man_ids) if rng.random() < 0.8 else None,
+                    description=f'Parcel {created}: {rng.choice(ADJECTIVES)} {rng.choice(ITEMS)} '
+                                f'and {rng.choice(ITEMS)} ' + 'x' * rng.randrange(20, 200),
+                    address=f'House {rng.randrange(1, 999)}, Road {rng.randrange(1, 50)}, {rng.choice(STREETS)}',
+                    cost=Decimal(rng.randrange(100, 50000)) / 100,
+                    status=rng.choices(statuses, weights)[0],
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+            Order.objects.bulk_create(batch, batch_size=batch_size)
+            # bulk_create skips signals, so feed the rollups ourselves.
+            rollups.apply_transitions(
+                (None, rollups.OrderState(order.created_at, order.status, order.cost, '', None))
+                for order in batch
+            )
+            created += len(batch)
+    cache.invalidate_all()
+    return created
+
+
+def delete_seeded(prefix=BENCH_PREFIX, batch_size=5000):
+    """
+    Remove everything seeded under `prefix`. Orders are rolled out of the
+    rollups in one pass and deleted with a single statement instead of
+    going through per-row delete signals.
+    """
+    users = User.objects.filter(username__startswith=f'{prefix}_')
+    orders = Order.objects.filter(customer__in=users)
+    rows = orders.values_list('created_at', 'status', 'cost', 'payment__status', 'payment__amount')
+    rollups.apply_transitions(
+        (rollups.OrderState(*row), None) for row in rows.iterator(chunk_size=batch_size)
+    )
+    payments = Payment.objects.filter(order__in=orders)
+    payments._raw_delete(payments.db)
+    orders._raw_delete(orders.db)
+    users.delete()
+    cache.invalidate_all()
+
+
+def time_queryset(queryset, repeat=5):
+    """
+    Evaluate a queryset `repeat` times; return the median wall time in ms.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        list(queryset.all())
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
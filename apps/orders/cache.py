@@ -0,0 +1,137 @@
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+
+ADMIN_SCOPE = ('admin', 'all')
+GLOBAL_SCOPE = ('global', 'all')
+
+HITS_KEY = 'orders:cache:hits'
+MISSES_KEY = 'orders:cache:misses'
+
+
+def _cache():
+    return caches[getattr(settings, 'ORDER_CACHE_ALIAS', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'ORDER_CACHE_TIMEOUT', 300)
+
+
+def _version_key(scope):
+    return 'orders:version:%s:%s' % scope
+
+
+def scope_for(user):
+    """
+    Admins all see the same list, so they share one scope; everyone else
+    gets their own `(role, user_id)` scope.
+    """
+    if user.role == 'admin':
+        return ADMIN_SCOPE
+    return (user.role, user.pk)
+
+
+def _new_version():
+    # Never restart from 1 after an eviction: an old entry could match again.
+    return time.time_ns()
+
+
+def get_versions(scopes):
+    cache = _cache()
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        for key, version in missing.items():
+            # add() so two processes racing here agree on a single value.
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+            versions[key] = version
+    return [versions[key] for key in keys]
+
+
+def _bump(scopes):
+    cache = _cache()
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), timeout=None)
+
+
+def invalidate(customer_ids=(), delivery_man_ids=()):
+    """
+    Drop the cached lists of the given customers and delivery men, and the
+    admin list.
+
+    Versions are bumped right away and again once the surrounding
+    transaction commits, so a list cached by a concurrent request from
+    pre-commit data cannot outlive the write.
+    """
+    scopes = [ADMIN_SCOPE]
+    scopes += [('user', pk) for pk in set(customer_ids) if pk is not None]
+    scopes += [('delivery_man', pk) for pk in set(delivery_man_ids) if pk is not None]
+    _bump(scopes)
+    if connection.in_atomic_block:
+        transaction.on_commit(partial(_bump, scopes))
+
+
+def invalidate_all():
+    """
+    Drop every cached order list. For bulk writes that bypass the model
+    signals (`QuerySet.update()`, `bulk_create()`, raw deletes).
+    """
+    _bump([GLOBAL_SCOPE])
+    if connection.in_atomic_block:
+        transaction.on_commit(partial(_bump, [GLOBAL_SCOPE]))
+
+
+def list_key(user, path):
+    """
+    Cache key for `user`'s order list at `path`. Read it before building
+    the list: if a write lands in between, the entry is stored under a
+    version nobody reads anymore.
+    """
+    scope = scope_for(user)
+    global_version, version = get_versions([GLOBAL_SCOPE, scope])
+    digest = hashlib.sha1(path.encode()).hexdigest()
+    return 'orders:list:%s:%s:%s:%s:%s' % (*scope, global_version, version, digest)
+
+
+def get_list(key):
+    entry = _cache().get(key)
+    _record(HITS_KEY if entry is not None else MISSES_KEY)
+    return entry
+
+
+def set_list(key, entry):
+    _cache().set(key, entry, timeout=_timeout())
+
+
+def _record(counter):
+    cache = _cache()
+    try:
+        cache.incr(counter)
+    except ValueError:
+        if not cache.add(counter, 1, timeout=None):
+            cache.incr(counter)
+
+
+def stats():
+    counters = _cache().get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    _cache().delete_many([HITS_KEY, MISSES_KEY])
@@ -0,0 +1,110 @@
+import heapq
+import logging
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from . import cache
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+DispatchResult = namedtuple('DispatchResult', ['assigned', 'delivery_men', 'elapsed'])
+
+
+def _max_open():
+    return getattr(settings, 'DISPATCH_MAX_OPEN_ORDERS', None)
+
+
+def queue():
+    """
+    PENDING orders nobody has been assigned to yet, oldest first. Served
+    by the `orders_dispatch_queue_idx` partial index.
+    """
+    return Order.objects.filter(status=Order.STATUS_PENDING, delivery_man__isnull=True).order_by('created_at', 'id')
+
+
+def workload():
+    """
+    Min-heap of `(open_orders, delivery_man_id)` for every active delivery
+    man, built from one aggregate query. Open orders are assigned ones that
+    are still PENDING.
+    """
+    rows = (
+        get_user_model().objects
+        .filter(role='delivery_man', is_active=True)
+        .annotate(open_orders=Count('assigned_orders', filter=Q(assigned_orders__status=Order.STATUS_PENDING)))
+        .values_list('open_orders', 'id')
+    )
+    heap = list(rows)
+    heapq.heapify(heap)
+    return heap
+
+
+def _assign(orders, heap, max_open, now):
+    """
+    Give each order to the least loaded delivery man. Men at `max_open`
+    leave the heap; orders left over when it runs dry stay unassigned.
+    """
+    assigned = []
+    for order in orders:
+        if not heap:
+            break
+        open_orders, delivery_man_id = heapq.heappop(heap)
+        order.delivery_man_id = delivery_man_id
+        order.updated_at = now
+        assigned.append(order)
+        if max_open is None or open_orders + 1 < max_open:
+            heapq.heappush(heap, (open_orders + 1, delivery_man_id))
+    return assigned
+
+
+def dispatch(batch_size=1000, limit=50000, time_budget=None):
+    """
+    Assign up to `limit` queued orders, `batch_size` at a time.
+
+    The workload heap is read once per run and kept current in memory, so
+    each batch costs one locking SELECT and one `bulk_update()` whatever the
+    number of delivery men. Every batch commits on its own, and the run
+    stops after `time_budget` seconds, so one call never holds locks or
+    runs for long. With `SKIP LOCKED` (PostgreSQL), rows another
+    dispatcher has locked are left to it.
+    """
+    start = time.monotonic()
+    heap = workload()
+    max_open = _max_open()
+    if max_open is not None:
+        heap = [entry for entry in heap if entry[0] < max_open]
+    used = set()
+    total = 0
+
+    while heap and total < limit:
+        if time_budget is not None and time.monotonic() - start >= time_budget:
+            break
+        with transaction.atomic():
+            orders = list(
+                queue()
+                .select_for_update(skip_locked=True)
+                .only('id', 'customer_id', 'delivery_man_id', 'updated_at')[:min(batch_size, limit - total)]
+            )
+            if not orders:
+                break
+            assigned = _assign(orders, heap, max_open, timezone.now())
+            Order.objects.bulk_update(assigned, ['delivery_man', 'updated_at'])
+            # Assignment doesn't change the rollups, only who can see the order.
+            cache.invalidate(
+                customer_ids=[order.customer_id for order in assigned],
+                delivery_man_ids=[order.delivery_man_id for order in assigned],
+            )
+        used.update(order.delivery_man_id for order in assigned)
+        total += len(assigned)
+
+    elapsed = time.monotonic() - start
+    if total:
+        logger.info("Dispatched %s orders to %s delivery men in %.2fs", total, len(used), elapsed)
+    return DispatchResult(total, len(used), elapsed)
@@ -0,0 +1,61 @@
+import django_filters
+
+from apps.payments.models import Payment
+
+from .models import Order
+
+# Every filter and ordering the order list accepts, with the indexes that
+# serve it in each role scope (admin, customer, delivery man). A partial
+# index only serves the values its condition allows, so e.g. `status`
+# needs the open and the complete index together. Kept in step with
+# `Order.Meta.indexes` by the order tests.
+FILTER_INDEXES = {
+    'status': ('orders_open_status_idx', 'orders_complete_created_idx', 'orders_dm_status_created_idx'),
+    'created_after': ('orders_created_idx', 'orders_customer_created_idx', 'orders_dm_created_idx'),
+    'created_before': ('orders_created_idx', 'orders_customer_created_idx', 'orders_dm_created_idx'),
+    'updated_after': ('orders_updated_idx', 'orders_customer_updated_idx', 'orders_dm_updated_idx'),
+    'updated_before': ('orders_updated_idx', 'orders_customer_updated_idx', 'orders_dm_updated_idx'),
+    'cost_min': ('orders_cost_idx',),
+    'cost_max': ('orders_cost_idx',),
+    'delivery_man': ('orders_dm_created_idx',),
+    'payment_status': ('orders_payment_status_idx',),
+}
+
+# `?ordering=` values and the keyset ordering they map to. The list is
+# already scoped by customer or delivery man for those roles, so each
+# ordering needs an index for every scope.
+ORDERINGS = {
+    '-created_at': ('-created_at', '-id'),
+    'created_at': ('created_at', 'id'),
+    '-updated_at': ('-updated_at', '-id'),
+    'updated_at': ('updated_at', 'id'),
+}
+ORDERING_INDEXES = {
+    'created_at': ('orders_created_idx', 'orders_customer_created_idx', 'orders_dm_created_idx'),
+    'updated_at': ('orders_updated_idx', 'orders_customer_updated_idx', 'orders_dm_updated_idx'),
+}
+
+PAYMENT_STATUS_NONE = 'NONE'
+
+
+class OrderFilter(django_filters.FilterSet):
+    status = django_filters.ChoiceFilter(choices=Order.STATUS_CHOICES)
+    created_after = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='gte')
+    created_before = django_filters.IsoDateTimeFilter(field_name='created_at', lookup_expr='lt')
+    updated_after = django_filters.IsoDateTimeFilter(field_name='updated_at', lookup_expr='gte')
+    updated_before = django_filters.IsoDateTimeFilter(field_name='updated_at', lookup_expr='lt')
+    cost_min = django_filters.NumberFilter(field_name='cost', lookup_expr='gte')
+    cost_max = django_filters.NumberFilter(field_name='cost', lookup_expr='lte')
+    delivery_man = django_filters.NumberFilter(field_name='delivery_man')
+    payment_status = django_filters.ChoiceFilter(
+        choices=Payment.STATUS_CHOICES + [(PAYMENT_STATUS_NONE, 'No payment')],
+        method='filter_payment_status',
+    )
+
+    class Meta:
+        model = Order
+        fields = []
+
+    def filter_payment_status(self, queryset, name, value):
+        return queryset.filter(payment_status='' if value == PAYMENT_STATUS_NONE else value)
+
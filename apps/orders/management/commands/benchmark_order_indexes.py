@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.orders.benchmarks import (
+    BENCH_PREFIX, delete_seeded, seed_orders, seed_users, time_queryset,
+)
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large order dataset and compare EXPLAIN plans and timings of the "
+        "role-scoped order queries without and with the Order indexes. "
+        "Run it against a scratch database: it temporarily drops the indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200000)
+        parser.add_argument('--customers', type=int, default=2000)
+        parser.add_argument('--delivery-men', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows afterwards.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Seeding {options['orders']} orders...")
+        customer_ids = seed_users(options['customers'], 'user')
+        delivery_man_ids = seed_users(options['delivery_men'], 'delivery_man')
+        seed_orders(options['orders'], customer_ids, delivery_man_ids)
+        self._analyze()
+
+        queries = self._queries(customer_ids[0], delivery_man_ids[0])
+        indexes = Order._meta.indexes
+        try:
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Order, index)
+            self._analyze()
+            before = self._run('without indexes', queries, options['repeat'])
+        finally:
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.add_index(Order, index)
+            self._analyze()
+        after = self._run('with indexes', queries, options['repeat'])
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (median ms)'))
+        for name in queries:
+            speedup = before[name] / after[name] if after[name] else float('inf')
+            self.stdout.write(f'{name:<28} {before[name]:>10.2f} {after[name]:>10.2f}  x{speedup:.1f}')
+
+        if not options['keep']:
+            delete_seeded(BENCH_PREFIX)
+
+    def _queries(self, customer_id, delivery_man_id):
+        page = slice(0, 20)
+        return {
+            'admin list': Order.objects.order_by('-created_at', '-id')[page],
+            'customer list': Order.objects.filter(
+                customer_id=customer_id).order_by('-created_at', '-id')[page],
+            'delivery man list': Order.objects.filter(
+                delivery_man_id=delivery_man_id).order_by('-created_at', '-id')[page],
+            'delivery man pending': Order.objects.filter(
+                delivery_man_id=delivery_man_id, status=Order.STATUS_PENDING).order_by('-created_at')[page],
+            'admin status filter': Order.objects.filter(
+                status=Order.STATUS_PENDING).order_by('-created_at')[page],
+        }
+
+    def _run(self, label, queries, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n=== {label} ==='))
+        timings = {}
+        for name, queryset in queries.items():
+            timings[name] = time_queryset(queryset, repeat)
+            self.stdout.write(self.style.SUCCESS(f'\n{name}: {timings[name]:.2f} ms'))
+            self.stdout.write(queryset.explain())
+        return timings
+
+    def _analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+
+from apps.orders import search
+from apps.orders.benchmarks import (
+    BENCH_PREFIX, delete_seeded, seed_orders, seed_users, time_queryset,
+)
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large order dataset and compare plans and timings of the order "
+        "list search (?q=) through the full-text index against icontains scans. "
+        "Run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=2000000)
+        parser.add_argument('--customers', type=int, default=20000)
+        parser.add_argument('--delivery-men', type=int, default=500)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--terms', nargs='+', default=['passport', 'urgent guitar', 'gulshan cake', 'parcel 12345'],
+            help='Search strings to time.',
+        )
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows afterwards.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Seeding {options['orders']} orders...")
+        customer_ids = seed_users(options['customers'], 'user')
+        delivery_man_ids = seed_users(options['delivery_men'], 'delivery_man')
+        seed_orders(options['orders'], customer_ids, delivery_man_ids)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        scopes = {
+            'admin': Order.objects.all(),
+            'customer': Order.objects.filter(customer_id=customer_ids[0]),
+        }
+        rows = []
+        for term in options['terms']:
+            for scope, queryset in scopes.items():
+                scan = queryset.filter(self._scan(term))
+                indexed = search.search(queryset, term)
+                rows.append((f'{scope} "{term}"', self._run(scan, options), self._run(indexed, options)))
+                self.stdout.write(self.style.SUCCESS(f'\n{scope} "{term}" (indexed)'))
+                self.stdout.write(self._page(indexed).explain())
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (median ms, first page)'))
+        self.stdout.write(f'{"query":<36} {"icontains":>10} {"indexed":>10}')
+        for name, before, after in rows:
+            speedup = before / after if after else float('inf')
+            self.stdout.write(f'{name:<36} {before:>10.2f} {after:>10.2f}  x{speedup:.1f}')
+
+        if not options['keep']:
+            delete_seeded(BENCH_PREFIX)
+
+    def _scan(self, term):
+        condition = Q()
+        for word in search.terms(term):
+            condition &= Q(description__icontains=word) | Q(address__icontains=word)
+        return condition
+
+    def _page(self, queryset):
+        return queryset.order_by('-created_at', '-id')[:20]
+
+    def _run(self, queryset, options):
+        return time_queryset(self._page(queryset), options['repeat'])
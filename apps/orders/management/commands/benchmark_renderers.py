@@ -0,0 +1,74 @@
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.response import Response
+
+from respond.renderers import FastStandardizedJSONRenderer, StandardizedJSONRenderer, orjson
+
+
+def order_payload(count):
+    """
+    An order list response shaped like OrderListView's, with the raw
+    Decimal/datetime values the checkout views put in their responses.
+    """
+    now = timezone.now()
+    orders = [
+        {
+            'id': i,
+            'customer': f'customer_{i % 500}',
+            'delivery_man': f'rider_{i % 40}' if i % 5 else None,
+            'payment_status': 'SUCCEEDED' if i % 3 else None,
+            'has_payment': bool(i % 3),
+            'description': f'Parcel #{i}: documents — handle with care',
+            'address': f'House {i % 200}, Road {i % 30}, Dhanmondi, Dhaka',
+            'cost': Decimal(i % 50000) / 100,
+            'status': 'PENDING',
+            'created_at': now - timedelta(minutes=i),
+            'updated_at': now,
+        }
+        for i in range(count)
+    ]
+    return {'message': 'Orders retrieved successfully', 'orders': orders, 'next': None, 'previous': None}
+
+
+class Command(BaseCommand):
+    help = "Compare StandardizedJSONRenderer with FastStandardizedJSONRenderer on large order lists."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            raise CommandError('orjson is not installed; FastStandardizedJSONRenderer would fall back to the stdlib.')
+
+        renderers = [StandardizedJSONRenderer(), FastStandardizedJSONRenderer()]
+        context = {'response': Response(status=200)}
+
+        for size in options['sizes']:
+            payload = order_payload(size)
+            outputs = {}
+            timings = {}
+            for renderer in renderers:
+                samples = []
+                for _ in range(options['repeat']):
+                    # render() pops "message" from the payload, so hand it a fresh top-level dict.
+                    data = dict(payload)
+                    start = time.perf_counter()
+                    outputs[renderer] = renderer.render(data, 'application/json', context)
+                    samples.append((time.perf_counter() - start) * 1000)
+                timings[renderer] = statistics.median(samples)
+
+            stdlib, fast = renderers
+            identical = outputs[stdlib] == outputs[fast]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{size} orders ({len(outputs[stdlib]) / 1024:.0f} KiB)'))
+            self.stdout.write(f'  {type(stdlib).__name__:<32} {timings[stdlib]:>9.2f} ms')
+            self.stdout.write(f'  {type(fast).__name__:<32} {timings[fast]:>9.2f} ms  x{timings[stdlib] / timings[fast]:.1f}')
+            if identical:
+                self.stdout.write(self.style.SUCCESS('  output: byte-identical'))
+            else:
+                self.stdout.write(self.style.ERROR('  output: DIFFERENT'))
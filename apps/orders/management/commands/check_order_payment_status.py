@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from apps.orders import cache
+from apps.orders.models import Order
+
+
+class Command(BaseCommand):
+    help = "Report orders whose payment_status doesn't match their payment, and optionally fix them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Rewrite mismatched orders from their payment.")
+        parser.add_argument('--show', type=int, default=20, help="How many mismatched orders to list.")
+
+    def handle(self, *args, **options):
+        mismatched = (
+            Order.objects
+            .annotate(expected=Coalesce('payment__status', Value('')))
+            .exclude(payment_status=F('expected'))
+            .order_by('id')
+        )
+        rows = list(mismatched.values_list('id', 'payment_status', 'expected'))
+        for order_id, actual, expected in rows[:options['show']]:
+            self.stdout.write(f"Order {order_id}: payment_status={actual!r}, payment says {expected!r}")
+
+        if not rows:
+            self.stdout.write(self.style.SUCCESS("All orders match their payments."))
+            return
+        if not options['fix']:
+            self.stdout.write(self.style.WARNING(f"{len(rows)} orders out of sync. Run with --fix to repair them."))
+            return
+
+        by_status = {}
+        for order_id, _, expected in rows:
+            by_status.setdefault(expected, []).append(order_id)
+        for expected, order_ids in by_status.items():
+            Order.objects.filter(pk__in=order_ids).update(payment_status=expected)
+        cache.invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Fixed {len(rows)} orders."))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.orders import dispatch
+
+
+class Command(BaseCommand):
+    help = "Assign pending unassigned orders to the least loaded active delivery men."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--limit', type=int, default=50000, help="Most orders to assign per run.")
+        parser.add_argument('--time-budget', type=float, default=None, help="Stop a run after this many seconds.")
+        parser.add_argument('--loop', action='store_true', help="Keep dispatching new orders instead of exiting after one run.")
+        parser.add_argument('--sleep', type=float, default=5.0, help="Seconds to wait between runs with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            result = dispatch.dispatch(
+                batch_size=options['batch_size'],
+                limit=options['limit'],
+                time_budget=options['time_budget'],
+            )
+            if result.assigned or not options['loop']:
+                self.stdout.write(
+                    f"Assigned {result.assigned} orders to {result.delivery_men} delivery men "
+                    f"in {result.elapsed:.2f}s"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
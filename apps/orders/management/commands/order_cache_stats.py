@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders import cache
+
+
+class Command(BaseCommand):
+    help = "Show hit/miss counters of the order list cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help="Zero the counters after printing them.")
+
+    def handle(self, *args, **options):
+        stats = cache.stats()
+        ratio = 'n/a' if stats['hit_ratio'] is None else f"{stats['hit_ratio']:.2%}"
+        self.stdout.write(f"hits: {stats['hits']}  misses: {stats['misses']}  hit ratio: {ratio}")
+        if options['reset']:
+            cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from apps.orders import rollups
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly and daily order rollups from the Order and Payment tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = rollups.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup rows."))
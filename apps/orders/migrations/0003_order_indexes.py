@@ -0,0 +1,39 @@
+# Generated by Django 5.0.8 on 2026-10-18 15:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.orders.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('orders', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['-created_at', '-id'], name='orders_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['customer', '-created_at', '-id'], name='orders_customer_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['delivery_man', '-created_at', '-id'], name='orders_dm_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['delivery_man', 'status', '-created_at'], name='orders_dm_status_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'COMPLETE'), _negated=True), fields=['status', '-created_at'], name='orders_open_status_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.8 on 2026-10-18 15:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0003_order_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket', models.DateTimeField()),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('DELIVERED', 'Delivered'), ('COMPLETE', 'Complete')], max_length=10)),
+                ('payment_status', models.CharField(blank=True, default='', max_length=10)),
+                ('order_count', models.BigIntegerField(default=0)),
+                ('order_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('payment_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='orderrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'bucket', 'status', 'payment_status'), name='orders_rollup_unique_bucket'),
+        ),
+    ]
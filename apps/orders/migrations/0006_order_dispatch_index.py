@@ -0,0 +1,23 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.orders.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('orders', '0005_order_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(condition=models.Q(('delivery_man__isnull', True), ('status', 'PENDING')), fields=['created_at', 'id'], name='orders_dispatch_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+
+def install(apps, schema_editor):
+    from apps.orders import search
+    search.install(schema_editor)
+
+
+def uninstall(apps, schema_editor):
+    from apps.orders import search
+    search.uninstall(schema_editor)
+
+
+class Migration(migrations.Migration):
+    """
+    Full-text search over Order.description and Order.address: a GIN
+    tsvector index on PostgreSQL, an FTS5 table with sync triggers on
+    SQLite. See apps.orders.search.
+    """
+
+    dependencies = [
+        ('orders', '0006_order_dispatch_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
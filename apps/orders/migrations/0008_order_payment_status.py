@@ -0,0 +1,28 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.orders.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('orders', '0007_order_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='payment_status',
+            field=models.CharField(blank=True, default='', editable=False, max_length=10),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['payment_status', '-created_at'], name='orders_payment_status_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+
+def backfill(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    Payment = apps.get_model('payments', 'Payment')
+    status = Payment.objects.filter(order_id=OuterRef('pk')).values('status')[:1]
+    Order.objects.filter(payment__isnull=False).update(payment_status=Subquery(status))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_payment_status'),
+        ('payments', '0003_checkout_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
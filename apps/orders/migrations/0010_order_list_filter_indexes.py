@@ -0,0 +1,31 @@
+# Generated by Django 5.0.8 on 2026-10-18 16:29
+
+from django.conf import settings
+from django.db import migrations, models
+
+from apps.orders.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('orders', '0009_backfill_order_payment_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['customer', '-updated_at', '-id'], name='orders_customer_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['delivery_man', '-updated_at', '-id'], name='orders_dm_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='order',
+            index=models.Index(fields=['cost'], name='orders_cost_idx'),
+        ),
+    ]
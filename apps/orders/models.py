@@ -14,10 +14,13 @@ class Order(models.Model):
         (STATUS_COMPLETE, 'Complete'),
     ]
 
+    # No single-column indexes: the composite `customer` / `delivery_man`
+    # indexes below lead with these columns and serve the same lookups.
     customer = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         related_name='orders',
         on_delete=models.CASCADE,
+        db_index=False,
     )
     delivery_man = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -25,13 +28,97 @@ class Order(models.Model):
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
+        db_index=False,
     )
     description = models.TextField()
     address = models.CharField(max_length=255)
     cost = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Copy of `payment.status` ('' without a payment), kept in sync by the
+    # Payment signals so lists can show and filter it without a join.
+    payment_status = models.CharField(max_length=10, blank=True, default='', editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Admin list: keyset pagination over every order.
+            models.Index(fields=['-created_at', '-id'], name='orders_created_idx'),
+            # Customer / delivery man lists: role filter + keyset ordering.
+            models.Index(fields=['customer', '-created_at', '-id'], name='orders_customer_created_idx'),
+            models.Index(fields=['delivery_man', '-created_at', '-id'], name='orders_dm_created_idx'),
+            # Admin list ordered by `-updated_at` (keyset pagination).
+            models.Index(fields=['-updated_at', '-id'], name='orders_updated_idx'),
+            # Role-scoped lists ordered or filtered by updated_at.
+            models.Index(fields=['customer', '-updated_at', '-id'], name='orders_customer_updated_idx'),
+            models.Index(fields=['delivery_man', '-updated_at', '-id'], name='orders_dm_updated_idx'),
+            # Cost range filter on the list.
+            models.Index(fields=['cost'], name='orders_cost_idx'),
+            # Delivery man work queues filtered by status.
+            models.Index(fields=['delivery_man', 'status', '-created_at'], name='orders_dm_status_created_idx'),
+            # Open (not yet complete) orders by status, e.g. admin status filter.
+            models.Index(
+                fields=['status', '-created_at'],
+                name='orders_open_status_idx',
+                condition=~models.Q(status='COMPLETE'),
+            ),
+            # Its complement: completed orders, newest first, e.g. admin
+            # `?status=COMPLETE`. Kept separate so the open index stays small.
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='orders_complete_created_idx',
+                condition=models.Q(status='COMPLETE'),
+            ),
+            # Orders by payment state, e.g. awaiting payment.
+            models.Index(fields=['payment_status', '-created_at'], name='orders_payment_status_idx'),
+            # Dispatcher queue: pending orders nobody is assigned to yet.
+            models.Index(
+                fields=['created_at', 'id'],
+                name='orders_dispatch_queue_idx',
+                condition=models.Q(status='PENDING', delivery_man__isnull=True),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the row as loaded, so signal handlers can tell what changed.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def __str__(self):
+        return f"Order {self.id}"
+
+
+class OrderRollup(models.Model):
+    """
+    Pre-aggregated order volume and revenue per time bucket, order status and
+    payment status. Maintained incrementally by `apps.orders.rollups`.
+    """
+    GRANULARITY_HOUR = 'hour'
+    GRANULARITY_DAY = 'day'
+
+    GRANULARITY_CHOICES = [
+        (GRANULARITY_HOUR, 'Hour'),
+        (GRANULARITY_DAY, 'Day'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=Order.STATUS_CHOICES)
+    # Empty when the orders in this row have no payment.
+    payment_status = models.CharField(max_length=10, blank=True, default='')
+    order_count = models.BigIntegerField(default=0)
+    order_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    payment_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'bucket', 'status', 'payment_status'],
+                name='orders_rollup_unique_bucket',
+            ),
+        ]
+
     def __str__(self):
-        return f"Order {self.id}" 
\ No newline at end of file
+        return f"{self.granularity} {self.bucket:%Y-%m-%d %H:00} {self.status}/{self.payment_status or '-'}" 
\ No newline at end of file
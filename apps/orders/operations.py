@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+class AddIndexConcurrently(migrations.AddIndex):
+    """
+    `AddIndex` that builds the index with `CREATE INDEX CONCURRENTLY` on
+    PostgreSQL (through `django.contrib.postgres`), so the table keeps
+    taking writes during the build. Other databases get a plain `AddIndex`.
+    Migrations using it must set `atomic = False`.
+    """
+
+    def _postgres_operation(self):
+        from django.contrib.postgres.operations import AddIndexConcurrently as PostgresAddIndexConcurrently
+        return PostgresAddIndexConcurrently(self.model_name, self.index)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return self._postgres_operation().database_forwards(app_label, schema_editor, from_state, to_state)
+        return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return self._postgres_operation().database_backwards(app_label, schema_editor, from_state, to_state)
+        return super().database_backwards(app_label, schema_editor, from_state, to_state)
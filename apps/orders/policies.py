@@ -0,0 +1,27 @@
+from .models import Order
+
+
+def visible_orders(user):
+    """
+    Orders `user` may read: every order for admins, their assigned orders
+    for delivery men, their own orders for customers. Each scope is served
+    by one of the Order indexes.
+    """
+    if user.role == 'admin':
+        return Order.objects.all()
+    if user.role == 'delivery_man':
+        return Order.objects.filter(delivery_man_id=user.id)
+    if user.role == 'user':
+        return Order.objects.filter(customer_id=user.id)
+    return Order.objects.none()
+
+
+def editable_orders(user):
+    """
+    Orders `user` may update: all of them for admins, their assigned orders
+    for delivery men (status only, enforced by the view). Customers can't
+    edit orders once created.
+    """
+    if user.role in ('admin', 'delivery_man'):
+        return visible_orders(user)
+    return Order.objects.none()
@@ -0,0 +1,181 @@
+import operator
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+from functools import reduce
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, TruncDay, TruncHour
+
+from .models import Order, OrderRollup
+
+# What a single order contributes to the rollups.
+OrderState = namedtuple('OrderState', ['created_at', 'status', 'cost', 'payment_status', 'payment_amount'])
+
+ZERO = Decimal('0')
+BUMP_BATCH_SIZE = 100
+
+GRANULARITIES = {
+    OrderRollup.GRANULARITY_HOUR: TruncHour,
+    OrderRollup.GRANULARITY_DAY: TruncDay,
+}
+
+
+def truncate(value, granularity):
+    value = value.replace(minute=0, second=0, microsecond=0)
+    if granularity == OrderRollup.GRANULARITY_DAY:
+        value = value.replace(hour=0)
+    return value
+
+
+def apply_transitions(transitions):
+    """
+    Fold `(old_state, new_state)` pairs into the rollup tables.
+
+    Either side may be None for an order that is being created or deleted.
+    Contributions are summed per bucket first and written with a constant
+    number of statements, so a batch touching many orders costs the same
+    as a single one.
+    """
+    deltas = defaultdict(lambda: [0, ZERO, ZERO])
+    for old, new in transitions:
+        if old == new:
+            continue
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            for granularity in GRANULARITIES:
+                key = (granularity, truncate(state.created_at, granularity), state.status, state.payment_status or '')
+                delta = deltas[key]
+                delta[0] += sign
+                delta[1] += sign * (state.cost or ZERO)
+                delta[2] += sign * (state.payment_amount or ZERO)
+
+    changed = [(key, delta) for key, delta in sorted(deltas.items()) if any(delta)]
+    for i in range(0, len(changed), BUMP_BATCH_SIZE):
+        _bump(changed[i:i + BUMP_BATCH_SIZE])
+
+
+def _lookup(key):
+    granularity, bucket, status, payment_status = key
+    return {
+        'granularity': granularity,
+        'bucket': bucket,
+        'status': status,
+        'payment_status': payment_status,
+    }
+
+
+def _bump(changed):
+    """
+    Add each delta to its bucket in two statements: an INSERT that creates
+    any missing bucket with zero totals (ignoring ones that exist), then a
+    single UPDATE incrementing every bucket by its own delta.
+    """
+    OrderRollup.objects.bulk_create(
+        [OrderRollup(**_lookup(key)) for key, _ in changed],
+        ignore_conflicts=True,
+    )
+
+    conditions = [Q(**_lookup(key)) for key, _ in changed]
+
+    def increment(column, position):
+        return F(column) + Case(
+            *(When(condition, then=Value(delta[position])) for condition, (_, delta) in zip(conditions, changed)),
+            default=Value(0),
+            output_field=OrderRollup._meta.get_field(column),
+        )
+
+    OrderRollup.objects.filter(reduce(operator.or_, conditions)).update(
+        order_count=increment('order_count', 0),
+        order_total=increment('order_total', 1),
+        payment_total=increment('payment_total', 2),
+    )
+
+
+def rebuild(batch_size=1000):
+    """
+    Recompute every rollup row from the Order and Payment tables.
+    """
+    money = DecimalField(max_digits=16, decimal_places=2)
+    with transaction.atomic():
+        OrderRollup.objects.all().delete()
+        for granularity, trunc in GRANULARITIES.items():
+            rows = (
+                Order.objects
+                .annotate(
+                    bucket=trunc('created_at'),
+                    payment_state=Coalesce('payment__status', Value('')),
+                )
+                .values('bucket', 'status', 'payment_state')
+                .annotate(
+                    order_count=Count('id'),
+                    order_total=Coalesce(Sum('cost'), Value(ZERO), output_field=money),
+                    payment_total=Coalesce(Sum('payment__amount'), Value(ZERO), output_field=money),
+                )
+                .order_by()
+            )
+            OrderRollup.objects.bulk_create(
+                (
+                    OrderRollup(
+                        granularity=granularity,
+                        bucket=row['bucket'],
+                        status=row['status'],
+                        payment_status=row['payment_state'],
+                        order_count=row['order_count'],
+                        order_total=row['order_total'],
+                        payment_total=row['payment_total'],
+                    )
+                    for row in rows.iterator(chunk_size=batch_size)
+                ),
+                batch_size=batch_size,
+            )
+    return OrderRollup.objects.count()
+
+
+def summarize(granularity, start, end):
+    """
+    Read the rollups for `[start, end)` and shape them per bucket.
+    """
+    rows = (
+        OrderRollup.objects
+        .filter(granularity=granularity, bucket__gte=truncate(start, granularity), bucket__lt=end)
+        .order_by('bucket')
+        .values_list('bucket', 'status', 'payment_status', 'order_count', 'order_total', 'payment_total')
+    )
+
+    buckets = {}
+    totals = _empty_summary()
+    for bucket, status, payment_status, count, order_total, payment_total in rows:
+        if not count:
+            continue
+        summary = buckets.setdefault(bucket, _empty_summary())
+        for target in (summary, totals):
+            target['orders'] += count
+            target['order_total'] += order_total
+            if payment_status == 'SUCCEEDED':
+                target['revenue'] += payment_total
+            target['by_status'][status] = target['by_status'].get(status, 0) + count
+            payment_key = payment_status or 'NONE'
+            target['by_payment_status'][payment_key] = target['by_payment_status'].get(payment_key, 0) + count
+
+    return [
+        {'bucket': bucket, **_format(summary)} for bucket, summary in buckets.items()
+    ], _format(totals)
+
+
+def _empty_summary():
+    return {
+        'orders': 0,
+        'order_total': ZERO,
+        'revenue': ZERO,
+        'by_status': {},
+        'by_payment_status': {},
+    }
+
+
+def _format(summary):
+    cents = Decimal('0.01')
+    summary['order_total'] = str(summary['order_total'].quantize(cents))
+    summary['revenue'] = str(summary['revenue'].quantize(cents))
+    return summary
@@ -0,0 +1,124 @@
+import re
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+TERM_RE = re.compile(r'\w+')
+
+# PostgreSQL: GIN index over the tsvector of both columns. Queries must use
+# the exact same expression for the planner to pick the index.
+PG_INDEX = 'orders_search_idx'
+PG_DOCUMENT = "to_tsvector('simple'::regconfig, description || ' ' || address)"
+
+INSTALL_MIGRATION = '0007_order_search'
+
+# SQLite: external-content FTS5 table kept in sync by triggers.
+FTS_TABLE = 'orders_order_fts'
+FTS_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f"""
+        AFTER INSERT ON orders_order BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, description, address) VALUES (new.id, new.description, new.address);
+        END""",
+    f'{FTS_TABLE}_delete': f"""
+        AFTER DELETE ON orders_order BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, address)
+            VALUES ('delete', old.id, old.description, old.address);
+        END""",
+    f'{FTS_TABLE}_update': f"""
+        AFTER UPDATE OF description, address ON orders_order BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, address)
+            VALUES ('delete', old.id, old.description, old.address);
+            INSERT INTO {FTS_TABLE}(rowid, description, address) VALUES (new.id, new.description, new.address);
+        END""",
+}
+
+
+def terms(q):
+    """
+    Words of a search string. Every word must match, as a prefix.
+    """
+    return TERM_RE.findall(q.lower())[:getattr(settings, 'ORDER_SEARCH_MAX_TERMS', 8)]
+
+
+def _matching_ids(words, vendor):
+    if vendor == 'postgresql':
+        # Words are \w+ only, so quoting them makes a valid tsquery.
+        tsquery = ' & '.join(f"'{word}':*" for word in words)
+        sql = f"SELECT id FROM orders_order WHERE {PG_DOCUMENT} @@ to_tsquery('simple'::regconfig, %s)"
+        return Q(pk__in=RawSQL(sql, [tsquery]))
+    if vendor == 'sqlite':
+        match = ' '.join(f'"{word}"*' for word in words)
+        return Q(pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match]))
+    # No full-text index on other backends: fall back to scanning.
+    condition = Q()
+    for word in words:
+        condition &= Q(description__icontains=word) | Q(address__icontains=word)
+    return condition
+
+
+def search_condition(q):
+    """
+    Filter matching orders whose description or address contains every
+    word of `q`. It combines with any other filter, so role scoping and
+    keyset ordering apply to the matches as usual.
+    """
+    words = terms(q)
+    if not words:
+        return Q(pk__in=[])
+    return _matching_ids(words, connection.vendor)
+
+
+def search(queryset, q):
+    return queryset.filter(search_condition(q))
+
+
+def install(schema_editor):
+    """
+    Create the full-text index for the current database. Safe to run again:
+    on SQLite, table rebuilds by later migrations drop the triggers, so
+    `post_migrate` calls this to put them back and resync the table.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON orders_order USING gin ({PG_DOCUMENT})')
+    elif vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s", [f'{FTS_TABLE}_%'])
+            existing = {name for (name,) in cursor.fetchall()}
+        if existing == set(FTS_TRIGGERS):
+            return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(description, address, content='orders_order', content_rowid='id')"
+        )
+        for name, body in FTS_TRIGGERS.items():
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+            schema_editor.execute(f'CREATE TRIGGER {name} {body}')
+        schema_editor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def reinstall(using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    `post_migrate` receiver restoring the SQLite triggers, once the
+    migration that installs them has been applied.
+    """
+    db = connections[using]
+    if db.vendor != 'sqlite':
+        return
+    if ('orders', INSTALL_MIGRATION) not in MigrationRecorder(db).applied_migrations():
+        return
+    with db.schema_editor() as schema_editor:
+        install(schema_editor)
+
+
+def uninstall(schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {PG_INDEX}')
+    elif vendor == 'sqlite':
+        for name in FTS_TRIGGERS:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
@@ -1,14 +1,21 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
 import stripe
-from .models import Order
+from apps.payments import checkout, gateway
+from respond.profiling import ProfiledListSerializer, ProfiledSerializerMixin
+from respond.sparse import SparseFieldsMixin
+from respond.streaming import ExportQuerySerializer
+from . import policies, signals
+from .models import Order, OrderRollup
 
 User = get_user_model()
-stripe.api_key = getattr(settings, 'STRIPE_SECRET_KEY', '')
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(ProfiledSerializerMixin, SparseFieldsMixin, serializers.ModelSerializer):
     customer = serializers.ReadOnlyField(source='customer.username')
     delivery_man = serializers.SlugRelatedField(
         slug_field='username',
@@ -23,17 +30,31 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = '__all__'
         read_only_fields = ('id', 'created_at', 'updated_at', 'customer')
+        list_serializer_class = ProfiledListSerializer
+        # What each field reads, for `?fields=` / `?exclude=`.
+        field_columns = {
+            'id': ('id',),
+            'customer': ('customer__username',),
+            'delivery_man': ('delivery_man__username',),
+            'payment_status': ('payment_status',),
+            'has_payment': ('payment_status',),
+            'description': ('description',),
+            'address': ('address',),
+            'cost': ('cost',),
+            'status': ('status',),
+            'created_at': ('created_at',),
+            'updated_at': ('updated_at',),
+        }
 
+    # Both read the denormalized column, never the `payment` relation.
     def get_payment_status(self, obj):
-        if hasattr(obj, 'payment'):
-            return obj.payment.status
-        return None
+        return obj.payment_status or None
 
     def get_has_payment(self, obj):
-        return hasattr(obj, 'payment')
+        return bool(obj.payment_status)
 
 
-class OrderCreateSerializer(serializers.ModelSerializer):
+class OrderCreateSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     create_payment = serializers.BooleanField(default=False, write_only=True)
     success_url = serializers.URLField(required=False, write_only=True)
     cancel_url = serializers.URLField(required=False, write_only=True)
@@ -47,7 +68,15 @@ class OrderCreateSerializer(serializers.ModelSerializer):
         create_payment = validated_data.pop('create_payment', False)
         success_url = validated_data.pop('success_url', None)
         cancel_url = validated_data.pop('cancel_url', None)
-        
+
+        # Async checkout: commit the order, its PENDING payment and the outbox
+        # job together; `process_checkout_jobs` opens the session later.
+        if create_payment and checkout.is_async():
+            with transaction.atomic():
+                order = Order.objects.create(**validated_data)
+                order.pending_payment = checkout.enqueue(order, success_url, cancel_url)
+            return order
+
         order = Order.objects.create(**validated_data)
         
         # If payment requested--> create checkout session==>>
@@ -55,40 +84,8 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             try:
                 from apps.payments.models import Payment
                 
-                amount_cents = int(order.cost * 100)  # Convert to cents
-                frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:8000')
-                
-                if not success_url:
-                    success_url = f'{frontend_url}/payment/success'
-                if not cancel_url:
-                    cancel_url = f'{frontend_url}/payment/cancel'
-                
-                #  order_id to cancel URL for better tracking
-                if '?' not in cancel_url:
-                    cancel_url += f'?order_id={order.id}'
-                else:
-                    cancel_url += f'&order_id={order.id}'
-
-                checkout_session = stripe.checkout.Session.create(
-                    payment_method_types=['card'],
-                    line_items=[{
-                        'price_data': {
-                            'currency': 'usd',
-                            'product_data': {
-                                'name': f'Courier Order #{order.id}',
-                                'description': order.description,
-                            },
-                            'unit_amount': amount_cents,
-                        },
-                        'quantity': 1,
-                    }],
-                    mode='payment',
-                    success_url=success_url + '?session_id={CHECKOUT_SESSION_ID}',
-                    cancel_url=cancel_url,
-                    metadata={
-                        'order_id': order.id,
-                        'customer_id': order.customer_id
-                    }
+                checkout_session = gateway.create_checkout_session(
+                    gateway.checkout_session_params(order, success_url, cancel_url)
                 )
                 
                 Payment.objects.create(
@@ -96,6 +93,7 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                     amount=order.cost,
                     stripe_payment_intent_id=checkout_session.id,
                     status='PENDING',
+                    checkout_url=checkout_session.url,
                 )
                 
                 order.checkout_url = checkout_session.url
@@ -105,4 +103,142 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 order.delete()
                 raise serializers.ValidationError(f'Failed to create payment session: {str(e)}')
         
-        return order 
\ No newline at end of file
+        return order
+
+
+class OrderBatchCreateSerializer(ProfiledSerializerMixin, serializers.Serializer):
+    """
+    Create many orders in one transaction. Items are validated by
+    `OrderCreateSerializer`, but payment options apply to the whole batch.
+    """
+    orders = OrderCreateSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=getattr(settings, 'ORDER_BATCH_MAX_SIZE', 500),
+    )
+    create_payment = serializers.BooleanField(default=False)
+    success_url = serializers.URLField(required=False)
+    cancel_url = serializers.URLField(required=False)
+
+    def create(self, validated_data):
+        from apps.payments.models import Payment
+
+        customer = self.context['request'].user
+        success_url = validated_data.get('success_url')
+        cancel_url = validated_data.get('cancel_url')
+        fields = ('description', 'address', 'cost')
+        orders = [
+            Order(customer=customer, **{field: item[field] for field in fields if field in item})
+            for item in validated_data['orders']
+        ]
+        create_payment = validated_data['create_payment']
+        session = None
+
+        with transaction.atomic():
+            Order.objects.bulk_create(orders)
+
+            if create_payment and checkout.is_async():
+                checkout.enqueue_many(orders, success_url, cancel_url)
+            else:
+                for order in orders:
+                    # Tell the serializer there is no payment without asking the database.
+                    Order.payment.related.set_cached_value(order, None)
+
+            signals.orders_bulk_created(orders)
+
+        if not create_payment or checkout.is_async():
+            return {'orders': orders, 'session': None}
+
+        # One checkout session pays for the whole batch. As in
+        # `OrderCreateSerializer`, it is opened once the orders are committed,
+        # so no transaction stays open for the Stripe round trip.
+        try:
+            session = gateway.create_checkout_session(
+                gateway.batch_checkout_session_params(orders, success_url, cancel_url)
+            )
+        except stripe.error.StripeError as e:
+            Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+            raise serializers.ValidationError(f'Failed to create payment session: {str(e)}')
+
+        # Every order still gets its own Payment, all sharing the session id.
+        with transaction.atomic():
+            payments = Payment.objects.bulk_create([
+                Payment(
+                    order=order,
+                    amount=order.cost,
+                    stripe_payment_intent_id=session.id,
+                    status='PENDING',
+                    checkout_url=session.url,
+                )
+                for order in orders
+            ])
+            signals.payments_bulk_updated([(payment, ('', None)) for payment in payments])
+
+        return {'orders': orders, 'session': session}
+
+
+class OrderBulkStatusSerializer(ProfiledSerializerMixin, serializers.Serializer):
+    order_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=getattr(settings, 'ORDER_BULK_STATUS_MAX_SIZE', 500),
+    )
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+
+    def create(self, validated_data):
+        """
+        Move the caller's assigned orders to `status` with one conditional
+        UPDATE. Ids that are unknown or assigned to someone else are
+        reported back instead of failing the whole request.
+        """
+        assigned_orders = policies.editable_orders(self.context['request'].user)
+        order_ids = list(dict.fromkeys(validated_data['order_ids']))
+        new_status = validated_data['status']
+
+        with transaction.atomic():
+            rows = list(
+                assigned_orders
+                .select_for_update(of=('self',))
+                .filter(id__in=order_ids)
+                .values('id', *signals.BULK_SNAPSHOT_FIELDS)
+            )
+            assigned = {row['id']: row for row in rows}
+            changing = [row for row in rows if row['status'] != new_status]
+            if changing:
+                assigned_orders.filter(
+                    id__in=[row['id'] for row in changing],
+                ).update(status=new_status, updated_at=timezone.now())
+                signals.orders_bulk_updated(changing, status=new_status)
+
+        changed_ids = {row['id'] for row in changing}
+        return {
+            'updated': [pk for pk in order_ids if pk in changed_ids],
+            'unchanged': [pk for pk in order_ids if pk in assigned and pk not in changed_ids],
+            'rejected': [
+                {'id': pk, 'reason': 'Order not found or not assigned to you.'}
+                for pk in order_ids if pk not in assigned
+            ],
+        }
+
+
+class OrderStatsQuerySerializer(ProfiledSerializerMixin, serializers.Serializer):
+    granularity = serializers.ChoiceField(
+        choices=OrderRollup.GRANULARITY_CHOICES,
+        default=OrderRollup.GRANULARITY_DAY,
+    )
+    start = serializers.DateTimeField(required=False)
+    end = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.now()
+        if 'start' not in attrs:
+            window = timedelta(hours=48) if attrs['granularity'] == OrderRollup.GRANULARITY_HOUR else timedelta(days=30)
+            attrs['start'] = end - window
+        attrs['end'] = end
+        if attrs['start'] >= attrs['end']:
+            raise serializers.ValidationError({'start': 'start must be before end.'})
+        return attrs
+
+
+class OrderExportQuerySerializer(ExportQuerySerializer):
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
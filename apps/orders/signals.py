@@ -0,0 +1,232 @@
+from collections import defaultdict
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.payments.models import Payment
+
+from . import cache, rollups
+from .models import Order
+
+ORDER_FIELDS = ('created_at', 'status', 'cost')
+OWNER_FIELDS = ('customer_id', 'delivery_man_id')
+PAYMENT_FIELDS = ('status', 'amount')
+# What bulk writers read before a `QuerySet.update()`, for `orders_bulk_updated`.
+BULK_SNAPSHOT_FIELDS = ORDER_FIELDS + OWNER_FIELDS + ('payment__status', 'payment__amount')
+
+
+def _snapshot(instance, model, fields):
+    """
+    Make sure `instance._loaded_values` holds the stored values of `fields`,
+    reading them from the database only when the instance was built or
+    loaded without them.
+    """
+    loaded = getattr(instance, '_loaded_values', None) or {}
+    if all(field in loaded for field in fields):
+        return
+    stored = model.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    instance._loaded_values = {**loaded, **stored}
+
+
+def _current(instance, fields):
+    return {
+        field: instance._meta.get_field(field).to_python(getattr(instance, field))
+        for field in fields
+    }
+
+
+def _payment_of(order):
+    if Order.payment.is_cached(order):
+        payment = getattr(order, 'payment', None)
+        return (payment.status, payment.amount) if payment else ('', None)
+    if 'payment_status' not in order.get_deferred_fields() and not order.payment_status:
+        # The denormalized status is empty exactly when there is no payment.
+        return ('', None)
+    return Payment.objects.filter(order_id=order.pk).values_list('status', 'amount').first() or ('', None)
+
+
+def _order_of(payment):
+    fields = ORDER_FIELDS + OWNER_FIELDS
+    if Payment.order.is_cached(payment):
+        return {field: getattr(payment.order, field) for field in fields}
+    return Order.objects.filter(pk=payment.order_id).values(*fields).first()
+
+
+def _invalidate(*owners):
+    cache.invalidate(
+        customer_ids=[owner['customer_id'] for owner in owners if 'customer_id' in owner],
+        delivery_man_ids=[owner['delivery_man_id'] for owner in owners if 'delivery_man_id' in owner],
+    )
+
+
+def _touch_order(payment, payment_status):
+    """
+    Copy the payment's status onto its order and bump the order's
+    `updated_at`, so order ETags (and anything else keyed on `updated_at`)
+    see the new payment state.
+    """
+    now = timezone.now()
+    Order.objects.filter(pk=payment.order_id).update(updated_at=now, payment_status=payment_status)
+    if Payment.order.is_cached(payment):
+        payment.order.updated_at = now
+        payment.order.payment_status = payment_status
+
+
+def _set_payment_status(orders, now=None):
+    """
+    Write each order's in-memory `payment_status` with one UPDATE per
+    distinct status.
+    """
+    by_status = defaultdict(list)
+    for order in orders:
+        by_status[order.payment_status].append(order.pk)
+    changes = {'updated_at': now} if now else {}
+    for payment_status, order_ids in by_status.items():
+        Order.objects.filter(pk__in=order_ids).update(payment_status=payment_status, **changes)
+
+
+@receiver(pre_save, sender=Order)
+def snapshot_order(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        _snapshot(instance, Order, ORDER_FIELDS + OWNER_FIELDS)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_values = {} if created else getattr(instance, '_loaded_values', {})
+    new_values = _current(instance, ORDER_FIELDS + OWNER_FIELDS)
+    instance._loaded_values = {**old_values, **new_values}
+    # Every save may change what a list shows (description, address, ...).
+    _invalidate(old_values, new_values)
+
+    known = all(field in old_values for field in ORDER_FIELDS)
+    if known and all(old_values[field] == new_values[field] for field in ORDER_FIELDS):
+        return
+
+    payment = ('', None) if created else _payment_of(instance)
+    old = rollups.OrderState(*(old_values[field] for field in ORDER_FIELDS), *payment) if known else None
+    new = rollups.OrderState(*(new_values[field] for field in ORDER_FIELDS), *payment)
+    rollups.apply_transitions([(old, new)])
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    _invalidate(_current(instance, OWNER_FIELDS))
+    # The cascade has already deleted (and rolled back out) the order's payment.
+    old = rollups.OrderState(*(getattr(instance, field) for field in ORDER_FIELDS), '', None)
+    rollups.apply_transitions([(old, None)])
+
+
+@receiver(pre_save, sender=Payment)
+def snapshot_payment(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        _snapshot(instance, Payment, PAYMENT_FIELDS)
+
+
+@receiver(post_save, sender=Payment)
+def payment_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_values = {} if created else getattr(instance, '_loaded_values', {})
+    new_values = _current(instance, PAYMENT_FIELDS)
+    instance._loaded_values = {**old_values, **new_values}
+
+    old_payment = (old_values.get('status', ''), old_values.get('amount'))
+    new_payment = (new_values['status'], new_values['amount'])
+    if old_payment == new_payment:
+        return
+
+    _touch_order(instance, new_payment[0])
+    order = _order_of(instance)
+    if order is None:
+        return
+    _invalidate(order)
+    order_state = [order[field] for field in ORDER_FIELDS]
+    rollups.apply_transitions([
+        (rollups.OrderState(*order_state, *old_payment), rollups.OrderState(*order_state, *new_payment)),
+    ])
+
+
+@receiver(post_delete, sender=Payment)
+def payment_deleted(sender, instance, **kwargs):
+    _touch_order(instance, '')
+    order = _order_of(instance)
+    if order is None:
+        return
+    _invalidate(order)
+    order_state = [order[field] for field in ORDER_FIELDS]
+    rollups.apply_transitions([
+        (rollups.OrderState(*order_state, instance.status, instance.amount), rollups.OrderState(*order_state, '', None)),
+    ])
+
+
+def payments_bulk_updated(changes):
+    """
+    Counterpart of `payment_saved` for payments written with `bulk_update()`,
+    which sends no signals. `changes` holds `(payment, (old_status, old_amount))`
+    pairs; each payment must have its order loaded.
+    """
+    transitions, orders, owners = [], [], []
+    for payment, old_payment in changes:
+        new_payment = (payment.status, payment.amount)
+        loaded = getattr(payment, '_loaded_values', {})
+        payment._loaded_values = {**loaded, **_current(payment, PAYMENT_FIELDS)}
+        if tuple(old_payment) == new_payment:
+            continue
+        order = payment.order
+        order_state = [getattr(order, field) for field in ORDER_FIELDS]
+        transitions.append((
+            rollups.OrderState(*order_state, *old_payment),
+            rollups.OrderState(*order_state, *new_payment),
+        ))
+        order.payment_status = payment.status
+        orders.append(order)
+        owners.append({field: getattr(order, field) for field in OWNER_FIELDS})
+
+    if not transitions:
+        return
+    _set_payment_status(orders, now=timezone.now())
+    rollups.apply_transitions(transitions)
+    _invalidate(*owners)
+
+
+def orders_bulk_created(orders):
+    """
+    Counterpart of `order_saved` / `payment_saved` for orders (and their
+    payments) inserted with `bulk_create()`, which sends no signals.
+    """
+    transitions, paid = [], []
+    for order in orders:
+        payment = getattr(order, 'payment', None) if Order.payment.is_cached(order) else None
+        if payment is not None:
+            order.payment_status = payment.status
+            paid.append(order)
+        transitions.append((None, rollups.OrderState(
+            order.created_at, order.status, order.cost,
+            payment.status if payment else '', payment.amount if payment else None,
+        )))
+    _set_payment_status(paid)
+    rollups.apply_transitions(transitions)
+    _invalidate(*(_current(order, OWNER_FIELDS) for order in orders))
+
+
+def orders_bulk_updated(rows, **changes):
+    """
+    Counterpart of `order_saved` for `QuerySet.update(**changes)`, which
+    sends no signals. `rows` are the updated orders' `BULK_SNAPSHOT_FIELDS`
+    values as read before the update.
+    """
+    transitions, owners = [], []
+    for row in rows:
+        new_row = {**row, **changes}
+        payment = (row['payment__status'] or '', row['payment__amount'])
+        transitions.append((
+            rollups.OrderState(*(row[field] for field in ORDER_FIELDS), *payment),
+            rollups.OrderState(*(new_row[field] for field in ORDER_FIELDS), *payment),
+        ))
+        owners += [row, new_row]
+    rollups.apply_transitions(transitions)
+    _invalidate(*owners)
@@ -1,3 +1,726 @@
-from django.test import TestCase
+import copy
+import csv
+import io
+import json
+from importlib import import_module
+from base64 import b64encode
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here. 
\ No newline at end of file
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APITestCase
+
+from apps.orders import dispatch, rollups
+from apps.orders.filters import FILTER_INDEXES, ORDERING_INDEXES, ORDERINGS, OrderFilter
+from apps.orders.models import Order, OrderRollup
+from apps.orders.serializers import OrderSerializer
+from apps.orders.views import OrderExportView
+from apps.payments.models import CheckoutJob, Payment
+from apps.users.authentication import user_cache
+from apps.users.models import User
+from apps.users.tokens import RoleRefreshToken
+from respond.renderers import FastStandardizedJSONRenderer, StandardizedJSONRenderer
+from respond.querybudget import assert_within_query_budget, query_budget
+
+
+class OrderTestCase(APITestCase):
+
+    def setUp(self):
+        # Budgets are for a cold cache, token version lookups included.
+        cache.clear()
+        user_cache.clear()
+        self.admin = User.objects.create_user('admin', 'admin@example.com', 'password', role='admin')
+        self.customer = User.objects.create_user('customer', 'customer@example.com', 'password', role='user')
+        self.delivery_man = User.objects.create_user('dm', 'dm@example.com', 'password', role='delivery_man')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+        return client
+
+    def create_orders(self, count, **kwargs):
+        kwargs = {
+            'customer': self.customer, 'delivery_man': self.delivery_man,
+            'description': 'Parcel', 'address': 'Dhaka', 'cost': Decimal('10.00'), **kwargs,
+        }
+        return [Order.objects.create(**kwargs) for _ in range(count)]
+
+
+class OrderQueryBudgetTests(OrderTestCase):
+
+    def test_list(self):
+        self.create_orders(5)
+        for user in (self.admin, self.customer, self.delivery_man):
+            client = self.client_for(user)
+            cache.clear()
+            with query_budget('order-list'):
+                response = client.get(reverse('order-list'))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['Data']['orders']), 5)
+
+    def test_detail(self):
+        order, = self.create_orders(1)
+        client = self.client_for(self.customer)
+        with query_budget('order-detail'):
+            response = client.get(reverse('order-detail', args=[order.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_status(self):
+        orders = self.create_orders(20)
+        client = self.client_for(self.delivery_man)
+        with query_budget('order-bulk-status'):
+            response = client.post(
+                reverse('order-bulk-status'),
+                {'order_ids': [order.pk for order in orders], 'status': 'DELIVERED'},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Order.objects.filter(status='DELIVERED').count(), 20)
+
+    def test_create(self):
+        client = self.client_for(self.customer)
+        with query_budget('order-create'):
+            response = client.post(
+                reverse('order-create'), {'description': 'Parcel', 'address': 'Dhaka', 'cost': '10.00'}, format='json',
+            )
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(
+        STRIPE_GATEWAY_BACKEND='apps.payments.gateway.FakeBackend', STRIPE_CHECKOUT_ASYNC=False,
+    )
+    def test_create_with_payment(self):
+        client = self.client_for(self.customer)
+        with query_budget('order-create'):
+            response = client.post(
+                reverse('order-create'),
+                {'description': 'Parcel', 'address': 'Dhaka', 'cost': '10.00', 'create_payment': True},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Payment.objects.get().order.customer, self.customer)
+
+    @override_settings(
+        STRIPE_GATEWAY_BACKEND='apps.payments.gateway.FakeBackend', STRIPE_CHECKOUT_ASYNC=False,
+    )
+    def test_batch_create(self):
+        client = self.client_for(self.customer)
+        items = [{'description': f'Parcel {i}', 'address': 'Dhaka', 'cost': '10.00'} for i in range(50)]
+        with query_budget('order-batch-create'):
+            response = client.post(
+                reverse('order-batch-create'), {'orders': items, 'create_payment': True}, format='json',
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Payment.objects.count(), 50)
+
+    def test_update(self):
+        order, = self.create_orders(1)
+        Payment.objects.create(order=order, amount=order.cost, stripe_payment_intent_id='cs_1', status='SUCCEEDED')
+        client = self.client_for(self.admin)
+        with query_budget('order-update'):
+            response = client.patch(
+                reverse('order-update', args=[order.pk]), {'status': 'DELIVERED', 'cost': '12.00'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete(self):
+        order, = self.create_orders(1)
+        Payment.objects.create(order=order, amount=order.cost, stripe_payment_intent_id='cs_1', status='SUCCEEDED')
+        client = self.client_for(self.admin)
+        with query_budget('order-delete'):
+            response = client.delete(reverse('order-delete', args=[order.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Order.objects.exists())
+
+    def test_stats(self):
+        self.create_orders(5)
+        response = self.client_for(self.admin).get(reverse('order-stats'), {'granularity': 'day'})
+        self.assertEqual(response.status_code, 200)
+        assert_within_query_budget(response)
+
+    def test_export(self):
+        self.create_orders(5)
+        response = self.client_for(self.admin).get(reverse('order-export'), {'export_format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        # Counts the queries run before the first row; the rows are read while streaming.
+        assert_within_query_budget(response)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 6)
+
+
+class OrderListCacheTests(OrderTestCase):
+
+    def test_update_invalidates_cached_lists(self):
+        order, = self.create_orders(1)
+        customer, delivery_man = self.client_for(self.customer), self.client_for(self.delivery_man)
+
+        self.assertEqual(customer.get(reverse('order-list'))['X-Cache'], 'MISS')
+        response = customer.get(reverse('order-list'))
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()['Data']['orders'][0]['status'], 'PENDING')
+
+        response = delivery_man.patch(reverse('order-update', args=[order.pk]), {'status': 'DELIVERED'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = customer.get(reverse('order-list'))
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['Data']['orders'][0]['status'], 'DELIVERED')
+
+    def test_reassignment_invalidates_both_delivery_men(self):
+        order, = self.create_orders(1)
+        other = User.objects.create_user('dm2', 'dm2@example.com', 'password', role='delivery_man')
+        delivery_man, other_client = self.client_for(self.delivery_man), self.client_for(other)
+        delivery_man.get(reverse('order-list'))
+        other_client.get(reverse('order-list'))
+
+        response = self.client_for(self.admin).patch(
+            reverse('order-update', args=[order.pk]), {'delivery_man': 'dm2'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(delivery_man.get(reverse('order-list')).json()['Data']['orders'], [])
+        self.assertEqual(len(other_client.get(reverse('order-list')).json()['Data']['orders']), 1)
+
+    def test_delete_invalidates_cached_lists(self):
+        order, = self.create_orders(1)
+        customer = self.client_for(self.customer)
+        customer.get(reverse('order-list'))
+
+        response = self.client_for(self.admin).delete(reverse('order-delete', args=[order.pk]))
+        self.assertEqual(response.status_code, 204)
+
+        self.assertEqual(customer.get(reverse('order-list')).json()['Data']['orders'], [])
+
+    def test_unchanged_list_is_not_modified(self):
+        self.create_orders(2)
+        customer = self.client_for(self.customer)
+        etag = customer.get(reverse('order-list'))['ETag']
+        self.assertEqual(customer.get(reverse('order-list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class OrderPaginationTests(OrderTestCase):
+
+    def walk(self, client, url, link):
+        # Ids of each page from `url` on, following `link`, and the last page's URL.
+        pages = []
+        while url:
+            last, data = url, client.get(url).json()['Data']
+            pages.append([order['id'] for order in data['orders']])
+            url = data[link]
+        return pages, last
+
+    def test_cursor_walk_visits_every_order_once(self):
+        orders = self.create_orders(25)
+        # Equal timestamps: the pk tiebreaker keeps the pages apart.
+        Order.objects.update(created_at=timezone.now())
+        client = self.client_for(self.customer)
+
+        pages, last = self.walk(client, reverse('order-list') + '?page_size=10', 'next')
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(sum(pages, []), sorted((order.pk for order in orders), reverse=True))
+        self.assertEqual(self.walk(client, last, 'previous')[0], pages[::-1])
+
+    def test_tampered_cursor_is_rejected(self):
+        self.create_orders(1)
+        client = self.client_for(self.customer)
+        for cursor in ('zzz', b64encode(b'p=yesterday&i=1').decode(), b64encode(b'p=2024-01-01&i=-1').decode()):
+            response = client.get(reverse('order-list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json()['errorDetails']['field'], 'cursor')
+
+
+class OrderRollupTests(OrderTestCase):
+
+    def rollup_rows(self):
+        rows = OrderRollup.objects.filter(order_count__gt=0).values_list(
+            'granularity', 'bucket', 'status', 'payment_status', 'order_count', 'order_total', 'payment_total',
+        )
+        return sorted(rows)
+
+    def test_deltas_match_rebuild(self):
+        paid, unpaid, deleted = self.create_orders(3)
+        Payment.objects.create(order=paid, amount=paid.cost, stripe_payment_intent_id='cs_1', status='SUCCEEDED')
+        admin = self.client_for(self.admin)
+        response = admin.patch(reverse('order-update', args=[paid.pk]), {'status': 'DELIVERED'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = admin.patch(reverse('order-update', args=[unpaid.pk]), {'cost': '15.00'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(admin.delete(reverse('order-delete', args=[deleted.pk])).status_code, 204)
+
+        incremental = self.rollup_rows()
+        rollups.rebuild()
+        self.assertEqual(incremental, self.rollup_rows())
+        self.assertEqual({row[2:4] for row in incremental}, {('DELIVERED', 'SUCCEEDED'), ('PENDING', '')})
+
+    def test_stats(self):
+        paid, _ = self.create_orders(2)
+        Payment.objects.create(order=paid, amount=paid.cost, stripe_payment_intent_id='cs_1', status='SUCCEEDED')
+
+        response = self.client_for(self.admin).get(reverse('order-stats'), {'granularity': 'hour'})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['Data']
+        self.assertEqual(sum(bucket['orders'] for bucket in data['buckets']), 2)
+        self.assertEqual(data['totals'], {
+            'orders': 2,
+            'order_total': '20.00',
+            'revenue': '10.00',
+            'by_status': {'PENDING': 2},
+            'by_payment_status': {'SUCCEEDED': 1, 'NONE': 1},
+        })
+
+    def test_stats_is_admin_only(self):
+        self.assertEqual(self.client_for(self.customer).get(reverse('order-stats')).status_code, 403)
+
+
+class OrderExportTests(OrderTestCase):
+
+    def export(self, **params):
+        response = self.client_for(self.admin).get(reverse('order-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        paid, unpaid = self.create_orders(2)
+        Payment.objects.create(order=paid, amount=paid.cost, stripe_payment_intent_id='cs_1', status='SUCCEEDED')
+
+        response, content = self.export()
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertRegex(response['Content-Disposition'], r'^attachment; filename="orders-\d{14}\.ndjson"$')
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual([row['id'] for row in rows], [paid.pk, unpaid.pk])
+        self.assertEqual(rows[0]['cost'], '10.00')
+        self.assertEqual(rows[0]['customer'], 'customer')
+        self.assertEqual([row['payment_status'] for row in rows], ['SUCCEEDED', None])
+
+    def test_csv(self):
+        order, = self.create_orders(1, status='DELIVERED')
+        self.create_orders(1)
+
+        response, content = self.export(export_format='csv', status='DELIVERED')
+
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        header, *rows = csv.reader(io.StringIO(content))
+        self.assertEqual(header, [name for name, _ in OrderExportView.columns])
+        self.assertEqual([row[0] for row in rows], [str(order.pk)])
+        self.assertEqual(rows[0][header.index('payment_status')], '')
+
+    def test_column_whitelist(self):
+        self.create_orders(1)
+        _, content = self.export(export_format='csv', fields='id,cost,status', exclude='status')
+        self.assertEqual(content.splitlines()[0], 'id,cost')
+
+        response = self.client_for(self.admin).get(reverse('order-export'), {'fields': 'id,customer__password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errorDetails']['field'], 'fields')
+
+    def test_export_is_admin_only(self):
+        self.assertEqual(self.client_for(self.customer).get(reverse('order-export')).status_code, 403)
+
+
+class RendererTests(OrderTestCase):
+
+    def render(self, renderer_class, data, status, accepted_media_type):
+        # The envelope pops `message` out of the data, so each renderer gets a copy.
+        context = {'response': Response(status=status)}
+        return renderer_class().render(copy.deepcopy(data), accepted_media_type, context)
+
+    def assert_same_bytes(self, data, status=200, accepted_media_type='application/json'):
+        self.assertEqual(
+            self.render(FastStandardizedJSONRenderer, data, status, accepted_media_type),
+            self.render(StandardizedJSONRenderer, data, status, accepted_media_type),
+        )
+
+    def test_orders_render_identically(self):
+        self.create_orders(3, description='Fragile \u2028 glass, "handle" with care \u09a2\u09be\u0995\u09be')
+        orders = OrderSerializer(Order.objects.order_by('id'), many=True).data
+        self.assert_same_bytes({'message': 'Orders retrieved successfully', 'orders': orders, 'next': None})
+        self.assert_same_bytes({'message': 'ok', 'cost': Decimal('10.50'), 'when': timezone.now()})
+        self.assert_same_bytes({'message': 'ok', 'orders': orders}, accepted_media_type='application/json; indent=4')
+
+    def test_errors_render_identically(self):
+        self.assert_same_bytes({'cost': ['A valid number is required.']}, status=400)
+        self.assert_same_bytes({'orders': [{}, {'cost': ['A valid number is required.']}]}, status=400)
+        self.assert_same_bytes({'detail': 'Not found.'}, status=404)
+
+    def test_values_orjson_refuses_fall_back(self):
+        self.assert_same_bytes({'message': 'ok', 'count': 2 ** 70, 'keys': {1: 'one'}})
+
+
+@override_settings(STRIPE_GATEWAY_BACKEND='apps.payments.gateway.FakeBackend')
+class OrderBatchCreateTests(OrderTestCase):
+
+    def create_batch(self, count, **payload):
+        items = [{'description': f'Parcel {i}', 'address': 'Dhaka', 'cost': '10.00'} for i in range(count)]
+        return self.client_for(self.customer).post(
+            reverse('order-batch-create'), {'orders': items, **payload}, format='json',
+        )
+
+    def test_without_payment(self):
+        response = self.create_batch(3)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()['Data']
+        self.assertEqual([order['has_payment'] for order in data['orders']], [False] * 3)
+        self.assertNotIn('checkout_url', data)
+        self.assertEqual(Order.objects.filter(customer=self.customer).count(), 3)
+
+    @override_settings(STRIPE_CHECKOUT_ASYNC=False)
+    def test_one_checkout_session_pays_for_the_batch(self):
+        response = self.create_batch(3, create_payment=True)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()['Data']
+
+        payments = Payment.objects.all()
+        self.assertEqual(len(payments), 3)
+        self.assertEqual({payment.stripe_payment_intent_id for payment in payments}, {data['session_id']})
+        self.assertEqual({payment.checkout_url for payment in payments}, {data['checkout_url']})
+        self.assertEqual(set(Order.objects.values_list('payment_status', flat=True)), {'PENDING'})
+
+    @override_settings(STRIPE_CHECKOUT_ASYNC=True)
+    def test_async_checkout_queues_a_job_per_order(self):
+        response = self.create_batch(3, create_payment=True)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()['Data']
+
+        self.assertNotIn('checkout_url', data)
+        jobs = CheckoutJob.objects.select_related('payment')
+        self.assertEqual(
+            sorted((job.payment.order_id, job.payment_id) for job in jobs),
+            sorted((order['id'], order['payment_id']) for order in data['orders']),
+        )
+        self.assertTrue(all(order['checkout_poll_url'] for order in data['orders']))
+
+    @override_settings(
+        STRIPE_GATEWAY_BACKEND='apps.payments.tests.UnavailableBackend', STRIPE_CHECKOUT_ASYNC=False,
+    )
+    def test_stripe_error_rolls_the_batch_back(self):
+        # Deleting the committed orders again runs past the budget of the normal path.
+        with self.assertLogs('respond.middleware', 'WARNING'):
+            response = self.create_batch(3, create_payment=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+
+    def test_invalid_item_creates_nothing(self):
+        items = [{'description': 'Parcel', 'address': 'Dhaka', 'cost': '10.00'}, {'description': 'Parcel'}]
+        response = self.client_for(self.customer).post(reverse('order-batch-create'), {'orders': items}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errorDetails']['items'][0]['index'], 1)
+        self.assertFalse(Order.objects.exists())
+
+
+class DispatchTests(OrderTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user('dm2', 'dm2@example.com', 'password', role='delivery_man')
+        User.objects.create_user('dm3', 'dm3@example.com', 'password', role='delivery_man', is_active=False)
+
+    def open_orders(self):
+        counts = dict.fromkeys([self.delivery_man.pk, self.other.pk], 0)
+        for delivery_man_id in Order.objects.filter(status='PENDING').values_list('delivery_man_id', flat=True):
+            counts[delivery_man_id] = counts.get(delivery_man_id, 0) + 1
+        return counts
+
+    def test_orders_go_to_the_least_loaded(self):
+        self.create_orders(2)
+        self.create_orders(3, status='DELIVERED')  # not open
+        queued = self.create_orders(5, delivery_man=None)
+
+        result = dispatch.dispatch(batch_size=2)
+
+        self.assertEqual((result.assigned, result.delivery_men), (5, 2))
+        self.assertEqual(self.open_orders(), {self.delivery_man.pk: 4, self.other.pk: 3})
+        # The idle delivery man gets the oldest orders first.
+        self.assertEqual(Order.objects.get(pk=queued[0].pk).delivery_man, self.other)
+        self.assertFalse(dispatch.queue().exists())
+
+    @override_settings(DISPATCH_MAX_OPEN_ORDERS=2)
+    def test_full_delivery_men_are_skipped(self):
+        self.create_orders(2)
+        self.create_orders(5, delivery_man=None)
+
+        result = dispatch.dispatch()
+
+        self.assertEqual((result.assigned, result.delivery_men), (2, 1))
+        self.assertEqual(self.open_orders(), {self.delivery_man.pk: 2, self.other.pk: 2, None: 3})
+        self.assertEqual(dispatch.dispatch().assigned, 0)
+
+    def test_limit(self):
+        self.create_orders(5, delivery_man=None)
+        self.assertEqual(dispatch.dispatch(batch_size=2, limit=3).assigned, 3)
+        self.assertEqual(dispatch.queue().count(), 2)
+
+    def test_assigned_orders_show_in_cached_lists(self):
+        clients = {user.pk: self.client_for(user) for user in (self.delivery_man, self.other)}
+        for client in clients.values():
+            self.assertEqual(client.get(reverse('order-list')).json()['Data']['orders'], [])
+        order, = self.create_orders(1, delivery_man=None)
+
+        dispatch.dispatch()
+
+        order.refresh_from_db()
+        response = clients[order.delivery_man_id].get(reverse('order-list'))
+        self.assertEqual([item['id'] for item in response.json()['Data']['orders']], [order.pk])
+
+
+class OrderSearchTests(OrderTestCase):
+
+    def search(self, user, q):
+        response = self.client_for(user).get(reverse('order-list'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return {order['id'] for order in response.json()['Data']['orders']}
+
+    def test_every_word_must_match_as_a_prefix(self):
+        glass, = self.create_orders(1, description='Fragile glassware', address='House 4, Gulshan')
+        books, = self.create_orders(1, description='Books', address='Road 12, Gulshan-2')
+        self.create_orders(1, description='Clothes', address='Dhanmondi')
+
+        self.assertEqual(self.search(self.customer, 'gulshan'), {glass.pk, books.pk})
+        self.assertEqual(self.search(self.customer, 'FRAG gulsh'), {glass.pk})
+        self.assertEqual(self.search(self.customer, 'fragile dhanmondi'), set())
+        self.assertEqual(self.search(self.customer, '"*'), set())
+
+    def test_edits_and_deletes_are_searchable(self):
+        order, other = self.create_orders(2, description='Books')
+        Order.objects.filter(pk=order.pk).update(description='Fragile lamp')
+        other.delete()
+
+        self.assertEqual(self.search(self.customer, 'lamp'), {order.pk})
+        self.assertEqual(self.search(self.customer, 'books'), set())
+
+    def test_results_stay_in_scope(self):
+        own, = self.create_orders(1, description='Fragile lamp')
+        other = User.objects.create_user('other', 'other@example.com', 'password', role='user')
+        theirs, = self.create_orders(1, customer=other, description='Fragile lamp')
+
+        self.assertEqual(self.search(self.customer, 'lamp'), {own.pk})
+        self.assertEqual(self.search(self.admin, 'lamp'), {own.pk, theirs.pk})
+
+    def test_admin_search(self):
+        lamp, = self.create_orders(1, description='Fragile lamp')
+        other = User.objects.create_user('Rahim', 'rahim@example.com', 'password', role='user')
+        theirs, = self.create_orders(1, customer=other, description='Books')
+        superuser = User.objects.create_superuser('root', 'root@example.com', 'password')
+        self.client.force_login(superuser)
+
+        for q, expected in (('lamp', [lamp]), ('rahim', [theirs]), ('nothing', [])):
+            response = self.client.get(reverse('admin:orders_order_changelist'), {'q': q})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(list(response.context['cl'].queryset), expected, q)
+
+
+class PaymentStatusSyncTests(OrderTestCase):
+
+    def payment_status(self, order):
+        return Order.objects.values_list('payment_status', flat=True).get(pk=order.pk)
+
+    def test_payment_changes_are_copied_to_the_order(self):
+        order, = self.create_orders(1)
+        self.assertEqual(self.payment_status(order), '')
+
+        payment = Payment.objects.create(order=order, amount=order.cost, stripe_payment_intent_id='cs_1')
+        self.assertEqual(self.payment_status(order), 'PENDING')
+        payment.status = 'SUCCEEDED'
+        payment.save()
+        self.assertEqual(self.payment_status(order), 'SUCCEEDED')
+        payment.delete()
+        self.assertEqual(self.payment_status(order), '')
+
+    def test_list_filters_on_the_copy(self):
+        paid, unpaid = self.create_orders(2)
+        Payment.objects.create(order=paid, amount=paid.cost, stripe_payment_intent_id='cs_1', status='FAILED')
+        client = self.client_for(self.customer)
+
+        for value, expected in (('FAILED', [paid.pk]), ('NONE', [unpaid.pk]), ('SUCCEEDED', [])):
+            response = client.get(reverse('order-list'), {'payment_status': value})
+            self.assertEqual([order['id'] for order in response.json()['Data']['orders']], expected, value)
+        data = client.get(reverse('order-detail', args=[paid.pk])).json()['Data']
+        self.assertEqual((data['payment_status'], data['has_payment']), ('FAILED', True))
+
+    def test_backfill_migration(self):
+        backfill = import_module('apps.orders.migrations.0009_backfill_order_payment_status').backfill
+        paid, unpaid = self.create_orders(2)
+        Payment.objects.create(order=paid, amount=paid.cost, stripe_payment_intent_id='cs_1', status='SUCCEEDED')
+        Order.objects.update(payment_status='')
+
+        backfill(django_apps, None)
+
+        self.assertEqual((self.payment_status(paid), self.payment_status(unpaid)), ('SUCCEEDED', ''))
+
+
+class OrderScopingTests(OrderTestCase):
+
+    def test_other_users_orders_are_not_found(self):
+        order, = self.create_orders(1)
+        other_customer = User.objects.create_user('other', 'other@example.com', 'password', role='user')
+        other_delivery_man = User.objects.create_user('dm2', 'dm2@example.com', 'password', role='delivery_man')
+
+        for user in (other_customer, other_delivery_man):
+            client = self.client_for(user)
+            self.assertEqual(client.get(reverse('order-detail', args=[order.pk])).status_code, 404)
+            self.assertEqual(client.get(reverse('order-list')).json()['Data']['orders'], [])
+        response = self.client_for(other_delivery_man).patch(
+            reverse('order-update', args=[order.pk]), {'status': 'DELIVERED'}, format='json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_own_and_assigned_orders_are_found(self):
+        order, = self.create_orders(1)
+        for user in (self.customer, self.delivery_man, self.admin):
+            response = self.client_for(user).get(reverse('order-detail', args=[order.pk]))
+            self.assertEqual(response.status_code, 200)
+
+    def test_customer_cannot_update_status(self):
+        order, = self.create_orders(1)
+        response = self.client_for(self.customer).patch(
+            reverse('order-update', args=[order.pk]), {'status': 'DELIVERED'}, format='json',
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class OrderFilterTests(OrderTestCase):
+
+    def ids(self, **params):
+        response = self.client_for(self.admin).get(reverse('order-list'), params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return [order['id'] for order in response.json()['Data']['orders']]
+
+    def test_filters(self):
+        old, new = self.create_orders(2)
+        Order.objects.filter(pk=old.pk).update(
+            created_at=timezone.now() - timedelta(days=3), updated_at=timezone.now() - timedelta(days=2),
+        )
+        other = User.objects.create_user('dm2', 'dm2@example.com', 'password', role='delivery_man')
+        cheap, = self.create_orders(1, cost=Decimal('2.00'), status='DELIVERED', delivery_man=other)
+        Payment.objects.create(order=cheap, amount=cheap.cost, stripe_payment_intent_id='cs_1', status='SUCCEEDED')
+        yesterday = (timezone.now() - timedelta(days=1)).isoformat()
+
+        self.assertEqual(self.ids(status='DELIVERED'), [cheap.pk])
+        self.assertEqual(self.ids(created_before=yesterday), [old.pk])
+        self.assertEqual(self.ids(created_after=yesterday), [cheap.pk, new.pk])
+        self.assertEqual(self.ids(updated_before=yesterday), [old.pk])
+        self.assertEqual(self.ids(updated_after=yesterday, status='PENDING'), [new.pk])
+        self.assertEqual(self.ids(cost_max='5'), [cheap.pk])
+        self.assertEqual(self.ids(cost_min='5'), [new.pk, old.pk])
+        self.assertEqual(self.ids(delivery_man=other.pk), [cheap.pk])
+        self.assertEqual(self.ids(payment_status='SUCCEEDED'), [cheap.pk])
+        self.assertEqual(self.ids(payment_status='NONE', cost_min='5'), [new.pk, old.pk])
+
+    def test_orderings(self):
+        first, second, third = self.create_orders(3)
+        Order.objects.filter(pk=first.pk).update(updated_at=timezone.now() + timedelta(minutes=1))
+
+        self.assertEqual(self.ids(), [third.pk, second.pk, first.pk])
+        self.assertEqual(self.ids(ordering='created_at'), [first.pk, second.pk, third.pk])
+        self.assertEqual(self.ids(ordering='-updated_at'), [first.pk, third.pk, second.pk])
+        self.assertEqual(self.ids(ordering='updated_at'), [second.pk, third.pk, first.pk])
+
+    def test_invalid_parameters_are_rejected(self):
+        client = self.client_for(self.admin)
+        for params, field in (({'ordering': 'cost'}, 'ordering'), ({'status': 'LOST'}, 'status')):
+            response = client.get(reverse('order-list'), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(response.json()['errorDetails']['field'], field)
+
+
+class SparseFieldsTests(OrderTestCase):
+
+    def get(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client_for(self.customer).get(url, params)
+        self.assertEqual(response.status_code, 200)
+        order_query, = [query['sql'] for query in queries if 'FROM "orders_order"' in query['sql']]
+        return response.json()['Data'], order_query
+
+    def test_list_fields(self):
+        self.create_orders(2)
+        data, sql = self.get(reverse('order-list'), fields='id,status,cost')
+
+        self.assertEqual([list(order) for order in data['orders']], [['id', 'cost', 'status']] * 2)
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('users_user', sql)
+
+    def test_list_exclude(self):
+        self.create_orders(1)
+        data, sql = self.get(reverse('order-list'), exclude='description,customer')
+
+        self.assertEqual(set(data['orders'][0]), set(OrderSerializer.field_names()) - {'description', 'customer'})
+        self.assertNotIn('"description"', sql)
+        self.assertIn('"delivery_man_id"', sql)
+
+    def test_detail_fields(self):
+        order, = self.create_orders(1)
+        data, sql = self.get(reverse('order-detail', args=[order.pk]), fields='customer,payment_status')
+
+        self.assertEqual(data, {'customer': 'customer', 'payment_status': None})
+        self.assertIn('users_user', sql)
+        self.assertNotIn('"address"', sql)
+
+    def test_unknown_or_empty_selection_is_rejected(self):
+        client = self.client_for(self.customer)
+        for params in ({'fields': 'id,password'}, {'exclude': 'nope'}, {'fields': 'id', 'exclude': 'id'}):
+            response = client.get(reverse('order-list'), params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class OrderListIndexTests(APITestCase):
+
+    def assert_indexed(self, field, names):
+        indexes = {index.name: index for index in Order._meta.indexes}
+        self.assertTrue(names, f"{field} has no index")
+        for name in names:
+            self.assertIn(name, indexes)
+            index = indexes[name]
+            columns = [column.lstrip('-') for column in index.fields]
+            # A partial index serves the field through its condition.
+            self.assertTrue(field in columns or field in str(index.condition), f"{name} doesn't cover {field}")
+
+    def test_every_filter_is_indexed(self):
+        self.assertEqual(set(FILTER_INDEXES), set(OrderFilter.base_filters))
+        for name, order_filter in OrderFilter.base_filters.items():
+            self.assert_indexed(order_filter.field_name, FILTER_INDEXES[name])
+
+    def test_every_ordering_is_indexed(self):
+        fields = {ordering[0].lstrip('-') for ordering in ORDERINGS.values()}
+        self.assertEqual(set(ORDERING_INDEXES), fields)
+        for field in fields:
+            self.assert_indexed(field, ORDERING_INDEXES[field])
+
+
+class ProfilingTests(OrderTestCase):
+
+    def timings(self, response):
+        entries = [entry.split(';') for entry in response['Server-Timing'].split(', ')]
+        return {name: float(duration.removeprefix('dur=')) for name, duration, *_ in entries}
+
+    def test_admin_gets_server_timing(self):
+        self.create_orders(3)
+        with self.assertLogs('respond.middleware', 'INFO'):
+            response = self.client_for(self.admin).get(reverse('order-list'), HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+
+        timings = self.timings(response)
+        self.assertEqual(list(timings), ['total', 'auth', 'permissions', 'db', 'serializer', 'renderer', 'stripe'])
+        for name in ('total', 'auth', 'db', 'serializer', 'renderer'):
+            self.assertGreater(timings[name], 0, name)
+        self.assertIn('desc="', response['Server-Timing'])
+
+    def test_customer_gets_no_server_timing(self):
+        client = self.client_for(self.customer)
+        self.assertNotIn('Server-Timing', client.get(reverse('order-list'), HTTP_X_PROFILE='1'))
+        self.assertNotIn('Server-Timing', self.client_for(self.admin).get(reverse('order-list')))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_request_is_logged_only(self):
+        with self.assertLogs('respond.middleware', 'INFO') as logs:
+            response = self.client_for(self.customer).get(reverse('order-list'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertIn('(order-list, sample)', logs.output[0])
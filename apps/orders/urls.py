@@ -1,15 +1,23 @@
 from django.urls import path
 from .views import (
     OrderCreateView,
+    OrderBatchCreateView,
     OrderListView,
     OrderDetailView,
     OrderUpdateView,
-    OrderDeleteView
+    OrderBulkStatusView,
+    OrderDeleteView,
+    OrderStatsView,
+    OrderExportView,
 )
 
 urlpatterns = [
     path('', OrderListView.as_view(), name='order-list'),
     path('create/', OrderCreateView.as_view(), name='order-create'),
+    path('batch/', OrderBatchCreateView.as_view(), name='order-batch-create'),
+    path('stats/', OrderStatsView.as_view(), name='order-stats'),
+    path('export/', OrderExportView.as_view(), name='order-export'),
+    path('bulk-status/', OrderBulkStatusView.as_view(), name='order-bulk-status'),
     path('<int:pk>/', OrderDetailView.as_view(), name='order-detail'),
     path('<int:pk>/update/', OrderUpdateView.as_view(), name='order-update'),
     path('<int:pk>/delete/', OrderDeleteView.as_view(), name='order-delete'),
@@ -1,20 +1,39 @@
 from rest_framework import permissions, status
-from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.db.models import Value
+from django.db.models.functions import NullIf
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django_filters.rest_framework import DjangoFilterBackend
 
+from apps.payments import checkout
+
+from respond.conditional import make_etag, not_modified_response, set_etag
+from respond.pagination import KeysetPagination
+from respond.sparse import requested_columns, requested_fields
+from respond.streaming import export_response
+from respond.views import ProfiledAPIView
+
+from . import cache as order_cache, policies, rollups, search
+from .filters import ORDERINGS, OrderFilter
 from .models import Order
-from .serializers import OrderSerializer, OrderCreateSerializer
+from .serializers import (
+    OrderSerializer,
+    OrderCreateSerializer,
+    OrderBatchCreateSerializer,
+    OrderBulkStatusSerializer,
+    OrderStatsQuerySerializer,
+    OrderExportQuerySerializer,
+)
 from .permissions import (
     IsUserRole, 
     IsAdminRole, 
-    IsOwnerOrAdmin, 
-    IsAssignedDeliveryManOrAdmin
+    IsDeliveryManRole,
 )
 
 
-class OrderCreateView(APIView):
+class OrderCreateView(ProfiledAPIView):
     permission_classes = [IsUserRole]
     
     def post(self, request):
@@ -31,6 +50,13 @@ class OrderCreateView(APIView):
                 "session_id": order.session_id,
             })
             message = "Order created successfully. Redirect user to checkout_url to complete payment."
+        elif hasattr(order, 'pending_payment'):
+            response_data.update({
+                "payment_id": order.pending_payment.id,
+                "checkout_status": checkout.CHECKOUT_PENDING,
+                "checkout_poll_url": reverse('checkout-status', args=[order.pending_payment.id]),
+            })
+            message = "Order created successfully. Poll checkout_poll_url for the checkout_url to complete payment."
         else:
             message = "Order created successfully"
             
@@ -42,72 +68,155 @@ class OrderCreateView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class OrderListView(APIView):
+class OrderBatchCreateView(ProfiledAPIView):
+    permission_classes = [IsUserRole]
+    
+    def post(self, request):
+        serializer = OrderBatchCreateSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        orders, session = result['orders'], result['session']
+        
+        items = OrderSerializer(orders, many=True).data
+        response_data = {"orders": items}
+        if session is not None:
+            response_data.update({
+                "checkout_url": session.url,
+                "session_id": session.id,
+            })
+            message = f"{len(orders)} orders created. Redirect user to checkout_url to pay for all of them."
+        elif serializer.validated_data['create_payment']:
+            for item, order in zip(items, orders):
+                item["payment_id"] = order.payment.id
+                item["checkout_poll_url"] = reverse('checkout-status', args=[order.payment.id])
+            message = f"{len(orders)} orders created. Poll each checkout_poll_url for its checkout_url."
+        else:
+            message = f"{len(orders)} orders created successfully"
+        
+        response_data["message"] = message
+        return Response(response_data, status=status.HTTP_201_CREATED)
+
+
+class OrderListView(ProfiledAPIView):
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    filterset_class = OrderFilter
     
     def get(self, request):
         user = request.user
         
-        if user.role == 'admin':
-            queryset = Order.objects.all()
-        elif user.role == 'delivery_man':
-            queryset = Order.objects.filter(delivery_man=user)
-        elif user.role == 'user':
-            queryset = Order.objects.filter(customer=user)
-        else:
-            queryset = Order.objects.none()
-        
-        serializer = OrderSerializer(queryset, many=True)
-        return Response({
+        # Filters only narrow the caller's own scope.
+        queryset = policies.visible_orders(user)
+        queryset = DjangoFilterBackend().filter_queryset(request, queryset, self)
+        self.keyset_ordering = self.get_keyset_ordering(request)
+        self.sparse_fields = requested_fields(request, OrderSerializer.field_names())
+
+        q = request.query_params.get('q', '').strip()
+        if q:
+            queryset = search.search(queryset, q)
+
+        # Cached lists carry their ETag, so a hit answers 200 or 304 with
+        # no query beyond authentication.
+        cache_key = order_cache.list_key(user, request.get_full_path())
+        entry = order_cache.get_list(cache_key)
+        if entry is not None:
+            response = not_modified_response(request, entry['etag'])
+            if response is None:
+                response = set_etag(Response(entry['payload']), entry['etag'])
+            response['X-Cache'] = 'HIT'
+            return response
+
+        # On a miss the ETag comes from the page itself, so it costs no
+        # query beyond fetching the page, however many orders are in scope.
+        paginator = self.pagination_class()
+        page = self.get_page(request, queryset, paginator)
+        etag = self.get_etag(request, page, paginator)
+        response = not_modified_response(request, etag)
+        if response is None:
+            entry = {'etag': etag, 'payload': self.get_payload(page, paginator)}
+            order_cache.set_list(cache_key, entry)
+            response = set_etag(Response(entry['payload']), etag)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_keyset_ordering(self, request):
+        ordering = request.query_params.get('ordering', '-created_at')
+        if ordering not in ORDERINGS:
+            raise ValidationError({'ordering': [f"Must be one of: {', '.join(ORDERINGS)}."]})
+        return ORDERINGS[ordering]
+
+    def get_page(self, request, queryset, paginator):
+        # Columns no requested field needs (e.g. description) are never read;
+        # `updated_at` always is, for the ETag.
+        queryset = OrderSerializer.restrict_queryset(
+            queryset, self.sparse_fields,
+            always=[*(name.lstrip('-') for name in self.keyset_ordering), 'updated_at'],
+        )
+        return paginator.paginate_queryset(queryset, request, view=self)
+
+    def get_etag(self, request, page, paginator):
+        # Payment changes bump Order.updated_at, so the page's ids and
+        # updated_at cover edits, additions and deletions that change this
+        # page; whether there is a page before or after covers the links.
+        user = request.user
+        rows = [(order.pk, order.updated_at) for order in page]
+        return make_etag(
+            'orders', user.pk, user.role, request.get_full_path(), rows,
+            paginator.has_next, paginator.has_previous,
+        )
+
+    def get_payload(self, page, paginator):
+        serializer = OrderSerializer(page, many=True, fields=self.sparse_fields)
+        return {
             "message": "Orders retrieved successfully",
-            "orders": serializer.data
-        })
+            "orders": serializer.data,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+        }
 
 
-class OrderDetailView(APIView):
+class OrderDetailView(ProfiledAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
-    def get_object(self, pk):
-        return get_object_or_404(Order, pk=pk)
+    def get_object(self, request, pk, fields=None):
+        # Scoped by role, so orders the caller can't see are never loaded.
+        queryset = OrderSerializer.restrict_queryset(policies.visible_orders(request.user), fields, always=['updated_at'])
+        return get_object_or_404(queryset, pk=pk)
     
     def get(self, request, pk):
-        order = self.get_object(pk)
-        user = request.user
-        
-        if user.role == 'admin':
-            pass
-        elif user.role == 'user' and order.customer_id == user.id:
-            pass
-        elif user.role == 'delivery_man' and order.delivery_man_id == user.id:
-            pass
-        else:
-            raise PermissionDenied("You don't have permission to view this order.")
+        fields = requested_fields(request, OrderSerializer.field_names())
+        order = self.get_object(request, pk, fields)
+        # Payment changes bump Order.updated_at along with payment_status.
+        etag = make_etag('order', pk, order.updated_at, fields)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
         
-        serializer = OrderSerializer(order)
+        serializer = OrderSerializer(order, fields=fields)
         response_data = serializer.data.copy()
         response_data["message"] = "Order retrieved successfully"
-        return Response(response_data)
+        return set_etag(Response(response_data), etag)
 
 
-class OrderUpdateView(APIView):
+class OrderUpdateView(ProfiledAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
-    def get_object(self, pk):
-        return get_object_or_404(Order, pk=pk)
+    def get_object(self, request, pk):
+        queryset = policies.editable_orders(request.user).select_related('customer', 'delivery_man')
+        return get_object_or_404(queryset, pk=pk)
     
     def put(self, request, pk):
-        order = self.get_object(pk)
         user = request.user
         
         if user.role == 'user':
             raise PermissionDenied("Users cannot modify orders once created.")
         
         if user.role == 'delivery_man':
-            if order.delivery_man_id != user.id:
-                raise PermissionDenied("You can only update orders assigned to you.")
             if 'status' not in request.data:
                 raise PermissionDenied("Delivery man can only update status.")
             
+            order = self.get_object(request, pk)
             serializer = OrderSerializer(order, data={'status': request.data['status']}, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -116,6 +225,7 @@ class OrderUpdateView(APIView):
             return Response(response_data)
         
         if user.role == 'admin':
+            order = self.get_object(request, pk)
             serializer = OrderSerializer(order, data=request.data, partial=True)
             serializer.is_valid(raise_exception=True)
             serializer.save()
@@ -129,15 +239,84 @@ class OrderUpdateView(APIView):
         return self.put(request, pk)
 
 
-class OrderDeleteView(APIView):
+class OrderBulkStatusView(ProfiledAPIView):
+    permission_classes = [IsDeliveryManRole]
+    
+    def post(self, request):
+        serializer = OrderBulkStatusSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        
+        response_data = result.copy()
+        response_data["status"] = serializer.validated_data['status']
+        response_data["message"] = (
+            f"{len(result['updated'])} orders updated, {len(result['unchanged'])} already in that status, "
+            f"{len(result['rejected'])} rejected"
+        )
+        return Response(response_data)
+
+
+class OrderDeleteView(ProfiledAPIView):
     permission_classes = [IsAdminRole]
     
-    def get_object(self, pk):
-        return get_object_or_404(Order, pk=pk)
+    def get_object(self, request, pk):
+        return get_object_or_404(policies.visible_orders(request.user), pk=pk)
     
     def delete(self, request, pk):
-        order = self.get_object(pk)
+        order = self.get_object(request, pk)
         order.delete()
         return Response({
             "message": "Order deleted successfully"
-        }, status=status.HTTP_204_NO_CONTENT) 
\ No newline at end of file
+        }, status=status.HTTP_204_NO_CONTENT)
+
+
+class OrderStatsView(ProfiledAPIView):
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        serializer = OrderStatsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        buckets, totals = rollups.summarize(params['granularity'], params['start'], params['end'])
+        return Response({
+            "message": "Order statistics retrieved successfully",
+            "granularity": params['granularity'],
+            "start": params['start'],
+            "end": params['end'],
+            "totals": totals,
+            "buckets": buckets,
+        })
+
+
+class OrderExportView(ProfiledAPIView):
+    permission_classes = [IsAdminRole]
+    columns = [
+        ('id', 'id'),
+        ('customer_id', 'customer_id'),
+        ('customer', 'customer__username'),
+        ('delivery_man_id', 'delivery_man_id'),
+        ('description', 'description'),
+        ('address', 'address'),
+        ('cost', 'cost'),
+        ('status', 'status'),
+        # Denormalized copy, so no join with payments; null without a payment.
+        ('payment_status', NullIf('payment_status', Value(''))),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+
+    def get(self, request):
+        serializer = OrderExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = Order.objects.order_by('id')
+        if 'status' in params:
+            queryset = queryset.filter(status=params['status'])
+        if 'created_from' in params:
+            queryset = queryset.filter(created_at__gte=params['created_from'])
+        if 'created_to' in params:
+            queryset = queryset.filter(created_at__lt=params['created_to'])
+
+        return export_response(queryset, requested_columns(request, self.columns), params['export_format'], 'orders')
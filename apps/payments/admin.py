@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Payment
+from .models import CheckoutJob, Payment, StripeEvent
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
     list_display = ('id', 'order', 'amount', 'status', 'created_at', 'updated_at')
@@ -9,4 +9,19 @@ class PaymentAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         queryset = super().get_queryset(request)
-        return queryset.select_related('order')
\ No newline at end of file
+        return queryset.select_related('order')
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_id', 'type', 'status', 'received_at', 'processed_at')
+    search_fields = ('=event_id',)
+    list_filter = ('status', 'type')
+    ordering = ('-received_at',)
+
+
+@admin.register(CheckoutJob)
+class CheckoutJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'payment', 'status', 'attempts', 'available_at', 'updated_at')
+    list_filter = ('status',)
+    ordering = ('-created_at',)
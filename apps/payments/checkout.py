@@ -0,0 +1,200 @@
+import logging
+import time
+from collections import namedtuple
+from datetime import timedelta
+from functools import partial
+
+import stripe
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from . import gateway
+from .models import CheckoutJob, Payment
+
+logger = logging.getLogger(__name__)
+
+CHECKOUT_PENDING = 'PENDING'
+CHECKOUT_READY = 'READY'
+CHECKOUT_FAILED = 'FAILED'
+
+RunResult = namedtuple('RunResult', ['done', 'retried', 'failed'])
+
+
+def is_async():
+    return getattr(settings, 'STRIPE_CHECKOUT_ASYNC', False)
+
+
+def enqueue(order, success_url=None, cancel_url=None):
+    """
+    Create `order`'s PENDING payment and the outbox job that will open its
+    checkout session. Call it in the transaction that creates the order,
+    so all three rows are committed together or not at all.
+    """
+    payment = Payment.objects.create(order=order, amount=order.cost, status=Payment.STATUS_PENDING)
+    CheckoutJob.objects.create(
+        payment=payment,
+        success_url=success_url or gateway.default_success_url(),
+        cancel_url=cancel_url or gateway.default_cancel_url(),
+        available_at=timezone.now(),
+    )
+    return payment
+
+
+def enqueue_many(orders, success_url=None, cancel_url=None):
+    """
+    Bulk version of `enqueue`: one PENDING payment and one checkout job
+    per order, written with two INSERTs.
+    """
+    payments = Payment.objects.bulk_create([
+        Payment(order=order, amount=order.cost, status=Payment.STATUS_PENDING) for order in orders
+    ])
+    now = timezone.now()
+    CheckoutJob.objects.bulk_create([
+        CheckoutJob(
+            payment=payment,
+            success_url=success_url or gateway.default_success_url(),
+            cancel_url=cancel_url or gateway.default_cancel_url(),
+            available_at=now,
+        )
+        for payment in payments
+    ])
+    return payments
+
+
+def _ready_key(payment_id):
+    return f'payments:checkout:{payment_id}'
+
+
+# How long a finished job's "ready" flag stays in the cache for pollers.
+READY_FLAG_TIMEOUT = 60
+
+
+def _notify(payment_id):
+    cache.set(_ready_key(payment_id), True, timeout=READY_FLAG_TIMEOUT)
+
+
+def claim_job():
+    """
+    Take the oldest due job and lease it for `CHECKOUT_JOB_LEASE` seconds
+    by moving its `available_at` forward, then commit, so no lock is held
+    while Stripe is called. Other workers skip the job until the lease
+    runs out; a worker that dies mid-call leaves it to be picked up again.
+    """
+    with transaction.atomic():
+        job = (
+            CheckoutJob.objects
+            .select_for_update(skip_locked=True, of=('self',))
+            .select_related('payment__order')
+            .filter(status=CheckoutJob.STATUS_PENDING, available_at__lte=timezone.now())
+            .order_by('available_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.available_at = timezone.now() + timedelta(seconds=getattr(settings, 'CHECKOUT_JOB_LEASE', 60))
+        job.save(update_fields=['available_at', 'updated_at'])
+    return job
+
+
+def run_job(job):
+    """
+    Open the checkout session for a job claimed by `claim_job`, outside any
+    transaction, then record the outcome in a short one. Failed attempts
+    are retried with exponential backoff. After `CHECKOUT_JOB_MAX_ATTEMPTS`,
+    the job and its payment are marked FAILED, and the customer can use the
+    retry endpoint. Returns the job's new status, or None when the lease ran
+    out and another worker took the job over.
+    """
+    payment = job.payment
+    # The key changes only after a recorded failure, so a worker that dies
+    # between Stripe's answer and the commit gets the same session back.
+    idempotency_key = f'checkout-job-{job.pk}-{job.attempts}'
+    session = error = None
+    try:
+        session = gateway.create_checkout_session(
+            gateway.checkout_session_params(payment.order, job.success_url, job.cancel_url),
+            idempotency_key=idempotency_key,
+        )
+    except stripe.error.StripeError as exc:
+        error = exc
+
+    with transaction.atomic():
+        still_ours = (
+            CheckoutJob.objects
+            .select_for_update()
+            .filter(pk=job.pk, status=CheckoutJob.STATUS_PENDING, available_at=job.available_at)
+            .exists()
+        )
+        if not still_ours:
+            logger.warning("Checkout job %s lease expired before Stripe answered", job.pk)
+            return None
+
+        if error is not None:
+            job.attempts += 1
+            job.error = str(error)
+            if job.attempts >= getattr(settings, 'CHECKOUT_JOB_MAX_ATTEMPTS', 5):
+                logger.warning("Checkout job %s failed for payment %s: %s", job.pk, payment.pk, error)
+                job.status = CheckoutJob.STATUS_FAILED
+                payment.status = Payment.STATUS_FAILED
+                payment.save(update_fields=['status', 'updated_at'])
+                transaction.on_commit(partial(_notify, payment.pk))
+            else:
+                job.available_at = timezone.now() + timedelta(seconds=2 ** job.attempts)
+            job.save(update_fields=['attempts', 'error', 'status', 'available_at', 'updated_at'])
+            return job.status
+
+        payment.stripe_payment_intent_id = session.id
+        payment.checkout_url = session.url
+        payment.save(update_fields=['stripe_payment_intent_id', 'checkout_url', 'updated_at'])
+        job.status = CheckoutJob.STATUS_DONE
+        job.attempts += 1
+        job.error = ''
+        job.save(update_fields=['status', 'attempts', 'error', 'updated_at'])
+        transaction.on_commit(partial(_notify, payment.pk))
+        return job.status
+
+
+def run_jobs(limit=100):
+    """
+    Claim and run up to `limit` due jobs, oldest first.
+    """
+    done = retried = failed = 0
+    for _ in range(limit):
+        job = claim_job()
+        if job is None:
+            break
+        outcome = run_job(job)
+        if outcome == CheckoutJob.STATUS_DONE:
+            done += 1
+        elif outcome == CheckoutJob.STATUS_FAILED:
+            failed += 1
+        elif outcome is not None:
+            retried += 1
+    return RunResult(done, retried, failed)
+
+
+def checkout_status(payment):
+    if payment.checkout_url:
+        return CHECKOUT_READY
+    if payment.status == Payment.STATUS_FAILED:
+        return CHECKOUT_FAILED
+    return CHECKOUT_PENDING
+
+
+def wait_for_checkout(payment_id, timeout, interval=0.25):
+    """
+    Short long-poll: block for up to `timeout` seconds (a request worker is
+    held meanwhile, hence the low `CHECKOUT_POLL_MAX_WAIT`) until the
+    worker reports that `payment_id`'s job finished. Only the cache is
+    polled, so waiting costs no database queries. Returns True once it has
+    finished.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        if cache.get(_ready_key(payment_id)):
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from types import SimpleNamespace
+
+import requests
+import stripe
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from respond import profiling
+
+logger = logging.getLogger(__name__)
+
+
+def _frontend_url():
+    return getattr(settings, 'FRONTEND_URL', 'http://localhost:8000')
+
+
+def default_success_url():
+    return f'{_frontend_url()}/payment/success'
+
+
+def default_cancel_url():
+    return f'{_frontend_url()}/payment/cancel'
+
+
+# Stripe's limits on line items per session and on one metadata value.
+MAX_LINE_ITEMS = 100
+MAX_METADATA_VALUE = 500
+
+
+def _line_item(name, description, amount):
+    return {
+        'price_data': {
+            'currency': 'usd',
+            'product_data': {
+                'name': name,
+                'description': description,
+            },
+            'unit_amount': int(amount * 100),  # Convert to cents
+        },
+        'quantity': 1,
+    }
+
+
+def _session_params(line_items, metadata, order_id, success_url=None, cancel_url=None):
+    success_url = success_url or default_success_url()
+    cancel_url = cancel_url or default_cancel_url()
+
+    #  order_id to cancel URL for better tracking
+    if '?' not in cancel_url:
+        cancel_url += f'?order_id={order_id}'
+    else:
+        cancel_url += f'&order_id={order_id}'
+
+    return {
+        'payment_method_types': ['card'],
+        'line_items': line_items,
+        'mode': 'payment',
+        'success_url': success_url + '?session_id={CHECKOUT_SESSION_ID}',
+        'cancel_url': cancel_url,
+        'metadata': metadata,
+    }
+
+
+def checkout_session_params(order, success_url=None, cancel_url=None, retry_payment=None):
+    """
+    Arguments for a checkout session paying for `order`. Pass the payment
+    being retried as `retry_payment` for a retry session.
+    """
+    name = f'Courier Order #{order.id}'
+    amount = order.cost
+    metadata = {
+        'order_id': order.id,
+        'customer_id': order.customer_id,
+    }
+    if retry_payment is not None:
+        name += ' (Retry)'
+        amount = retry_payment.amount
+        metadata['retry_payment_id'] = retry_payment.id
+
+    return _session_params([_line_item(name, order.description, amount)], metadata, order.id, success_url, cancel_url)
+
+
+def batch_checkout_session_params(orders, success_url=None, cancel_url=None):
+    """
+    Arguments for one checkout session paying for every order in `orders`.
+    Each order gets its own line item, up to Stripe's limit; larger
+    batches are charged as a single summary line.
+    """
+    first, last = orders[0], orders[-1]
+    if len(orders) <= MAX_LINE_ITEMS:
+        line_items = [_line_item(f'Courier Order #{order.id}', order.description, order.cost) for order in orders]
+    else:
+        line_items = [_line_item(
+            f'Courier Orders #{first.id}-#{last.id}',
+            f'{len(orders)} parcels',
+            sum(order.cost for order in orders),
+        )]
+
+    metadata = {'customer_id': first.customer_id, 'order_count': len(orders)}
+    order_ids = ','.join(str(order.id) for order in orders)
+    if len(order_ids) <= MAX_METADATA_VALUE:
+        metadata['order_ids'] = order_ids
+    else:
+        metadata.update(first_order_id=first.id, last_order_id=last.id)
+
+    return _session_params(line_items, metadata, first.id, success_url, cancel_url)
+
+
+class StripeBackend:
+    """
+    Default `STRIPE_GATEWAY_BACKEND`: calls the Stripe API. The HTTP
+    client is built once per process and installed as
+    `stripe.default_http_client`, so connections stay open between requests
+    instead of being set up for every checkout.
+    """
+
+    def __init__(self):
+        self.api_key = getattr(settings, 'STRIPE_SECRET_KEY', '')
+        stripe.max_network_retries = getattr(settings, 'STRIPE_MAX_NETWORK_RETRIES', 2)
+        stripe.default_http_client = self.build_http_client()
+
+    def build_http_client(self):
+        pool_size = getattr(settings, 'STRIPE_HTTP_POOL_SIZE', 10)
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        timeout = (
+            getattr(settings, 'STRIPE_CONNECT_TIMEOUT', 3.0),
+            getattr(settings, 'STRIPE_READ_TIMEOUT', 20.0),
+        )
+        return stripe.http_client.RequestsClient(timeout=timeout, session=session)
+
+    def create_checkout_session(self, params, idempotency_key=None):
+        if idempotency_key:
+            params = {**params, 'idempotency_key': idempotency_key}
+        return stripe.checkout.Session.create(api_key=self.api_key, **params)
+
+
+class FakeBackend:
+    """
+    Local stand-in for Stripe. The "checkout page" is the success URL
+    itself. As on Stripe, an idempotency key always returns the same
+    session. `STRIPE_FAKE_LATENCY_MS` simulates network latency.
+    """
+
+    def __init__(self):
+        self.latency = getattr(settings, 'STRIPE_FAKE_LATENCY_MS', 0) / 1000
+
+    def create_checkout_session(self, params, idempotency_key=None):
+        if self.latency:
+            time.sleep(self.latency)
+        seed = idempotency_key or uuid.uuid4().hex
+        session_id = 'cs_fake_' + hashlib.sha1(seed.encode()).hexdigest()[:24]
+        return SimpleNamespace(id=session_id, url=params['success_url'].replace('{CHECKOUT_SESSION_ID}', session_id))
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                path = getattr(settings, 'STRIPE_GATEWAY_BACKEND', 'apps.payments.gateway.StripeBackend')
+                _backend = import_string(path)()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_backend(setting=None, **kwargs):
+    """
+    Forget the backend so the next call rebuilds it, e.g. after
+    `override_settings(STRIPE_GATEWAY_BACKEND=...)` in tests.
+    """
+    global _backend
+    if setting is None or setting.startswith('STRIPE_'):
+        _backend = None
+
+
+class CallStats:
+    """
+    Per-process latency of gateway calls, by operation.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = defaultdict(lambda: {'count': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+
+    def record(self, operation, elapsed_ms, failed):
+        with self._lock:
+            stats = self.calls[operation]
+            stats['count'] += 1
+            stats['errors'] += failed
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                operation: {**stats, 'mean_ms': stats['total_ms'] / stats['count']}
+                for operation, stats in self.calls.items()
+            }
+
+
+call_stats = CallStats()
+
+
+def _instrumented(operation, call, *args, **kwargs):
+    start = time.perf_counter()
+    failed = True
+    try:
+        result = call(*args, **kwargs)
+        failed = False
+        return result
+    finally:
+        elapsed = time.perf_counter() - start
+        elapsed_ms = elapsed * 1000
+        profiling.record('stripe', elapsed)
+        call_stats.record(operation, elapsed_ms, failed)
+        logger.info("stripe %s %s in %.1fms", operation, 'failed' if failed else 'ok', elapsed_ms)
+
+
+def create_checkout_session(params, idempotency_key=None):
+    """
+    Create a Stripe checkout session from `checkout_session_params()`.
+    Every checkout path goes through here.
+    """
+    return _instrumented(
+        'checkout.session.create',
+        get_backend().create_checkout_session, params, idempotency_key=idempotency_key,
+    )
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments import checkout
+
+
+class Command(BaseCommand):
+    help = "Create Stripe checkout sessions for queued async checkouts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100, help="Jobs to run per pass.")
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new jobs instead of exiting once drained.")
+        parser.add_argument('--sleep', type=float, default=0.5, help="Seconds to wait between polls with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            result = checkout.run_jobs(limit=options['limit'])
+            if any(result):
+                self.stdout.write(f"Sessions created: {result.done}, retrying: {result.retried}, failed: {result.failed}")
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS("No checkout jobs due."))
@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.payments import webhooks
+
+
+class Command(BaseCommand):
+    help = "Apply pending Stripe webhook events from the inbox in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--loop', action='store_true', help="Keep polling for new events instead of exiting once drained.")
+        parser.add_argument('--sleep', type=float, default=1.0, help="Seconds to wait between polls with --loop.")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            result = webhooks.process_batch(batch_size=options['batch_size'])
+            if result.processed or result.deferred:
+                total += result.processed
+                backlog = webhooks.backlog()
+                lag = f"lag max {result.max_lag:.2f}s, mean {result.mean_lag:.2f}s; " if result.processed else ""
+                self.stdout.write(
+                    f"Processed {result.processed} events ({result.failed} failed, {result.deferred} deferred); "
+                    f"{lag}backlog {backlog.pending} (oldest {backlog.oldest_lag:.2f}s)"
+                )
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(f"Inbox drained, {total} events processed."))
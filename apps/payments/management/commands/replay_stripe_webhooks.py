@@ -0,0 +1,93 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from apps.payments import replay
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed payments, then deliver signed Stripe webhook events for them to the webhook "
+        "endpoint at a given rate and concurrency, with duplicate and out-of-order bursts. "
+        "Reports throughput, latency percentiles and whether every payment ended in the "
+        "right state. Run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--payments', type=int, default=1000)
+        parser.add_argument('--rate', type=float, default=0, help="Events per second to offer (0: as fast as possible).")
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--duplicates', type=float, default=0.1, help="Share of events delivered twice.")
+        parser.add_argument('--shuffle-window', type=int, default=0, help="Deliver events shuffled in bursts of this size.")
+        parser.add_argument('--url', help="Webhook URL of a running server. Default: in-process test client.")
+        parser.add_argument('--secret', help="Webhook signing secret. Default: STRIPE_WEBHOOK_SECRET.")
+        parser.add_argument(
+            '--no-process', action='store_true',
+            help="Leave the inbox to a running process_stripe_events instead of draining it here.",
+        )
+        parser.add_argument('--drain-timeout', type=float, default=60.0)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded rows and events afterwards.')
+
+    def handle(self, *args, **options):
+        secret = options['secret'] or getattr(settings, 'STRIPE_WEBHOOK_SECRET', '')
+        if not secret:
+            raise CommandError("Set STRIPE_WEBHOOK_SECRET or pass --secret to sign the events.")
+
+        payments = replay.seed_payments(options['payments'], seed=options['seed'])
+        try:
+            events = replay.build_events(
+                payments,
+                duplicates=options['duplicates'],
+                shuffle_window=options['shuffle_window'],
+                seed=options['seed'],
+            )
+            if not options['json']:
+                self.stdout.write(f"Delivering {len(events)} events for {len(payments)} payments...")
+
+            if options['url']:
+                sender = replay.HttpSender(options['url'])
+                result = replay.replay(events, sender, secret, options['rate'], options['concurrency'])
+            else:
+                # The test client sends Host: testserver, as under the test runner.
+                hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+                with override_settings(STRIPE_WEBHOOK_SECRET=secret, ALLOWED_HOSTS=hosts):
+                    result = replay.replay(events, replay.ClientSender(), secret, options['rate'], options['concurrency'])
+
+            drained = replay.drain(process=not options['no_process'], timeout=options['drain_timeout'])
+            wrong = replay.mismatches(payments)
+            unapplied = replay.unapplied_events()
+            report = replay.summarize(result, payments, events, drained, wrong, unapplied)
+        finally:
+            if not options['keep']:
+                replay.cleanup()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+        else:
+            self._print(report, wrong, unapplied)
+        if wrong or unapplied:
+            raise CommandError(
+                f"{len(wrong)} payments did not end in the expected state, "
+                f"{len(unapplied)} events were not applied."
+            )
+
+    def _print(self, report, wrong, unapplied):
+        latency = report['latency_ms']
+        self.stdout.write(
+            f"{report['events']} events ({report['unique_events']} unique) in {report['elapsed_s']}s: "
+            f"{report['throughput_rps']} req/s, statuses {report['statuses']}"
+        )
+        self.stdout.write(
+            f"Latency ms: p50 {latency['p50']}, p95 {latency['p95']}, p99 {latency['p99']}, max {latency['max']}"
+        )
+        self.stdout.write(f"Inbox drained in {report['drain_s']}s")
+        for payment_id, expected, actual in wrong[:20]:
+            self.stdout.write(self.style.ERROR(f"Payment {payment_id}: expected {expected}, got {actual}"))
+        for event_id, event_type, status, error in unapplied[:20]:
+            self.stdout.write(self.style.ERROR(f"Event {event_id} ({event_type}) not applied: {status} {error}".rstrip()))
+        if not wrong:
+            self.stdout.write(self.style.SUCCESS(f"All {report['payments']} payments ended in the expected state."))
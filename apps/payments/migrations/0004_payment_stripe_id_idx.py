@@ -0,0 +1,21 @@
+# Generated by Django 5.0.8 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+from apps.orders.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('payments', '0003_checkout_job'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='payment',
+            index=models.Index(fields=['stripe_payment_intent_id'], name='payments_stripe_id_idx'),
+        ),
+    ]
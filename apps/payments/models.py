@@ -1,5 +1,6 @@
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class Payment(models.Model):
@@ -17,8 +18,112 @@ class Payment(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     stripe_payment_intent_id = models.CharField(max_length=255, blank=True, null=True)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    # Hosted checkout page; empty until the checkout session exists.
+    checkout_url = models.URLField(max_length=1000, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Webhook events find their payments by session / intent id.
+            models.Index(fields=['stripe_payment_intent_id'], name='payments_stripe_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Snapshot of the row as loaded, so signal handlers can tell what changed.
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The post_save handlers copy the status onto the order: same transaction.
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return f"Payment for Order {self.order_id}"
+
+
+class CheckoutJob(models.Model):
+    """
+    Outbox entry asking for a Stripe checkout session for `payment`.
+    Written in the same transaction as the order and payment, and run by
+    `apps.payments.checkout.run_jobs` outside the request.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_DONE = 'DONE'
+    STATUS_FAILED = 'FAILED'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    payment = models.ForeignKey(Payment, related_name='checkout_jobs', on_delete=models.CASCADE)
+    success_url = models.URLField(max_length=1000)
+    cancel_url = models.URLField(max_length=1000)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True)
+    available_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue: pending jobs that are due.
+            models.Index(
+                fields=['available_at', 'id'],
+                name='payments_checkout_due_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+        ]
+
+    def __str__(self):
+        return f"Checkout job {self.id} for payment {self.payment_id}"
+
+
+class StripeEvent(models.Model):
+    """
+    Inbox of verified Stripe webhook events. The webhook view only stores
+    them; `apps.payments.webhooks.process_batch` applies them later.
+    """
+    STATUS_PENDING = 'PENDING'
+    STATUS_PROCESSED = 'PROCESSED'
+    STATUS_FAILED = 'FAILED'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSED, 'Processed'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    error = models.TextField(blank=True)
+    # Events whose payment isn't known yet are tried again later.
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's queue: pending events that are due, oldest first.
+            models.Index(
+                fields=['available_at', 'id'],
+                name='payments_event_due_idx',
+                condition=models.Q(status='PENDING'),
+            ),
+        ]
+
     def __str__(self):
-        return f"Payment for Order {self.order_id}" 
\ No newline at end of file
+        return f"{self.type} {self.event_id}"
@@ -0,0 +1,291 @@
+import hashlib
+import hmac
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.db import close_old_connections
+from django.test import Client
+from django.urls import reverse
+
+from apps.orders import signals
+from apps.orders.benchmarks import delete_seeded, seed_users
+from apps.orders.models import Order
+
+from . import webhooks
+from .models import Payment, StripeEvent
+
+REPLAY_PREFIX = 'replay'
+
+# What Stripe sends for each checkout outcome, in the order it creates the
+# events, and the payment status it should end in. The intent events come
+# first, before the `checkout.session.completed` that tells us the intent
+# id, so the processor has to hold them until the session event is in.
+# A card declined on a session that then expires also sends
+# `payment_intent.payment_failed`, but nothing ties that intent to a
+# payment; it is left out so that every replayed event should be applied.
+OUTCOMES = {
+    'succeeded': (Payment.STATUS_SUCCEEDED, ['payment_intent.succeeded', 'checkout.session.completed']),
+    # Declined card, then a second one that goes through.
+    'declined_then_paid': (
+        Payment.STATUS_SUCCEEDED,
+        ['payment_intent.payment_failed', 'payment_intent.succeeded', 'checkout.session.completed'],
+    ),
+    'expired': (Payment.STATUS_FAILED, ['checkout.session.expired']),
+}
+OUTCOME_WEIGHTS = {'succeeded': 0.7, 'declined_then_paid': 0.1, 'expired': 0.2}
+
+ReplayPayment = namedtuple('ReplayPayment', ['id', 'session_id', 'intent_id', 'outcome'])
+Delivery = namedtuple('Delivery', ['status', 'latency'])
+ReplayResult = namedtuple('ReplayResult', ['deliveries', 'elapsed'])
+
+
+def sign(payload, secret, timestamp=None):
+    """
+    `Stripe-Signature` header for `payload` (bytes), as Stripe computes it:
+    an HMAC-SHA256 of "timestamp.payload" keyed with the endpoint secret.
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    signed = f'{timestamp}.'.encode() + payload
+    signature = hmac.new(secret.encode(), signed, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={signature}'
+
+
+def make_event(event_id, event_type, payment):
+    if event_type.startswith('checkout.session.'):
+        obj = {'id': payment.session_id, 'object': 'checkout.session'}
+        if event_type == 'checkout.session.completed':
+            obj['payment_intent'] = payment.intent_id
+    else:
+        obj = {'id': payment.intent_id, 'object': 'payment_intent'}
+    return {
+        'id': event_id,
+        'object': 'event',
+        'type': event_type,
+        'created': int(time.time()),
+        'livemode': False,
+        'data': {'object': obj},
+    }
+
+
+def seed_payments(count, prefix=REPLAY_PREFIX, seed=0, batch_size=5000):
+    """
+    Create `count` orders with a PENDING payment each, as checkout would
+    leave them, and pick the outcome Stripe will report for each.
+    """
+    rng = random.Random(seed)
+    customer_id = seed_users(1, 'user', prefix=prefix)[0]
+    orders = [
+        Order(customer_id=customer_id, description=f'Replay order {i}', address='Replay', cost=Decimal('10.00'))
+        for i in range(count)
+    ]
+    Order.objects.bulk_create(orders, batch_size=batch_size)
+    payments = Payment.objects.bulk_create([
+        Payment(
+            order=order,
+            amount=order.cost,
+            status=Payment.STATUS_PENDING,
+            stripe_payment_intent_id=f'cs_{prefix}_{i}',
+        )
+        for i, order in enumerate(orders)
+    ], batch_size=batch_size)
+    signals.orders_bulk_created(orders)
+
+    outcomes = rng.choices(list(OUTCOME_WEIGHTS), list(OUTCOME_WEIGHTS.values()), k=count)
+    return [
+        ReplayPayment(payment.pk, f'cs_{prefix}_{i}', f'pi_{prefix}_{i}', outcome)
+        for i, (payment, outcome) in enumerate(zip(payments, outcomes))
+    ]
+
+
+def build_events(payments, duplicates=0.0, shuffle_window=0, prefix=REPLAY_PREFIX, seed=0):
+    """
+    The events for `payments` in Stripe's order. A `duplicates` share of
+    them is delivered a second time, as Stripe retries do, and with
+    `shuffle_window` every run of that many deliveries is shuffled, so
+    events arrive out of order in bursts.
+    """
+    rng = random.Random(seed)
+    events = []
+    for payment in payments:
+        for event_type in OUTCOMES[payment.outcome][1]:
+            event = make_event(f'evt_{prefix}_{len(events)}', event_type, payment)
+            events.append(event)
+            if rng.random() < duplicates:
+                events.append(event)
+    if shuffle_window > 1:
+        for start in range(0, len(events), shuffle_window):
+            burst = events[start:start + shuffle_window]
+            rng.shuffle(burst)
+            events[start:start + shuffle_window] = burst
+    return events
+
+
+class ClientSender:
+    """
+    Deliver in-process through the Django test client, one per thread.
+    """
+
+    def __init__(self):
+        self.path = reverse('stripe-webhook')
+        self._local = threading.local()
+
+    def __call__(self, payload, signature):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(raise_request_exception=False)
+        response = client.post(self.path, data=payload, content_type='application/json', HTTP_STRIPE_SIGNATURE=signature)
+        # The test client keeps connections open across requests; end the
+        # request the way the server would (honours CONN_MAX_AGE).
+        close_old_connections()
+        return response.status_code
+
+
+class HttpSender:
+    """
+    Deliver over HTTP to a running server, e.g.
+    `http://localhost:8000/api/v1/payments/webhook/`.
+    """
+
+    def __init__(self, url, timeout=10):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, payload, signature):
+        request = urllib.request.Request(
+            self.url,
+            data=payload,
+            headers={'Content-Type': 'application/json', 'Stripe-Signature': signature},
+            method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status
+        except urllib.error.HTTPError as exc:
+            return exc.code
+        except (urllib.error.URLError, OSError):
+            return 0
+
+
+def replay(events, sender, secret, rate=None, concurrency=1):
+    """
+    Deliver `events` through `sender`, signing each as it is sent. With
+    `rate` (events per second) deliveries are paced from the start of the
+    run rather than one after the other, so slow responses don't lower
+    the offered load.
+    """
+    payloads = [json.dumps(event, separators=(',', ':')).encode() for event in events]
+    start = time.perf_counter()
+
+    def deliver(index):
+        if rate:
+            delay = start + index / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        sent = time.perf_counter()
+        status = sender(payloads[index], sign(payloads[index], secret))
+        return Delivery(status, time.perf_counter() - sent)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        deliveries = list(pool.map(deliver, range(len(payloads))))
+    return ReplayResult(deliveries, time.perf_counter() - start)
+
+
+def drain(prefix=REPLAY_PREFIX, process=True, timeout=60.0, batch_size=500):
+    """
+    Wait, up to `timeout` seconds, until every replayed event has left the
+    inbox, applying them here with `process`, or leaving that to a running
+    `process_stripe_events`. Returns the seconds it took.
+    """
+    start = time.perf_counter()
+    pending = StripeEvent.objects.filter(event_id__startswith=f'evt_{prefix}_', status=StripeEvent.STATUS_PENDING)
+    while pending.exists() and time.perf_counter() - start <= timeout:
+        if process and webhooks.process_batch(batch_size=batch_size).processed:
+            continue
+        # Nothing due: wait for new deliveries or deferred events' backoff.
+        time.sleep(0.2)
+    return time.perf_counter() - start
+
+
+def expected_state(payment):
+    """
+    `(status, stripe reference)` a replayed payment should end in: moved
+    onto its payment intent once the session completed.
+    """
+    status, event_types = OUTCOMES[payment.outcome]
+    reference = payment.intent_id if 'checkout.session.completed' in event_types else payment.session_id
+    return status, reference
+
+
+def mismatches(payments):
+    """
+    `(payment id, expected state, actual state)` for every replayed
+    payment not in the state its outcome should leave it in.
+    """
+    actual = {
+        pk: (status, reference)
+        for pk, status, reference in Payment.objects
+        .filter(pk__in=[payment.id for payment in payments])
+        .values_list('id', 'status', 'stripe_payment_intent_id')
+    }
+    return [
+        (payment.id, expected_state(payment), actual.get(payment.id))
+        for payment in payments
+        if actual.get(payment.id) != expected_state(payment)
+    ]
+
+
+def unapplied_events(prefix=REPLAY_PREFIX):
+    """
+    `(event id, type, status, error)` for every replayed event that was not
+    applied: still pending after the drain, or failed.
+    """
+    return list(
+        StripeEvent.objects
+        .filter(event_id__startswith=f'evt_{prefix}_')
+        .exclude(status=StripeEvent.STATUS_PROCESSED)
+        .order_by('id')
+        .values_list('event_id', 'type', 'status', 'error')
+    )
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def summarize(result, payments, events, drain_seconds, wrong, unapplied):
+    latencies = [delivery.latency * 1000 for delivery in result.deliveries]
+    return {
+        'payments': len(payments),
+        'events': len(events),
+        'unique_events': len({event['id'] for event in events}),
+        'statuses': dict(Counter(str(delivery.status) for delivery in result.deliveries)),
+        'elapsed_s': round(result.elapsed, 3),
+        'throughput_rps': round(len(events) / result.elapsed, 1) if result.elapsed else None,
+        'latency_ms': {
+            name: round(value, 2) if value is not None else None
+            for name, value in (
+                ('p50', percentile(latencies, 50)),
+                ('p95', percentile(latencies, 95)),
+                ('p99', percentile(latencies, 99)),
+                ('max', max(latencies, default=None)),
+            )
+        },
+        'drain_s': round(drain_seconds, 3),
+        'mismatched_payments': len(wrong),
+        'unapplied_events': dict(Counter(event_type for _, event_type, _, _ in unapplied)),
+    }
+
+
+def cleanup(prefix=REPLAY_PREFIX):
+    StripeEvent.objects.filter(event_id__startswith=f'evt_{prefix}_').delete()
+    delete_seeded(prefix)
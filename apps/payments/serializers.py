@@ -1,14 +1,17 @@
 import stripe
 from django.conf import settings
+from django.db import transaction
+from django.urls import reverse
 from rest_framework import serializers
 
 from apps.orders.models import Order
+from respond.profiling import ProfiledSerializerMixin
+from respond.streaming import ExportQuerySerializer
+from . import checkout, gateway
 from .models import Payment
 
-stripe.api_key = getattr(settings, 'STRIPE_SECRET_KEY', '')
 
-
-class CheckoutSessionSerializer(serializers.Serializer):
+class CheckoutSessionSerializer(ProfiledSerializerMixin, serializers.Serializer):
     order_id = serializers.IntegerField()
     success_url = serializers.URLField(
         required=False, 
@@ -21,7 +24,7 @@ class CheckoutSessionSerializer(serializers.Serializer):
 
     def validate_order_id(self, value):
         try:
-            order = Order.objects.get(id=value)
+            order = Order.objects.select_related('payment').get(id=value)
         except Order.DoesNotExist:
             raise serializers.ValidationError('Order not found')
         
@@ -32,44 +35,28 @@ class CheckoutSessionSerializer(serializers.Serializer):
         if hasattr(order, 'payment'):
             raise serializers.ValidationError('Payment already exists for this order')
         
+        self.order = order
         return value
 
     def create(self, validated_data):
-        order = Order.objects.get(id=validated_data['order_id'])
-        amount_cents = int(order.cost * 100)  # Convert to cents
-        
-        # Use FRONTEND_URL from settings
-        frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:8000')
-        success_url = validated_data.get('success_url', f'{frontend_url}/payment/success')
-        cancel_url = validated_data.get('cancel_url', f'{frontend_url}/payment/cancel')
-        
-        # Add order_id to cancel URL for better tracking
-        if '?' not in cancel_url:
-            cancel_url += f'?order_id={order.id}'
-        else:
-            cancel_url += f'&order_id={order.id}'
+        order = self.order
+        success_url = validated_data.get('success_url')
+        cancel_url = validated_data.get('cancel_url')
+
+        if checkout.is_async():
+            with transaction.atomic():
+                payment = checkout.enqueue(order, success_url, cancel_url)
+            return {
+                'payment_id': payment.id,
+                'order_id': order.id,
+                'amount': order.cost,
+                'checkout_status': checkout.CHECKOUT_PENDING,
+                'checkout_poll_url': reverse('checkout-status', args=[payment.id]),
+            }
 
         try:
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': f'Courier Order #{order.id}',
-                            'description': order.description,
-                        },
-                        'unit_amount': amount_cents,
-                    },
-                    'quantity': 1,
-                }],
-                mode='payment',
-                success_url=success_url + '?session_id={CHECKOUT_SESSION_ID}',
-                cancel_url=cancel_url,
-                metadata={
-                    'order_id': order.id,
-                    'customer_id': order.customer_id
-                }
+            checkout_session = gateway.create_checkout_session(
+                gateway.checkout_session_params(order, success_url, cancel_url)
             )
             
             # Create payment record with checkout session
@@ -78,6 +65,7 @@ class CheckoutSessionSerializer(serializers.Serializer):
                 amount=order.cost,
                 stripe_payment_intent_id=checkout_session.id,  # Store session ID temporarily
                 status='PENDING',
+                checkout_url=checkout_session.url,
             )
             
             return {
@@ -88,4 +76,16 @@ class CheckoutSessionSerializer(serializers.Serializer):
             }
 
         except stripe.error.StripeError as e:
-            raise serializers.ValidationError(f'Failed to create checkout session: {str(e)}') 
\ No newline at end of file
+            raise serializers.ValidationError(f'Failed to create checkout session: {str(e)}')
+
+
+class CheckoutStatusQuerySerializer(ProfiledSerializerMixin, serializers.Serializer):
+    # Long-poll: seconds to wait for the session before answering PENDING.
+    wait = serializers.IntegerField(min_value=0, default=0)
+
+    def validate_wait(self, value):
+        return min(value, getattr(settings, 'CHECKOUT_POLL_MAX_WAIT', 2))
+
+
+class PaymentExportQuerySerializer(ExportQuerySerializer):
+    status = serializers.ChoiceField(choices=Payment.STATUS_CHOICES, required=False)
@@ -1,3 +1,330 @@
-from django.test import TestCase
+import json
+import threading
+from datetime import timedelta
+from decimal import Decimal
 
-# Create your tests here. 
\ No newline at end of file
+import stripe
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from apps.orders.models import Order
+from apps.payments import checkout, replay, webhooks
+from apps.payments.models import CheckoutJob, Payment, StripeEvent
+from apps.users.authentication import user_cache
+from apps.users.models import User
+from apps.users.tokens import RoleRefreshToken
+from respond.querybudget import assert_within_query_budget, query_budget
+
+
+WEBHOOK_SECRET = 'whsec_test'
+
+
+def stripe_event(event_id, event_type, object_id, **fields):
+    return {'id': event_id, 'type': event_type, 'data': {'object': {'id': object_id, **fields}}}
+
+
+class UnavailableBackend:
+    """
+    Gateway backend for tests whose Stripe calls always fail.
+    """
+
+    def create_checkout_session(self, params, idempotency_key=None):
+        raise stripe.error.APIConnectionError('Stripe is unavailable')
+
+
+@override_settings(STRIPE_GATEWAY_BACKEND='apps.payments.gateway.FakeBackend')
+class PaymentTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.customer = User.objects.create_user('customer', 'customer@example.com', 'password', role='user')
+        self.order = Order.objects.create(
+            customer=self.customer, description='Parcel', address='Dhaka', cost=Decimal('10.00'),
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+        return client
+
+
+class PaymentQueryBudgetTests(PaymentTestCase):
+
+    @override_settings(STRIPE_CHECKOUT_ASYNC=False)
+    def test_checkout_session(self):
+        client = self.client_for(self.customer)
+        with query_budget('checkout-session'):
+            response = client.post(reverse('checkout-session'), {'order_id': self.order.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Payment.objects.filter(order=self.order, stripe_payment_intent_id__startswith='cs_fake_').exists())
+
+    @override_settings(STRIPE_CHECKOUT_ASYNC=True)
+    def test_checkout_session_async(self):
+        client = self.client_for(self.customer)
+        with query_budget('checkout-session'):
+            response = client.post(reverse('checkout-session'), {'order_id': self.order.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['Data']['checkout_status'], 'PENDING')
+
+    def test_checkout_status(self):
+        payment = Payment.objects.create(order=self.order, amount=self.order.cost, stripe_payment_intent_id='cs_1')
+        client = self.client_for(self.customer)
+        with query_budget('checkout-status'):
+            response = client.get(reverse('checkout-status', args=[payment.pk]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_retry_payment(self):
+        payment = Payment.objects.create(
+            order=self.order, amount=self.order.cost, stripe_payment_intent_id='cs_1', status='FAILED',
+        )
+        client = self.client_for(self.customer)
+        with query_budget('retry-payment'):
+            response = client.post(reverse('retry-payment', args=[payment.pk]))
+        self.assertEqual(response.status_code, 201)
+        payment.refresh_from_db()
+        self.assertEqual(payment.status, 'PENDING')
+
+    @override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+    def test_stripe_webhook(self):
+        payload = json.dumps(stripe_event('evt_1', 'checkout.session.completed', 'cs_1')).encode()
+        with query_budget('stripe-webhook'):
+            response = self.client.post(
+                reverse('stripe-webhook'), payload, content_type='application/json',
+                HTTP_STRIPE_SIGNATURE=replay.sign(payload, WEBHOOK_SECRET),
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_export(self):
+        admin = User.objects.create_user('admin', 'admin@example.com', 'password', role='admin')
+        Payment.objects.create(order=self.order, amount=self.order.cost, stripe_payment_intent_id='cs_1')
+        response = self.client_for(admin).get(reverse('payment-export'))
+        self.assertEqual(response.status_code, 200)
+        # Counts the queries run before the first row; the rows are read while streaming.
+        assert_within_query_budget(response)
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1)
+
+    def test_result_pages(self):
+        for url_name in ('payment-success', 'payment-cancel', 'payment-success-page', 'payment-cancel-page'):
+            response = self.client.get(reverse(url_name))
+            self.assertEqual(response.status_code, 200)
+            assert_within_query_budget(response)
+
+
+@override_settings(STRIPE_CHECKOUT_ASYNC=True)
+class CheckoutOutboxTests(PaymentTestCase):
+
+    def request_checkout(self):
+        client = self.client_for(self.customer)
+        response = client.post(reverse('checkout-session'), {'order_id': self.order.pk}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return client, response.json()['Data']['checkout_poll_url']
+
+    def run_jobs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return checkout.run_jobs()
+
+    def test_job_opens_checkout_session(self):
+        client, poll_url = self.request_checkout()
+        self.assertEqual(client.get(poll_url).json()['Data']['checkout_status'], 'PENDING')
+
+        self.assertEqual(self.run_jobs(), checkout.RunResult(done=1, retried=0, failed=0))
+
+        response = client.get(poll_url, {'wait': 2})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['Data']
+        self.assertEqual(data['checkout_status'], 'READY')
+        self.assertTrue(data['checkout_url'].endswith(data['session_id']))
+        self.assertEqual(CheckoutJob.objects.get().status, CheckoutJob.STATUS_DONE)
+
+    @override_settings(
+        STRIPE_GATEWAY_BACKEND='apps.payments.tests.UnavailableBackend',
+        CHECKOUT_JOB_MAX_ATTEMPTS=2,
+    )
+    def test_failing_job_is_retried_then_failed(self):
+        client, poll_url = self.request_checkout()
+
+        self.assertEqual(self.run_jobs(), checkout.RunResult(done=0, retried=1, failed=0))
+        # Backed off: not due again yet.
+        self.assertEqual(self.run_jobs(), checkout.RunResult(done=0, retried=0, failed=0))
+
+        CheckoutJob.objects.update(available_at=timezone.now())
+        with self.assertLogs('apps.payments.checkout', 'WARNING'):
+            self.assertEqual(self.run_jobs(), checkout.RunResult(done=0, retried=0, failed=1))
+
+        job = CheckoutJob.objects.get()
+        self.assertEqual((job.status, job.attempts), (CheckoutJob.STATUS_FAILED, 2))
+        self.assertEqual(Payment.objects.get().status, Payment.STATUS_FAILED)
+        self.assertEqual(client.get(poll_url).json()['Data']['checkout_status'], 'FAILED')
+
+    def test_job_taken_over_after_lease_is_not_recorded(self):
+        self.request_checkout()
+        job = checkout.claim_job()
+        self.assertIsNotNone(job)
+        self.assertIsNone(checkout.claim_job())
+
+        # The lease ran out and another worker claimed the job meanwhile.
+        CheckoutJob.objects.filter(pk=job.pk).update(available_at=timezone.now() + timedelta(minutes=1))
+
+        with self.assertLogs('apps.payments.checkout', 'WARNING'):
+            self.assertIsNone(checkout.run_job(job))
+        self.assertEqual(Payment.objects.get().checkout_url, '')
+        self.assertEqual(CheckoutJob.objects.get().status, CheckoutJob.STATUS_PENDING)
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class StripeWebhookTests(PaymentTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.payment = Payment.objects.create(order=self.order, amount=self.order.cost, stripe_payment_intent_id='cs_1')
+
+    def deliver(self, event):
+        payload = json.dumps(event).encode()
+        return self.client.post(
+            reverse('stripe-webhook'), payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=replay.sign(payload, WEBHOOK_SECRET),
+        )
+
+    def process(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return webhooks.process_batch()
+
+    def make_due(self):
+        StripeEvent.objects.filter(status=StripeEvent.STATUS_PENDING).update(available_at=timezone.now())
+
+    def test_bad_signature_is_rejected(self):
+        response = self.client.post(
+            reverse('stripe-webhook'), b'{}', content_type='application/json', HTTP_STRIPE_SIGNATURE='t=1,v1=0',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StripeEvent.objects.exists())
+
+    def test_duplicate_delivery_is_stored_once(self):
+        event = stripe_event('evt_1', 'checkout.session.completed', 'cs_1', payment_intent='pi_1')
+        for _ in range(2):
+            self.assertEqual(self.deliver(event).status_code, 200)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+
+        self.assertEqual(self.process().processed, 1)
+        self.deliver(event)
+        self.assertEqual(self.process().processed, 0)
+
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.status, self.payment.stripe_payment_intent_id), ('SUCCEEDED', 'pi_1'))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.payment_status, 'SUCCEEDED')
+
+    def test_intent_event_before_session_in_one_batch(self):
+        self.deliver(stripe_event('evt_1', 'payment_intent.succeeded', 'pi_1'))
+        self.deliver(stripe_event('evt_2', 'checkout.session.completed', 'cs_1', payment_intent='pi_1'))
+
+        result = self.process()
+
+        self.assertEqual((result.processed, result.deferred), (2, 0))
+        self.assertEqual(set(StripeEvent.objects.values_list('status', flat=True)), {'PROCESSED'})
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.status, self.payment.stripe_payment_intent_id), ('SUCCEEDED', 'pi_1'))
+
+    def test_intent_event_before_session_is_retried(self):
+        self.deliver(stripe_event('evt_1', 'payment_intent.succeeded', 'pi_1'))
+        self.assertEqual(self.process().deferred, 1)
+        event = StripeEvent.objects.get(event_id='evt_1')
+        self.assertEqual((event.status, event.attempts), ('PENDING', 1))
+        self.assertGreater(event.available_at, timezone.now())
+        # Backing off: not picked up again yet.
+        self.assertEqual(self.process(), webhooks.BatchResult(0, 0, 0, None, None))
+
+        self.deliver(stripe_event('evt_2', 'checkout.session.completed', 'cs_1', payment_intent='pi_1'))
+        self.assertEqual(self.process().processed, 1)
+        self.make_due()
+        self.assertEqual(self.process().processed, 1)
+
+        self.assertEqual(StripeEvent.objects.get(event_id='evt_1').status, 'PROCESSED')
+        self.assertEqual(webhooks.backlog().pending, 0)
+
+    @override_settings(STRIPE_EVENT_MAX_ATTEMPTS=2)
+    def test_unmatched_event_fails_after_max_attempts(self):
+        self.deliver(stripe_event('evt_1', 'payment_intent.succeeded', 'pi_unknown'))
+        self.assertEqual(self.process().deferred, 1)
+        self.make_due()
+        with self.assertLogs('apps.payments.webhooks', 'WARNING'):
+            result = self.process()
+
+        self.assertEqual((result.processed, result.failed, result.deferred), (1, 1, 0))
+        event = StripeEvent.objects.get()
+        self.assertEqual((event.status, event.error), ('FAILED', 'No payment found'))
+
+    def test_late_failure_does_not_undo_success(self):
+        self.deliver(stripe_event('evt_1', 'checkout.session.completed', 'cs_1', payment_intent='pi_1'))
+        self.deliver(stripe_event('evt_2', 'payment_intent.payment_failed', 'pi_1'))
+        self.process()
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, 'SUCCEEDED')
+
+    def test_malformed_event_fails(self):
+        StripeEvent.objects.create(event_id='evt_1', type='checkout.session.completed', payload={'data': {}})
+        with self.assertLogs('apps.payments.webhooks', 'ERROR'):
+            result = self.process()
+        self.assertEqual(result.failed, 1)
+        self.assertEqual(StripeEvent.objects.get().status, 'FAILED')
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET=WEBHOOK_SECRET)
+class WebhookReplayTests(APITestCase):
+
+    def test_stripe_orderings_end_in_expected_state(self):
+        payments = replay.seed_payments(30, seed=1)
+        self.assertEqual({payment.outcome for payment in payments}, set(replay.OUTCOMES))
+        events = replay.build_events(payments, duplicates=0.2, shuffle_window=10, seed=1)
+
+        for event in events:
+            payload = json.dumps(event).encode()
+            response = self.client.post(
+                reverse('stripe-webhook'), payload, content_type='application/json',
+                HTTP_STRIPE_SIGNATURE=replay.sign(payload, WEBHOOK_SECRET),
+            )
+            self.assertEqual(response.status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            replay.drain(timeout=10)
+
+        self.assertEqual(replay.mismatches(payments), [])
+        self.assertEqual(replay.unapplied_events(), [])
+
+
+@skipUnlessDBFeature('has_select_for_update_skip_locked')
+class StripeEventClaimTests(TransactionTestCase):
+
+    def test_events_locked_by_another_worker_are_skipped(self):
+        for event_id in ('evt_1', 'evt_2'):
+            webhooks.record_event(stripe_event(event_id, 'customer.created', 'cus_1'))
+        locked, release = threading.Event(), threading.Event()
+
+        def other_worker():
+            try:
+                with transaction.atomic():
+                    StripeEvent.objects.select_for_update().get(event_id='evt_1')
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            result = webhooks.process_batch()
+        finally:
+            release.set()
+            thread.join()
+
+        self.assertEqual(result.processed, 1)
+        self.assertEqual(
+            dict(StripeEvent.objects.values_list('event_id', 'status')),
+            {'evt_1': 'PENDING', 'evt_2': 'PROCESSED'},
+        )
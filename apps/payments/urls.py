@@ -1,22 +1,30 @@
 from django.urls import path
 from .views import (
     CheckoutSessionView,
+    CheckoutStatusView,
     StripeWebhookView,
     PaymentSuccessView,
     PaymentCancelView,
-    RetryPaymentView
+    RetryPaymentView,
+    PaymentExportView,
 )
 
 urlpatterns = [
     # Stripe Checkout Session (hosted checkout) - MAIN PAYMENT ENDPOINT
     path('checkout/', CheckoutSessionView.as_view(), name='checkout-session'),
     
+    # Checkout session status for async checkout (supports long-polling with ?wait=N)
+    path('<int:payment_id>/checkout/', CheckoutStatusView.as_view(), name='checkout-status'),
+    
     # Retry payment for pending/failed payments
     path('retry/<int:payment_id>/', RetryPaymentView.as_view(), name='retry-payment'),
     
     # Webhooks - Handle payment completion
     path('webhook/', StripeWebhookView.as_view(), name='stripe-webhook'),
     
+    # Admin export (NDJSON / CSV)
+    path('export/', PaymentExportView.as_view(), name='payment-export'),
+    
     # Success and Cancel pages
     path('success/', PaymentSuccessView.as_view(), name='payment-success'),
     path('cancel/', PaymentCancelView.as_view(), name='payment-cancel'),
@@ -1,5 +1,4 @@
 from rest_framework import permissions, status
-from rest_framework.views import APIView
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
@@ -9,14 +8,18 @@ from django.conf import settings
 from django.views.generic import TemplateView
 import stripe
 
-from .serializers import CheckoutSessionSerializer
+from . import checkout, gateway
+from .serializers import CheckoutSessionSerializer, CheckoutStatusQuerySerializer, PaymentExportQuerySerializer
 from .models import Payment
+from .webhooks import record_event
 from apps.orders.models import Order
+from apps.orders.permissions import IsAdminRole
+from respond.sparse import requested_columns
+from respond.streaming import export_response
+from respond.views import ProfiledAPIView
 
-stripe.api_key = getattr(settings, 'STRIPE_SECRET_KEY', '')
 
-
-class CheckoutSessionView(APIView):
+class CheckoutSessionView(ProfiledAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
@@ -25,12 +28,53 @@ class CheckoutSessionView(APIView):
         checkout_data = serializer.save()
         
         response_data = checkout_data.copy()
-        response_data["message"] = "Checkout session created successfully. Redirect user to checkout_url"
+        if 'checkout_url' in checkout_data:
+            response_data["message"] = "Checkout session created successfully. Redirect user to checkout_url"
+        else:
+            response_data["message"] = "Checkout session requested. Poll checkout_poll_url for the checkout_url"
         return Response(response_data, status=status.HTTP_201_CREATED)
 
 
+class CheckoutStatusView(ProfiledAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_payment(self, payment_id):
+        return get_object_or_404(Payment.objects.select_related('order'), id=payment_id)
+
+    def get(self, request, payment_id):
+        query = CheckoutStatusQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+
+        payment = self.get_payment(payment_id)
+        if payment.order.customer_id != request.user.id and request.user.role != 'admin':
+            return Response(
+                {"error": "You do not own this payment"}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        wait = query.validated_data['wait']
+        if wait and checkout.checkout_status(payment) == checkout.CHECKOUT_PENDING:
+            if checkout.wait_for_checkout(payment.id, wait):
+                payment = self.get_payment(payment_id)
+
+        checkout_status = checkout.checkout_status(payment)
+        return Response({
+            'message': {
+                checkout.CHECKOUT_READY: "Checkout session ready. Redirect user to checkout_url",
+                checkout.CHECKOUT_PENDING: "Checkout session is being created. Poll again",
+                checkout.CHECKOUT_FAILED: "Checkout session could not be created. Retry the payment",
+            }[checkout_status],
+            'checkout_status': checkout_status,
+            'checkout_url': payment.checkout_url or None,
+            'session_id': payment.stripe_payment_intent_id if payment.checkout_url else None,
+            'payment_id': payment.id,
+            'order_id': payment.order_id,
+            'payment_status': payment.status,
+        })
+
+
 @method_decorator(csrf_exempt, name='dispatch')
-class StripeWebhookView(APIView):
+class StripeWebhookView(ProfiledAPIView):
     permission_classes = []  # No authentication required for webhooks
     
     def post(self, request):
@@ -47,62 +91,8 @@ class StripeWebhookView(APIView):
         except stripe.error.SignatureVerificationError:
             return HttpResponse(status=400)
 
-        if event['type'] == 'checkout.session.completed':
-            session = event['data']['object']
-            
-            try:
-                payment = Payment.objects.get(stripe_payment_intent_id=session['id'])
-                payment.status = 'SUCCEEDED'
-                payment.stripe_payment_intent_id = session.get('payment_intent', session['id'])
-                payment.save()
-                print(f"✅ Payment {payment.id} marked as SUCCEEDED for order {payment.order.id}")
-                
-            except Payment.DoesNotExist:
-                print(f"❌ Payment not found for session {session['id']}")
-
-        # Handle checkout session expired event
-        elif event['type'] == 'checkout.session.expired':
-            session = event['data']['object']
-            
-            try:
-                payment = Payment.objects.get(stripe_payment_intent_id=session['id'])
-                payment.status = 'FAILED'
-                payment.save()
-                print(f"⏰ Payment {payment.id} marked as FAILED (session expired) for order {payment.order.id}")
-                
-            except Payment.DoesNotExist:
-                print(f"❌ Payment not found for expired session {session['id']}")
-
-        # Handle payment intent succeeded (backup confirmation)
-        elif event['type'] == 'payment_intent.succeeded':
-            payment_intent = event['data']['object']
-            
-            try:
-                payment = Payment.objects.get(stripe_payment_intent_id=payment_intent['id'])
-                if payment.status != 'SUCCEEDED':
-                    payment.status = 'SUCCEEDED'
-                    payment.save()
-                    print(f"✅ Payment {payment.id} confirmed as SUCCEEDED (payment_intent) for order {payment.order.id}")
-                    
-            except Payment.DoesNotExist:
-                print(f"❌ Payment not found for payment_intent {payment_intent['id']}")
-
-        # Handle payment intent failed
-        elif event['type'] == 'payment_intent.payment_failed':
-            payment_intent = event['data']['object']
-            
-            try:
-                payment = Payment.objects.get(stripe_payment_intent_id=payment_intent['id'])
-                payment.status = 'FAILED'
-                payment.save()
-                print(f"❌ Payment {payment.id} marked as FAILED for order {payment.order.id}")
-                
-            except Payment.DoesNotExist:
-                print(f"❌ Payment not found for failed payment_intent {payment_intent['id']}")
-
-        else:
-            print(f"ℹ️ Unhandled event type: {event['type']}")
-
+        # Store and acknowledge right away; `process_stripe_events` applies it.
+        record_event(event)
         return HttpResponse(status=200)
 
 
@@ -124,12 +114,12 @@ class PaymentCancelView(TemplateView):
         return context
 
 
-class RetryPaymentView(APIView):
+class RetryPaymentView(ProfiledAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, payment_id):
         try:
-            payment = Payment.objects.get(id=payment_id)
+            payment = Payment.objects.select_related('order').get(id=payment_id)
         except Payment.DoesNotExist:
             return Response(
                 {"error": "Payment not found"}, 
@@ -150,34 +140,13 @@ class RetryPaymentView(APIView):
             )
 
         try:
-            amount_cents = int(payment.amount * 100)
-            frontend_url = getattr(settings, 'FRONTEND_URL', 'http://localhost:8000')
-            
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=['card'],
-                line_items=[{
-                    'price_data': {
-                        'currency': 'usd',
-                        'product_data': {
-                            'name': f'Courier Order #{payment.order.id} (Retry)',
-                            'description': payment.order.description,
-                        },
-                        'unit_amount': amount_cents,
-                    },
-                    'quantity': 1,
-                }],
-                mode='payment',
-                success_url=f'{frontend_url}/payment/success?session_id={{CHECKOUT_SESSION_ID}}',
-                cancel_url=f'{frontend_url}/payment/cancel?order_id={payment.order.id}',
-                metadata={
-                    'order_id': payment.order.id,
-                    'customer_id': payment.order.customer_id,
-                    'retry_payment_id': payment.id
-                }
+            checkout_session = gateway.create_checkout_session(
+                gateway.checkout_session_params(payment.order, retry_payment=payment)
             )
             
             payment.stripe_payment_intent_id = checkout_session.id
             payment.status = 'PENDING'
+            payment.checkout_url = checkout_session.url
             payment.save()
             
             return Response({
@@ -193,4 +162,32 @@ class RetryPaymentView(APIView):
             return Response(
                 {"error": f"Failed to create retry checkout session: {str(e)}"}, 
                 status=status.HTTP_400_BAD_REQUEST
-            ) 
\ No newline at end of file
+            )
+
+
+class PaymentExportView(ProfiledAPIView):
+    permission_classes = [IsAdminRole]
+    columns = [
+        ('id', 'id'),
+        ('order_id', 'order_id'),
+        ('amount', 'amount'),
+        ('status', 'status'),
+        ('stripe_payment_intent_id', 'stripe_payment_intent_id'),
+        ('created_at', 'created_at'),
+        ('updated_at', 'updated_at'),
+    ]
+
+    def get(self, request):
+        serializer = PaymentExportQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        queryset = Payment.objects.order_by('id')
+        if 'status' in params:
+            queryset = queryset.filter(status=params['status'])
+        if 'created_from' in params:
+            queryset = queryset.filter(created_at__gte=params['created_from'])
+        if 'created_to' in params:
+            queryset = queryset.filter(created_at__lt=params['created_to'])
+
+        return export_response(queryset, requested_columns(request, self.columns), params['export_format'], 'payments')
@@ -0,0 +1,186 @@
+import logging
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from apps.orders.signals import payments_bulk_updated
+
+from .models import Payment, StripeEvent
+
+logger = logging.getLogger(__name__)
+
+# Payment status each handled event type moves its payments to.
+TRANSITIONS = {
+    'checkout.session.completed': Payment.STATUS_SUCCEEDED,
+    'checkout.session.expired': Payment.STATUS_FAILED,
+    'payment_intent.succeeded': Payment.STATUS_SUCCEEDED,
+    'payment_intent.payment_failed': Payment.STATUS_FAILED,
+}
+
+BatchResult = namedtuple('BatchResult', ['processed', 'failed', 'deferred', 'max_lag', 'mean_lag'])
+Backlog = namedtuple('Backlog', ['pending', 'oldest_lag'])
+
+
+def record_event(event):
+    """
+    Store a verified event in the inbox. Stripe redelivers events, so a
+    duplicate event id is silently ignored in the same single INSERT.
+    """
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event['id'], type=event['type'], payload=event)],
+        ignore_conflicts=True,
+    )
+
+
+def _reference(event):
+    return event.payload['data']['object']['id']
+
+
+def _apply(event, payments_by_reference, changed):
+    """
+    Apply one event to the in-memory payments. Payments are keyed by their
+    `stripe_payment_intent_id`, which `checkout.session.completed` moves
+    from the session id to the payment intent id for later events. Returns
+    False when no payment has the event's reference (yet).
+    """
+    new_status = TRANSITIONS.get(event.type)
+    if new_status is None:
+        logger.info("Unhandled Stripe event type %s (%s)", event.type, event.event_id)
+        return True
+
+    session = event.payload['data']['object']
+    reference = session['id']
+    payments = payments_by_reference.get(reference)
+    if not payments:
+        return False
+
+    new_reference = reference
+    if event.type == 'checkout.session.completed':
+        new_reference = session.get('payment_intent') or reference
+
+    for payment in payments:
+        if payment.status == Payment.STATUS_SUCCEEDED and new_status == Payment.STATUS_FAILED:
+            # A succeeded payment is final: a failure reported after it is
+            # an earlier attempt delivered late.
+            continue
+        if (payment.status, payment.stripe_payment_intent_id) == (new_status, new_reference):
+            continue
+        payment.status = new_status
+        payment.stripe_payment_intent_id = new_reference
+        changed[payment.pk] = payment
+        logger.info("Payment %s marked as %s by %s for order %s", payment.pk, new_status, event.type, payment.order_id)
+
+    if new_reference != reference:
+        payments_by_reference[new_reference].extend(payments_by_reference.pop(reference))
+    return True
+
+
+def _defer(event, now):
+    """
+    Leave an event whose payment isn't known yet for a later batch, with
+    exponential backoff, or fail it after `STRIPE_EVENT_MAX_ATTEMPTS`.
+    """
+    event.attempts += 1
+    if event.attempts >= getattr(settings, 'STRIPE_EVENT_MAX_ATTEMPTS', 8):
+        logger.warning("No payment found for %s %s", event.type, event.event_id)
+        event.status = StripeEvent.STATUS_FAILED
+        event.error = "No payment found"
+        event.processed_at = now
+        return False
+    event.available_at = now + timedelta(seconds=2 ** event.attempts)
+    return True
+
+
+def process_batch(batch_size=500):
+    """
+    Apply up to `batch_size` due events, oldest first, in one transaction.
+
+    All referenced payments are loaded in one query and written back with
+    one `bulk_update()`. Rollups, order timestamps and the order list cache
+    are then updated for the whole batch. With `SKIP LOCKED` (PostgreSQL),
+    several workers can drain the inbox side by side.
+
+    Stripe doesn't deliver events in order: `payment_intent.*` events often
+    arrive before the `checkout.session.completed` that tells us the intent
+    id. Events that match no payment are tried again at the end of the
+    batch, then left PENDING and retried with backoff.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        events = list(
+            StripeEvent.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=StripeEvent.STATUS_PENDING, available_at__lte=now)
+            .order_by('available_at', 'id')[:batch_size]
+        )
+        if not events:
+            return BatchResult(0, 0, 0, None, None)
+
+        references = set()
+        for event in events:
+            try:
+                references.add(_reference(event))
+            except (KeyError, TypeError):
+                pass
+
+        payments_by_reference = defaultdict(list)
+        previous = {}
+        for payment in Payment.objects.select_related('order').filter(stripe_payment_intent_id__in=references):
+            payments_by_reference[payment.stripe_payment_intent_id].append(payment)
+            previous[payment.pk] = (payment.status, payment.amount)
+
+        changed = {}
+        unmatched = []
+        for event in events:
+            try:
+                matched = _apply(event, payments_by_reference, changed)
+            except (KeyError, TypeError, AttributeError) as exc:
+                logger.exception("Malformed Stripe event %s", event.event_id)
+                event.status = StripeEvent.STATUS_FAILED
+                event.error = f"{type(exc).__name__}: {exc}"
+                event.processed_at = now
+                continue
+            if matched:
+                event.status = StripeEvent.STATUS_PROCESSED
+                event.processed_at = now
+            else:
+                unmatched.append(event)
+
+        deferred = 0
+        for event in unmatched:
+            # The rest of the batch may have moved a payment onto this id.
+            if _apply(event, payments_by_reference, changed):
+                event.status = StripeEvent.STATUS_PROCESSED
+                event.processed_at = now
+            elif _defer(event, now):
+                deferred += 1
+
+        if changed:
+            for payment in changed.values():
+                payment.updated_at = now
+            Payment.objects.bulk_update(list(changed.values()), ['status', 'stripe_payment_intent_id', 'updated_at'])
+            payments_bulk_updated([(payment, previous[payment.pk]) for payment in changed.values()])
+        StripeEvent.objects.bulk_update(events, ['status', 'error', 'attempts', 'available_at', 'processed_at'])
+
+    done = [event for event in events if event.status != StripeEvent.STATUS_PENDING]
+    lags = [(now - event.received_at).total_seconds() for event in done]
+    failed = sum(event.status == StripeEvent.STATUS_FAILED for event in done)
+    return BatchResult(
+        len(done), failed, deferred,
+        max(lags, default=None), sum(lags) / len(lags) if lags else None,
+    )
+
+
+def backlog():
+    """
+    Number of pending events and the age in seconds of the oldest one.
+    """
+    state = StripeEvent.objects.filter(status=StripeEvent.STATUS_PENDING).aggregate(
+        pending=Count('id'), oldest=Min('received_at'),
+    )
+    oldest_lag = (timezone.now() - state['oldest']).total_seconds() if state['oldest'] else 0.0
+    return Backlog(state['pending'], oldest_lag)
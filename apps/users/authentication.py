@@ -0,0 +1,139 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .tokens import ROLE_CLAIM, VERSION_CLAIM
+
+
+def _version_key(user_id):
+    return f'users:token_version:{user_id}'
+
+
+def token_version(user_id):
+    """
+    Current token version of an active user, or None. Read from the cache,
+    which the User save signal keeps current, and from the database on a
+    miss.
+    """
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = (
+            get_user_model().objects
+            .filter(pk=user_id, is_active=True)
+            .values_list('token_version', flat=True)
+            .first()
+        )
+        if version is not None:
+            remember_token_version(user_id, version)
+    return version
+
+
+def remember_token_version(user_id, version):
+    cache.set(_version_key(user_id), version, timeout=getattr(settings, 'AUTH_TOKEN_VERSION_TIMEOUT', 60))
+
+
+def forget_token_version(user_id):
+    cache.delete(_version_key(user_id))
+
+
+class UserCache:
+    """
+    Per-process LRU of User rows with a short TTL, for the views that need
+    more than the token claims. Each caller gets its own copy.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                return copy.copy(entry[0])
+
+        user = get_user_model().objects.get(pk=user_id)
+        ttl = getattr(settings, 'AUTH_USER_CACHE_TTL', 30)
+        with self._lock:
+            self._entries[user_id] = (user, now + ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > getattr(settings, 'AUTH_USER_CACHE_SIZE', 1024):
+                self._entries.popitem(last=False)
+        return copy.copy(user)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    `request.user` for tokens carrying role claims. `id`, `pk`, `role` and
+    the role helpers are answered from the token; anything else loads the
+    User through `user_cache` on first access.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, role):
+        super().__init__(partial(user_cache.get, user_id))
+        self.__dict__.update(id=user_id, pk=user_id, role=role)
+
+    def __bool__(self):
+        return True
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin'
+
+    @property
+    def is_delivery_man(self):
+        return self.role == 'delivery_man'
+
+    @property
+    def is_regular_user(self):
+        return self.role == 'user'
+
+
+class RoleJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the `role` claim instead of loading the
+    user. A token is accepted while its `ver` claim matches the user's
+    `token_version`, which changes with their role, password or active
+    flag. Tokens issued without these claims go through the default
+    database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if ROLE_CLAIM not in validated_token or VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if token_version(user_id) != validated_token[VERSION_CLAIM]:
+            raise AuthenticationFailed(_("Token is no longer valid"), code='token_not_valid')
+
+        return TokenUser(user_id, validated_token[ROLE_CLAIM])
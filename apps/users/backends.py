@@ -0,0 +1,57 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password
+from django.db.models.functions import Lower
+
+from .authentication import user_cache
+
+
+def login_queryset(identifier):
+    """
+    Users matching `identifier`: an email address if it contains "@",
+    otherwise a username. Emails are matched case-insensitively on the
+    `users_email_lower_unique` index.
+    """
+    User = get_user_model()
+    if '@' in identifier:
+        return User.objects.exclude(email='').alias(email_lower=Lower('email')).filter(email_lower=identifier.lower())
+    return User.objects.filter(username=identifier)
+
+
+def get_login_user(identifier):
+    return login_queryset(identifier).first()
+
+
+class UsernameOrEmailBackend(ModelBackend):
+    """
+    Authenticate by username or case-insensitive email, with one lookup
+    and one password check.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(get_user_model().USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = get_login_user(username)
+        if user is None:
+            # Hash anyway so unknown accounts take as long as wrong passwords.
+            get_user_model()().set_password(password)
+            return None
+        if check_password(password, user.password, setter=lambda raw: self.upgrade_password(user, raw)):
+            if self.user_can_authenticate(user):
+                return user
+        return None
+
+    def upgrade_password(self, user, raw_password):
+        """
+        Rehash with the preferred hasher after a successful check. The
+        password itself is unchanged, so this is written directly rather than
+        through `save()`, which would revoke the user's tokens.
+        """
+        user.set_password(raw_password)
+        user._password = None
+        get_user_model().objects.filter(pk=user.pk).update(password=user.password)
+        user._loaded_values = {**getattr(user, '_loaded_values', {}), 'password': user.password}
+        user_cache.forget(user.pk)
@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.users.backends import get_login_user, login_queryset
+
+User = get_user_model()
+
+BENCH_PREFIX = 'benchlogin'
+PASSWORD = 'bench-password-123'
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed users and measure login throughput, splitting the user lookup (DB) "
+        "from password hashing. Compares the single-query email lookup with the "
+        "previous lookup-then-authenticate flow. Run it against a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100000)
+        parser.add_argument('--logins', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--keep', action='store_true', help='Keep the seeded users afterwards.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Seeding {options['users']} users...")
+        self._seed(options['users'], options['batch_size'])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        rng = random.Random(0)
+        emails = [f'{BENCH_PREFIX}_{rng.randrange(options["users"])}@example.com' for _ in range(options['logins'])]
+        encoded = User.objects.filter(username=f'{BENCH_PREFIX}_0').values_list('password', flat=True).get()
+
+        lookup = self._time(get_login_user, emails)
+        previous = self._time(self._previous_lookup, emails)
+        hashing = self._time(lambda email: check_password(PASSWORD, encoded), emails[:max(1, len(emails) // 10)])
+        login = self._time(lambda email: authenticate(None, username=email, password=PASSWORD), emails[:max(1, len(emails) // 10)])
+
+        self.stdout.write(self.style.SUCCESS('\nEXPLAIN (email lookup)'))
+        self.stdout.write(login_queryset(emails[0]).explain())
+
+        self.stdout.write(self.style.MIGRATE_HEADING('\nSummary (median ms per login)'))
+        for name, value in (
+            ('email lookup (1 query)', lookup),
+            ('previous lookup (2 queries)', previous),
+            ('password hash check', hashing),
+            ('authenticate() end to end', login),
+        ):
+            self.stdout.write(f'{name:<30} {value:>10.3f}')
+        self.stdout.write(f"\nDB share of a login: {lookup / login:.1%}; ~{1000 / login:.0f} logins/s per worker")
+
+        if not options['keep']:
+            User.objects.filter(username__startswith=f'{BENCH_PREFIX}_').delete()
+
+    def _seed(self, count, batch_size):
+        # One hash shared by every seeded user: hashing 100k passwords
+        # would take far longer than the benchmark itself.
+        password = make_password(PASSWORD)
+        for start in range(0, count, batch_size):
+            User.objects.bulk_create([
+                User(username=f'{BENCH_PREFIX}_{i}', email=f'{BENCH_PREFIX}_{i}@example.com', password=password)
+                for i in range(start, min(start + batch_size, count))
+            ])
+
+    def _previous_lookup(self, email):
+        # Old CustomLoginSerializer: find by email, then authenticate()
+        # fetched the same user again by username.
+        user = User.objects.filter(email=email).first()
+        return User.objects.filter(username=user.username).first()
+
+    def _time(self, call, arguments):
+        samples = []
+        for argument in arguments:
+            start = time.perf_counter()
+            call(argument)
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
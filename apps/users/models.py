@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 
 ROLES= (
     ('admin', 'Admin'),
@@ -7,8 +8,40 @@ ROLES= (
     ('user', 'User'),
 )
 
+# Changing any of these invalidates the user's issued tokens.
+TOKEN_FIELDS = ('role', 'password', 'is_active')
+
+
 class User(AbstractUser):
     role = models.CharField(max_length=20, choices=ROLES, default="user")
+    # Carried in every token as the `ver` claim; see apps.users.authentication.
+    token_version = models.PositiveIntegerField(default=0)
+
+    class Meta(AbstractUser.Meta):
+        constraints = [
+            # Login by email: one indexed, case-insensitive lookup. Blank
+            # emails (allowed by AbstractUser) stay out of it.
+            models.UniqueConstraint(
+                Lower('email'),
+                name='users_email_lower_unique',
+                condition=~models.Q(email=''),
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_loaded_values', None) or {}
+        if any(field in loaded and loaded[field] != getattr(self, field) for field in TOKEN_FIELDS):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_values = {**loaded, **{field: getattr(self, field) for field in TOKEN_FIELDS}}
     
     def __str__(self):
         return f"{self.email} ({self.role})"
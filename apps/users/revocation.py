@@ -0,0 +1,173 @@
+import hashlib
+import heapq
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+class CacheBackend:
+    """
+    Default `TOKEN_REVOCATION_BACKEND`: one cache key per revoked jti,
+    expiring with the token. In production the cache is Redis, so a
+    revocation is seen by every worker.
+    """
+
+    def __init__(self):
+        self.cache = caches[getattr(settings, 'TOKEN_REVOCATION_CACHE_ALIAS', 'default')]
+
+    def _key(self, jti):
+        return f'users:revoked:{jti}'
+
+    def add(self, jti, ttl):
+        return self.cache.add(self._key(jti), 1, timeout=ttl)
+
+    def contains(self, jti):
+        return self.cache.get(self._key(jti)) is not None
+
+
+class MemoryBackend:
+    """
+    In-process store for tests and single-process development. Entries are
+    dropped once their token has expired, soonest first.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._expiry = {}
+        self._heap = []
+
+    def _evict(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, jti = heapq.heappop(self._heap)
+            if self._expiry.get(jti) == expires_at:
+                del self._expiry[jti]
+
+    def add(self, jti, ttl):
+        now = time.time()
+        with self._lock:
+            self._evict(now)
+            if jti in self._expiry:
+                return False
+            self._expiry[jti] = now + ttl
+            heapq.heappush(self._heap, (now + ttl, jti))
+            return True
+
+    def contains(self, jti):
+        with self._lock:
+            self._evict(time.time())
+            return jti in self._expiry
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings: no false negatives, roughly
+    `error_rate` false positives at `capacity` items.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationStore:
+    """
+    Revoked refresh tokens, by jti, kept until the token would have expired
+    anyway.
+
+    With `TOKEN_REVOCATION_BLOOM`, jtis revoked by this process are also
+    recorded in two generations of Bloom filters, each one refresh token
+    lifetime long, so a filter can be dropped once every token in it has
+    expired. A jti missing from them is treated as not revoked without
+    asking the store. The filters don't see revocations from other
+    processes. This stays safe because refreshing always calls `revoke()`
+    next, and that is an atomic add on the shared store: a token already
+    revoked elsewhere is rejected there.
+    """
+
+    def __init__(self, backend, bloom_capacity=None, lifetime=None):
+        self.backend = backend
+        self.bloom_capacity = bloom_capacity
+        self.lifetime = lifetime.total_seconds() if lifetime else None
+        self._lock = threading.Lock()
+        self._filters = []
+        self._started = None
+
+    def _rotate(self, now):
+        if self._started is None or now - self._started >= self.lifetime:
+            self._filters = [BloomFilter(self.bloom_capacity)] + self._filters[:1]
+            self._started = now
+
+    def _remember(self, jti):
+        if not self.bloom_capacity:
+            return
+        with self._lock:
+            self._rotate(time.time())
+            self._filters[0].add(jti)
+
+    def revoke(self, jti, exp):
+        """
+        Revoke `jti` until `exp` (epoch seconds). Returns False if it was
+        already revoked.
+        """
+        ttl = max(1, math.ceil(exp - time.time()))
+        added = self.backend.add(jti, ttl)
+        self._remember(jti)
+        return added
+
+    def is_revoked(self, jti):
+        if self.bloom_capacity:
+            with self._lock:
+                self._rotate(time.time())
+                if not any(jti in bloom for bloom in self._filters):
+                    return False
+        return self.backend.contains(jti)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = getattr(settings, 'TOKEN_REVOCATION_BACKEND', 'apps.users.revocation.CacheBackend')
+                jwt = settings.SIMPLE_JWT
+                # The Bloom front relies on every refresh revoking the token it used.
+                bloom = (
+                    getattr(settings, 'TOKEN_REVOCATION_BLOOM', True)
+                    and jwt.get('ROTATE_REFRESH_TOKENS') and jwt.get('BLACKLIST_AFTER_ROTATION')
+                )
+                _store = RevocationStore(
+                    import_string(path)(),
+                    bloom_capacity=getattr(settings, 'TOKEN_REVOCATION_BLOOM_CAPACITY', 100000) if bloom else None,
+                    lifetime=jwt['REFRESH_TOKEN_LIFETIME'],
+                )
+    return _store
+
+
+@receiver(setting_changed)
+def reset_store(setting=None, **kwargs):
+    global _store
+    if setting is None or setting.startswith('TOKEN_REVOCATION_') or setting == 'SIMPLE_JWT':
+        _store = None
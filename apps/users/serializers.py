@@ -1,10 +1,16 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+
+from respond.profiling import ProfiledSerializerMixin
+
+from .backends import login_queryset
+from .tokens import RoleRefreshToken
 
 User = get_user_model()
 
-class CustomLoginSerializer(serializers.Serializer):
+class CustomLoginSerializer(ProfiledSerializerMixin, serializers.Serializer):
     username_or_email = serializers.CharField()
     password = serializers.CharField(write_only=True)
 
@@ -13,32 +19,17 @@ class CustomLoginSerializer(serializers.Serializer):
         password = attrs.get('password')
 
         if username_or_email and password:
-            user = None
-            try:
-                if '@' in username_or_email:
-                    user = User.objects.get(email=username_or_email)
-                else:
-                    user = User.objects.get(username=username_or_email)
-            except User.DoesNotExist:
-                pass
-
-            if user:
-                user = authenticate(username=user.username, password=password)
-                if user:
-                    if user.is_active:
-                        attrs['user'] = user
-                        return attrs
-                    else:
-                        raise serializers.ValidationError('User account is disabled.')
-                else:
-                    raise serializers.ValidationError('Invalid credentials.')
-            else:
-                raise serializers.ValidationError('User not found.')
+            # UsernameOrEmailBackend: one lookup, one password check.
+            user = authenticate(self.context.get('request'), username=username_or_email, password=password)
+            if user is None:
+                raise serializers.ValidationError('Invalid credentials.')
+            attrs['user'] = user
+            return attrs
         else:
             raise serializers.ValidationError('Must include username/email and password.')
 
 
-class RegisterSerializer(serializers.ModelSerializer):
+class RegisterSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     confirm_password = serializers.CharField(write_only=True, required=True)
 
@@ -47,6 +38,12 @@ class RegisterSerializer(serializers.ModelSerializer):
         fields = ('id', 'username', 'email', 'password', 'confirm_password', 'role')
         extra_kwargs = {'email': {'required': True}}
 
+    def validate_email(self, value):
+        # Matches the case-insensitive unique constraint on User.email.
+        if login_queryset(value).exists():
+            raise serializers.ValidationError('A user with that email already exists.')
+        return value
+
     def validate(self, attrs):
         if attrs['password'] != attrs['confirm_password']:
             raise serializers.ValidationError({'password': "Password fields didn't match."})
@@ -64,8 +61,15 @@ class RegisterSerializer(serializers.ModelSerializer):
         return user
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username','first_name','last_name', 'email', 'role')
-        read_only_fields = ('role','id','email')
\ No newline at end of file
+        read_only_fields = ('role','id','email')
+
+class RoleTokenObtainPairSerializer(ProfiledSerializerMixin, TokenObtainPairSerializer):
+    token_class = RoleRefreshToken
+
+
+class RoleTokenRefreshSerializer(ProfiledSerializerMixin, TokenRefreshSerializer):
+    token_class = RoleRefreshToken
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import forget_token_version, remember_token_version, user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, **kwargs):
+    user_cache.forget(instance.pk)
+    remember_token_version(instance.pk, instance.token_version if instance.is_active else None)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_cache.forget(instance.pk)
+    forget_token_version(instance.pk)
@@ -1,3 +1,211 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
 
-# Create your tests here. 
\ No newline at end of file
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.users import revocation
+from apps.users.authentication import user_cache
+from apps.users.models import User
+from apps.users.tokens import RoleRefreshToken
+from respond.querybudget import query_budget
+
+
+class UserTestCase(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.user = User.objects.create_user('customer', 'customer@example.com', 'password', role='user')
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RoleRefreshToken.for_user(user).access_token}')
+        return client
+
+
+class UserQueryBudgetTests(UserTestCase):
+
+    def test_login(self):
+        with query_budget('login'):
+            response = self.client.post(
+                reverse('login'), {'username_or_email': 'customer', 'password': 'password'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_register(self):
+        with query_budget('register'):
+            response = self.client.post(reverse('register'), {
+                'username': 'new', 'email': 'new@example.com', 'password': 'Str0ng-Passw0rd!',
+                'confirm_password': 'Str0ng-Passw0rd!',
+            }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_token_obtain_pair(self):
+        with query_budget('token_obtain_pair'):
+            response = self.client.post(
+                reverse('token_obtain_pair'), {'username': 'customer', 'password': 'password'}, format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_refresh(self):
+        refresh = str(RoleRefreshToken.for_user(self.user))
+        with query_budget('token_refresh'):
+            response = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile(self):
+        client = self.client_for(self.user)
+        with query_budget('profile'):
+            self.assertEqual(client.get(reverse('profile')).status_code, 200)
+        user_cache.clear()
+        cache.clear()
+        with query_budget('profile'):
+            response = client.put(reverse('profile'), {'first_name': 'Rahim'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+
+class LoginTests(UserTestCase):
+
+    def login(self, username_or_email, password='password'):
+        return self.client.post(
+            reverse('login'), {'username_or_email': username_or_email, 'password': password}, format='json',
+        )
+
+    def test_login_by_username_or_email(self):
+        for identifier in ('customer', 'customer@example.com', 'Customer@Example.COM'):
+            response = self.login(identifier)
+            self.assertEqual(response.status_code, 200, identifier)
+            self.assertEqual(response.json()['Data']['username'], 'customer')
+
+    def test_wrong_credentials_are_rejected(self):
+        # Usernames stay case-sensitive; only emails are not.
+        attempts = (('customer', 'wrong'), ('Customer', 'password'), ('nobody@example.com', 'password'))
+        for identifier, password in attempts:
+            self.assertEqual(self.login(identifier, password).status_code, 400, identifier)
+
+    def test_inactive_user_is_rejected(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.login('customer').status_code, 400)
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_old_hash_is_upgraded_without_revoking_tokens(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('password', hasher='md5'))
+        client = self.client_for(self.user)
+
+        with query_budget('login'):
+            self.assertEqual(self.login('customer').status_code, 200)
+
+        self.user.refresh_from_db()
+        self.assertEqual(identify_hasher(self.user.password).algorithm, 'pbkdf2_sha256')
+        self.assertEqual(self.login('customer').status_code, 200)
+        self.assertEqual(client.get(reverse('profile')).status_code, 200)
+
+
+class TokenVersionTests(UserTestCase):
+
+    def test_tokens_carry_role_and_version(self):
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'customer', 'password': 'password'}, format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        token = AccessToken(response.json()['Data']['access'])
+        self.assertEqual((token['role'], token['ver']), ('user', self.user.token_version))
+
+    def test_role_change_revokes_tokens(self):
+        client = self.client_for(self.user)
+        self.assertEqual(client.get(reverse('order-list')).status_code, 200)
+
+        self.user.role = 'admin'
+        self.user.save()
+
+        self.assertEqual(client.get(reverse('order-list')).status_code, 401)
+        self.assertEqual(self.client_for(self.user).get(reverse('order-list')).status_code, 200)
+
+    def test_password_change_revokes_tokens(self):
+        client = self.client_for(self.user)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+
+        self.assertEqual(client.get(reverse('order-list')).status_code, 401)
+
+    def test_deactivation_revokes_tokens(self):
+        client = self.client_for(self.user)
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(client.get(reverse('order-list')).status_code, 401)
+
+    def test_password_change_revokes_refresh_tokens(self):
+        refresh = str(RoleRefreshToken.for_user(self.user))
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-password')
+        user.save()
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_revokes_refresh_tokens(self):
+        refresh = str(RoleRefreshToken.for_user(self.user))
+        self.user.role = 'delivery_man'
+        self.user.save()
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_profile_edit_keeps_tokens(self):
+        client = self.client_for(self.user)
+        response = client.put(reverse('profile'), {'first_name': 'Rahim'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        response = client.get(reverse('profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['Data']['first_name'], 'Rahim')
+
+
+class RefreshTokenReuseTests(UserTestCase):
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token}, format='json')
+
+    def assert_reuse_rejected(self):
+        token = str(RoleRefreshToken.for_user(self.user))
+        response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+        rotated = response.json()['Data']['refresh']
+
+        self.assertEqual(self.refresh(token).status_code, 401)
+        self.assertEqual(self.refresh(rotated).status_code, 200)
+
+    def test_reuse_is_rejected(self):
+        self.assert_reuse_rejected()
+
+    @override_settings(TOKEN_REVOCATION_BACKEND='apps.users.revocation.MemoryBackend')
+    def test_reuse_is_rejected_by_memory_backend(self):
+        self.assert_reuse_rejected()
+
+    @override_settings(TOKEN_REVOCATION_BLOOM=False)
+    def test_reuse_is_rejected_without_bloom_filter(self):
+        self.assert_reuse_rejected()
+
+    def test_revocation_from_another_process_is_rejected(self):
+        lifetime = timedelta(days=1)
+        first = revocation.RevocationStore(revocation.CacheBackend(), 1000, lifetime)
+        second = revocation.RevocationStore(revocation.CacheBackend(), 1000, lifetime)
+        expires = time.time() + 60
+
+        self.assertTrue(first.revoke('jti-1', expires))
+        # The second process's Bloom filter never saw it, but claiming it
+        # on the shared store fails.
+        self.assertFalse(second.is_revoked('jti-1'))
+        self.assertFalse(second.revoke('jti-1', expires))
+        self.assertTrue(first.is_revoked('jti-1'))
@@ -0,0 +1,43 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .revocation import get_store
+
+ROLE_CLAIM = 'role'
+VERSION_CLAIM = 'ver'
+
+
+class RoleRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the user's role and token version. Access tokens
+    made from it copy both claims, so authentication can check permissions
+    without loading the user.
+
+    Revocation (`BLACKLIST_AFTER_ROTATION`) goes to `apps.users.revocation`
+    instead of simplejwt's `token_blacklist` tables. A refresh token issued
+    before the user's token version changed (role, password or active
+    flag) is rejected, like the access tokens it would mint.
+    """
+
+    def verify(self):
+        super().verify()
+        if get_store().is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+        if VERSION_CLAIM in self.payload:
+            # Imported here: the authentication module imports this one.
+            from .authentication import token_version
+            if token_version(self.payload[api_settings.USER_ID_CLAIM]) != self.payload[VERSION_CLAIM]:
+                raise TokenError(_("Token is no longer valid"))
+
+    def blacklist(self):
+        if not get_store().revoke(self.payload[api_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_("Token is blacklisted"))
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[ROLE_CLAIM] = user.role
+        token[VERSION_CLAIM] = user.token_version
+        return token
@@ -2,24 +2,26 @@ from rest_framework import generics, permissions
 from .serializers import RegisterSerializer, UserSerializer, CustomLoginSerializer
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import UserManager
-from rest_framework.views import APIView
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from respond.conditional import make_etag, not_modified_response, set_etag
+from respond.views import ProfiledAPIView
+
+from .tokens import RoleRefreshToken
 
 User = get_user_model()
 
-class UserLoginView(APIView):
+class UserLoginView(ProfiledAPIView):
     permission_classes = (permissions.AllowAny,)
 
     def post(self, request, *args, **kwargs):
-        serializer = CustomLoginSerializer(data=request.data)
+        serializer = CustomLoginSerializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response({
             "message": "Login successful",
             'username': user.username,
@@ -30,7 +32,7 @@ class UserLoginView(APIView):
 
         }, status=status.HTTP_200_OK)
 
-class RegisterView(APIView):
+class RegisterView(ProfiledAPIView):
     queryset = User.objects.all()
     serializer_class = RegisterSerializer
     permission_classes = (permissions.AllowAny,)
@@ -39,7 +41,7 @@ class RegisterView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
-        refresh = RefreshToken.for_user(user)
+        refresh = RoleRefreshToken.for_user(user)
         return Response({
             "message": "User Registration successful",
             'username': user.username,
@@ -49,15 +51,24 @@ class RegisterView(APIView):
 
         }, status=status.HTTP_201_CREATED)
 
-class ProfileView(APIView):
+class ProfileView(ProfiledAPIView):
     permission_classes = (permissions.IsAuthenticated,)
 
+    def get_etag(self, user):
+        # Needs the full user: loaded lazily, usually from the auth user cache.
+        return make_etag('user', *(getattr(user, field) for field in UserSerializer.Meta.fields))
+
     def get(self, request, *args, **kwargs):
         user = request.user
+        etag = self.get_etag(user)
+        not_modified = not_modified_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+
         serializer = UserSerializer(user)
         response_data = serializer.data.copy()
         response_data["message"] = "User profile loaded successfully"
-        return Response(response_data, status=status.HTTP_200_OK)
+        return set_etag(Response(response_data, status=status.HTTP_200_OK), etag)
     
     def put(self, request, *args, **kwargs):
         user = request.user
@@ -66,4 +77,4 @@ class ProfileView(APIView):
         updated_user = serializer.save()
         response_data = serializer.data.copy()
         response_data["message"] = "User profile updated successfully"
-        return Response(response_data, status=status.HTTP_200_OK)
\ No newline at end of file
+        return set_etag(Response(response_data, status=status.HTTP_200_OK), self.get_etag(updated_user))
\ No newline at end of file
@@ -31,10 +31,13 @@ INSTALLED_APPS = [
     'apps.users',
     'apps.orders',
     'apps.payments',
+    'apps.benchmarks',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'respond.middleware.QueryBudgetMiddleware',
+    'respond.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -67,6 +70,10 @@ WSGI_APPLICATION = 'core.wsgi.application'
 
 AUTH_USER_MODEL = 'users.User'
 
+AUTHENTICATION_BACKENDS = [
+    'apps.users.backends.UsernameOrEmailBackend',
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME':
@@ -99,3 +106,4 @@ TAGGIT_CASE_INSENSITIVE = True
 
 from .credentials.stripe import *
 from .configurations.restapi import *
+from .configurations.performance import *
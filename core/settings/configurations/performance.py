@@ -0,0 +1,70 @@
+# ============ Query budgets (respond.middleware.QueryBudgetMiddleware) ===========>>
+# Maximum number of SQL queries a single request to each named URL may run,
+# authentication included. Budgets are for a cold cache: role-claim tokens authenticate
+# without a query once the user's token version is cached, and the first request after a
+# version cache miss (once per AUTH_TOKEN_VERSION_TIMEOUT per user) runs the one lookup
+# counted here. Views that need the full user (profile, order creation) load it lazily
+# through a short-lived per-process cache. Enforced in tests with `respond.querybudget.query_budget`
+# and logged as a warning at runtime when exceeded. Streaming exports only count the
+# queries run before the response starts; rows are fetched while it streams.
+QUERY_BUDGETS = {
+    # apps.users
+    'login': 2,  # 1, plus 1 when the password hash is upgraded
+    'register': 3,
+    'token_obtain_pair': 2,
+    'token_refresh': 1,
+    'profile': 3,
+
+    # apps.orders
+    'order-list': 2,
+    'order-create': 9,
+    'order-batch-create': 12,  # 6 on PostgreSQL; SQLite splits large bulk inserts
+    'order-detail': 2,
+    'order-update': 6,  # incl. the payment amount for rollups when a paid order's status or cost changes
+    'order-bulk-status': 7,  # 2 rollup statements per 100 (day/hour, status) buckets touched
+    'order-delete': 11,
+    'order-stats': 2,
+    'order-export': 1,
+
+    # apps.payments
+    'checkout-session': 6,
+    'checkout-status': 2,
+    'retry-payment': 6,
+    'stripe-webhook': 1,
+    'payment-export': 1,
+    'payment-success': 0,
+    'payment-cancel': 0,
+
+    # core
+    'payment-success-page': 0,
+    'payment-cancel-page': 0,
+}
+
+# ============ Order list cache (apps.orders.cache) ===========>>
+# Per (role, user) cached order lists, invalidated by version bumps from the
+# Order / Payment signals. The backend is configured per environment in CACHES.
+ORDER_CACHE_ALIAS = 'default'
+ORDER_CACHE_TIMEOUT = 300
+
+# ============ Order search (GET /api/v1/orders/?q=) ===========>>
+# Words beyond this many are ignored.
+ORDER_SEARCH_MAX_TERMS = 8
+
+# ============ Batch endpoints ===========>>
+ORDER_BATCH_MAX_SIZE = 500          # POST /api/v1/orders/batch/
+ORDER_BULK_STATUS_MAX_SIZE = 500    # POST /api/v1/orders/bulk-status/
+
+# ============ Order dispatcher (apps.orders.dispatch) ===========>>
+# Most PENDING orders one delivery man may hold before the dispatcher skips
+# them; None means no cap.
+DISPATCH_MAX_OPEN_ORDERS = None
+
+# ============ Request profiling (respond.middleware.ProfilingMiddleware) ===========>>
+# Requests from an admin sending PROFILING_HEADER, plus a sampled share of all
+# requests, get a timing breakdown (logged, and returned to admins as Server-Timing).
+# With PROFILING_DUMP_DIR set they also run under cProfile; the newest
+# PROFILING_DUMP_KEEP dumps are kept.
+PROFILING_HEADER = 'X-Profile'
+PROFILING_SAMPLE_RATE = 0.0
+PROFILING_DUMP_DIR = None
+PROFILING_DUMP_KEEP = 100
@@ -6,13 +6,13 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'INSECURE-DEFAULT')
 # ============ Django REST Framework Configuration ===========>>
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.RoleJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'respond.renderers.StandardizedJSONRenderer',
+        'respond.renderers.FastStandardizedJSONRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -103,6 +103,8 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.serializers.RoleTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.serializers.RoleTokenRefreshSerializer',
 
     'JTI_CLAIM': 'jti',
 
@@ -111,6 +113,21 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# Role-claim authentication (apps.users.authentication): how long a token
+# version and a lazily loaded user are trusted by each process.
+AUTH_TOKEN_VERSION_TIMEOUT = 60
+AUTH_USER_CACHE_TTL = 30
+AUTH_USER_CACHE_SIZE = 1024
+
+# Revoked refresh tokens (apps.users.revocation), kept until they expire. The cache
+# store is shared through Redis in production; tests may use the in-process
+# 'apps.users.revocation.MemoryBackend'. The Bloom filter answers most "not revoked"
+# checks on token/refresh/ without touching the store.
+TOKEN_REVOCATION_BACKEND = 'apps.users.revocation.CacheBackend'
+TOKEN_REVOCATION_CACHE_ALIAS = 'default'
+TOKEN_REVOCATION_BLOOM = True
+TOKEN_REVOCATION_BLOOM_CAPACITY = 100000
+
 # ======== CORS Settings ========>>
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
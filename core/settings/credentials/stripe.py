@@ -5,3 +5,29 @@ load_dotenv()
 STRIPE_PUBLIC_KEY = os.getenv('STRIPE_PUBLIC_KEY', '')
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
+# Webhook events whose payment isn't known yet (e.g. `payment_intent.succeeded`
+# delivered before `checkout.session.completed`) are retried with exponential
+# backoff (2s, 4s, ...) this many times before being marked FAILED.
+STRIPE_EVENT_MAX_ATTEMPTS = int(os.getenv('STRIPE_EVENT_MAX_ATTEMPTS', '8'))
+
+# Create checkout sessions in the `process_checkout_jobs` worker instead of
+# inside the order-create / checkout request ====>>
+STRIPE_CHECKOUT_ASYNC = os.getenv('STRIPE_CHECKOUT_ASYNC', 'False').lower() in ('true', '1', 't')
+CHECKOUT_JOB_MAX_ATTEMPTS = int(os.getenv('CHECKOUT_JOB_MAX_ATTEMPTS', '5'))
+# Seconds a worker leases a job for; longer than one Stripe call with its retries.
+CHECKOUT_JOB_LEASE = int(os.getenv('CHECKOUT_JOB_LEASE', '60'))
+# Longest a client may block on GET /api/v1/payments/<id>/checkout/?wait=N. The
+# wait holds a request worker, so keep it short and let clients poll again.
+CHECKOUT_POLL_MAX_WAIT = int(os.getenv('CHECKOUT_POLL_MAX_WAIT', '2'))
+
+# Outbound Stripe calls (apps.payments.gateway) ====>>
+# 'apps.payments.gateway.FakeBackend' runs everything offline (tests, local
+# development, load tests); STRIPE_FAKE_LATENCY_MS simulates Stripe latency.
+# An empty value (as in .env.save) means the default.
+STRIPE_GATEWAY_BACKEND = os.getenv('STRIPE_GATEWAY_BACKEND') or 'apps.payments.gateway.StripeBackend'
+STRIPE_FAKE_LATENCY_MS = int(os.getenv('STRIPE_FAKE_LATENCY_MS', '0'))
+# Keep-alive connections per worker process, and per-call timeouts in seconds.
+STRIPE_HTTP_POOL_SIZE = int(os.getenv('STRIPE_HTTP_POOL_SIZE', '10'))
+STRIPE_CONNECT_TIMEOUT = float(os.getenv('STRIPE_CONNECT_TIMEOUT', '3'))
+STRIPE_READ_TIMEOUT = float(os.getenv('STRIPE_READ_TIMEOUT', '20'))
+STRIPE_MAX_NETWORK_RETRIES = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', '2'))
@@ -10,6 +10,12 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'courier-api',
+    }
+}
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [
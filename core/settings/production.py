@@ -15,6 +15,15 @@ DATABASES = {
     }
 }
 
+# Shared by every worker, so cache invalidation is seen by all of them ====>>
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL') or 'redis://127.0.0.1:6379/1',
+        'KEY_PREFIX': 'courier',
+    }
+}
+
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR.parent / 'staticfiles'
 MEDIA_URL = 'media/'
@@ -27,6 +36,10 @@ CSRF_COOKIE_SECURE = True
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = 'DENY'
 
+# Request profiling (respond.middleware.ProfilingMiddleware) ====>>
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_DUMP_DIR = os.getenv('PROFILING_DUMP_DIR') or None
+
 # Production logging configuration ====>>
 LOGGING = {
     'version': 1,
@@ -0,0 +1,30 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+
+def make_etag(*parts):
+    """
+    Build a strong ETag from the values that determine a representation.
+    """
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return quote_etag(digest)
+
+
+def not_modified_response(request, etag):
+    """
+    Return a `304 Not Modified` when the request's If-None-Match matches
+    `etag`, else None. Call it before loading or serializing anything else.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        set_etag(response, etag)
+    return response
+
+
+def set_etag(response, etag):
+    response['ETag'] = etag
+    # Representations are per user, so shared caches must key on the token.
+    patch_vary_headers(response, ('Authorization',))
+    return response
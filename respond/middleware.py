@@ -0,0 +1,128 @@
+import logging
+import random
+import re
+import time
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+from . import profiling
+from .querybudget import QueryCounter, get_query_budget
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries and DB time of every request and compare them with
+    the budget declared for its URL name in `settings.QUERY_BUDGETS`.
+
+    The counts are attached to the response (`query_count`,
+    `query_time_ms`) for tests, sent as `X-Query-Count` / `X-Query-Time-Ms`
+    headers when DEBUG is on, and an over-budget request is logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+
+        response.query_count = counter.count
+        response.query_time_ms = counter.duration_ms
+
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(counter.count)
+            response['X-Query-Time-Ms'] = str(counter.duration_ms)
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        url_name = resolver_match.url_name if resolver_match else None
+        budget = get_query_budget(url_name)
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                "Query budget exceeded for '%s': %s queries (budget %s, %sms) on %s %s",
+                url_name, counter.count, budget, counter.duration_ms,
+                request.method, request.path,
+            )
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Break down where a request spent its time: authentication, permission
+    checks, DB, serializers, rendering and Stripe calls (`respond.profiling`).
+    Views, serializers and the renderer report their own spans; requests
+    that are not profiled only pay a context variable lookup for them.
+
+    A request is profiled when an admin sends the `PROFILING_HEADER` header,
+    or at random for a `PROFILING_SAMPLE_RATE` share of all requests. Admins
+    get the breakdown back as a `Server-Timing` header; every profiled
+    request is logged. With `PROFILING_DUMP_DIR` set, the request also runs
+    under cProfile and its stats are kept there, newest
+    `PROFILING_DUMP_KEEP` only.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.header = 'HTTP_' + getattr(settings, 'PROFILING_HEADER', 'X-Profile').upper().replace('-', '_')
+
+    def __call__(self, request):
+        trigger = self.get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        dump_dir = getattr(settings, 'PROFILING_DUMP_DIR', None)
+        with profiling.profiling(trigger) as profile, QueryCounter() as counter:
+            if dump_dir:
+                profiling.start_profiler(profile)
+            start = time.perf_counter()
+            try:
+                response = self.get_response(request)
+            finally:
+                profile.add('total', time.perf_counter() - start)
+                profiling.stop_profiler(profile)
+        profile.add('db', counter.duration)
+        profile.details['db'] = f'{counter.count} queries'
+
+        resolver_match = getattr(request, 'resolver_match', None)
+        url_name = (resolver_match.url_name if resolver_match else None) or 'unresolved'
+        dump = None
+        if dump_dir:
+            label = re.sub(r'[^\w-]', '_', f'{request.method}-{url_name}')
+            dump = profiling.save_dump(profile, label)
+
+        if trigger == 'header':
+            response['Server-Timing'] = profile.server_timing()
+            if dump:
+                response['X-Profile-Dump'] = dump
+        logger.info(
+            "Profiled %s %s (%s, %s): %s%s",
+            request.method, request.path, url_name, trigger,
+            ' '.join(f'{name}={profile.duration_ms(name)}ms' for name in profile.durations),
+            f' dump={dump}' if dump else '',
+        )
+        return response
+
+    def get_trigger(self, request):
+        if request.META.get(self.header) and self.is_admin(request):
+            return 'header'
+        rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        if rate and random.random() < rate:
+            return 'sample'
+        return None
+
+    def is_admin(self, request):
+        """
+        Authenticate the request with the API's authentication classes, as
+        the view will, and check that it comes from an admin.
+        """
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authentication_class().authenticate(request)
+            except APIException:
+                return False
+            if result is not None:
+                return bool(getattr(result[0], 'is_admin', False))
+        return False
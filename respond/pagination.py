@@ -0,0 +1,154 @@
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from urllib import parse
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+Cursor = namedtuple('Cursor', ['position', 'pk', 'reverse'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (seek) pagination over a `(field, pk)` ordering.
+
+    Unlike `PageNumberPagination` / `CursorPagination` no OFFSET is ever
+    issued: every page is a single `WHERE (field, pk) < (x, y) ORDER BY
+    field, pk LIMIT n + 1` query, so the cost of a page does not grow with
+    how deep the client has scrolled. The pk tiebreaker makes the cursor
+    stable even when many rows share the same timestamp.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        field, pk_field = (name.lstrip('-') for name in self.ordering)
+        self.model_field = queryset.model._meta.get_field(field)
+        self.fields = (field, pk_field)
+        descending = self.ordering[0].startswith('-')
+
+        cursor = self.decode_cursor(request)
+        reverse = cursor.reverse if cursor else False
+
+        # Walking backwards means flipping both the comparison and the sort,
+        # then restoring the natural order of the page in Python.
+        if reverse:
+            descending = not descending
+            order_by = [name.lstrip('-') if name.startswith('-') else f'-{name}' for name in self.ordering]
+        else:
+            order_by = list(self.ordering)
+        queryset = queryset.order_by(*order_by)
+
+        if cursor is not None:
+            lookup = 'lt' if descending else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}': cursor.position})
+                | Q(**{field: cursor.position, f'{pk_field}__{lookup}': cursor.pk})
+            )
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+
+        if reverse:
+            self.has_next = cursor is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        return self.page
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_ordering(self, request, queryset, view):
+        return getattr(view, 'keyset_ordering', self.ordering)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._cursor_for(self.page[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._cursor_for(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def _cursor_for(self, instance, reverse):
+        field, pk_field = self.fields
+        return Cursor(
+            position=str(getattr(instance, field)),
+            pk=str(getattr(instance, pk_field)),
+            reverse=reverse,
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            position = self.model_field.to_python(tokens['p'][0])
+            pk = _positive_int(tokens['i'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+
+        if position is None:
+            raise ValidationError({self.cursor_query_param: [self.invalid_cursor_message]})
+        return Cursor(position=position, pk=pk, reverse=reverse)
+
+    def encode_cursor(self, cursor):
+        tokens = {'p': cursor.position, 'i': cursor.pk}
+        if cursor.reverse:
+            tokens['r'] = '1'
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
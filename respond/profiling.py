@@ -0,0 +1,142 @@
+import cProfile
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from django.conf import settings
+from rest_framework import serializers
+
+# Server-Timing metric names, in the order they are reported. The spans may
+# overlap: `db` includes the queries run during `auth` or `serializer`.
+METRICS = ('total', 'auth', 'permissions', 'db', 'serializer', 'renderer', 'stripe')
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """
+    Time spent in each part of one request, in seconds. The current one is
+    held in a context variable, so code anywhere in the request can add to
+    it through `timed()` / `record()` without being handed it.
+    """
+
+    def __init__(self, trigger):
+        self.trigger = trigger
+        self.durations = dict.fromkeys(METRICS, 0.0)
+        self.details = {}
+        self.profiler = None
+        self._active = set()
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def duration_ms(self, name):
+        return round(self.durations.get(name, 0.0) * 1000, 2)
+
+    def server_timing(self):
+        entries = []
+        for name, seconds in self.durations.items():
+            entry = f'{name};dur={seconds * 1000:.2f}'
+            if name in self.details:
+                entry += f';desc="{self.details[name]}"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def profiling(trigger):
+    profile = RequestProfile(trigger)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the wall time of the block to `name` on the current profile. Does
+    nothing outside a profiled request, or when nested in a block already
+    timing `name` (a serializer calling another one).
+    """
+    profile = _current.get()
+    if profile is None or name in profile._active:
+        yield
+        return
+    profile._active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(name, time.perf_counter() - start)
+        profile._active.discard(name)
+
+
+def record(name, seconds):
+    profile = _current.get()
+    if profile is not None:
+        profile.add(name, seconds)
+
+
+class ProfiledSerializerMixin:
+    """
+    Serializer mixin reporting validation and representation to the
+    current profile. `many=True` builds a list serializer, which never
+    reads the child's `data`: give such serializers
+    `Meta.list_serializer_class = ProfiledListSerializer`.
+    """
+
+    def is_valid(self, *, raise_exception=False):
+        with timed('serializer'):
+            return super().is_valid(raise_exception=raise_exception)
+
+    @property
+    def data(self):
+        with timed('serializer'):
+            return super().data
+
+
+class ProfiledListSerializer(ProfiledSerializerMixin, serializers.ListSerializer):
+    pass
+
+
+def start_profiler(profile):
+    profile.profiler = cProfile.Profile()
+    profile.profiler.enable()
+
+
+def stop_profiler(profile):
+    if profile.profiler is not None:
+        profile.profiler.disable()
+
+
+def save_dump(profile, label):
+    """
+    Write the request's cProfile stats to `PROFILING_DUMP_DIR` and drop the
+    oldest dumps beyond `PROFILING_DUMP_KEEP`. Returns the file name.
+    """
+    directory = Path(settings.PROFILING_DUMP_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f'{time.time_ns()}-{os.getpid()}-{label}.prof'
+
+    # Written under a temporary name first, so a reader never sees half a dump.
+    fd, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    profile.profiler.dump_stats(temporary)
+    os.replace(temporary, directory / name)
+
+    dumps = sorted(directory.glob('*.prof'))
+    for old in dumps[:max(len(dumps) - getattr(settings, 'PROFILING_DUMP_KEEP', 100), 0)]:
+        try:
+            old.unlink()
+        except FileNotFoundError:  # removed by another worker
+            pass
+    return name
@@ -0,0 +1,124 @@
+import time
+from contextlib import ContextDecorator, ExitStack
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+# Transaction control is not work a view asked for, and depends on whether
+# it runs nested in a test transaction, so budgets do not count it.
+TRANSACTION_CONTROL = ('BEGIN', 'SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def is_transaction_control(sql):
+    return sql.lstrip().upper().startswith(TRANSACTION_CONTROL)
+
+
+class QueryCounter:
+    """
+    `execute_wrapper` hook that counts queries and wall-clock DB time.
+
+    Installed on every configured connection for the duration of a
+    `with` block, so it is cheap enough to leave on in production.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            if not is_transaction_control(sql):
+                self.count += 1
+
+    @property
+    def duration_ms(self):
+        return round(self.duration * 1000, 2)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def get_query_budget(url_name):
+    """
+    Return the declared query budget for a named URL, or None.
+    """
+    if not url_name:
+        return None
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(url_name)
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail a test when the wrapped block issues more queries than `url_name`
+    is allowed by `settings.QUERY_BUDGETS` (or an explicit `budget`).
+
+        @query_budget('order-list')
+        def test_list(self):
+            self.client.get(reverse('order-list'))
+
+        with query_budget('order-detail'):
+            self.client.get(reverse('order-detail', args=[order.id]))
+    """
+
+    def __init__(self, url_name, budget=None, using=DEFAULT_DB_ALIAS):
+        self.url_name = url_name
+        self.budget = budget if budget is not None else get_query_budget(url_name)
+        self.using = using
+        if self.budget is None:
+            raise ValueError(f"No query budget declared for '{url_name}'.")
+
+    def __enter__(self):
+        self.context = CaptureQueriesContext(connections[self.using])
+        self.context.__enter__()
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.context.__exit__(exc_type, exc_value, traceback)
+        if exc_type is not None:
+            return False
+
+        captured = [
+            query for query in self.context.captured_queries
+            if not is_transaction_control(query['sql'])
+        ]
+        executed = len(captured)
+        if executed > self.budget:
+            queries = '\n'.join(
+                f'{i}. {query["sql"]}'
+                for i, query in enumerate(captured, start=1)
+            )
+            raise QueryBudgetExceeded(
+                f"'{self.url_name}' executed {executed} queries, budget is {self.budget}:\n{queries}"
+            )
+        return False
+
+
+def assert_within_query_budget(response, budget=None):
+    """
+    Check a test-client response against the budget of the URL it hit,
+    using the counts recorded by `QueryBudgetMiddleware`.
+    """
+    url_name = response.resolver_match.url_name
+    budget = budget if budget is not None else get_query_budget(url_name)
+    if budget is None:
+        raise ValueError(f"No query budget declared for '{url_name}'.")
+    if response.query_count > budget:
+        raise QueryBudgetExceeded(
+            f"'{url_name}' executed {response.query_count} queries, budget is {budget}."
+        )
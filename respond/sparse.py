@@ -0,0 +1,77 @@
+from rest_framework.exceptions import ValidationError
+
+FIELDS_PARAM = 'fields'
+EXCLUDE_PARAM = 'exclude'
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+def requested_fields(request, available):
+    """
+    Names picked by `?fields=a,b` and/or `?exclude=c`, in the order of
+    `available`, or None when the request asks for everything.
+    """
+    include = request.query_params.get(FIELDS_PARAM)
+    exclude = request.query_params.get(EXCLUDE_PARAM)
+    if include is None and exclude is None:
+        return None
+
+    errors = {}
+    for param, value in ((FIELDS_PARAM, include), (EXCLUDE_PARAM, exclude)):
+        unknown = [name for name in _names(value or '') if name not in available]
+        if unknown:
+            errors[param] = [f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}."]
+    if errors:
+        raise ValidationError(errors)
+
+    selected = set(_names(include)) if include is not None else set(available)
+    selected -= set(_names(exclude or ''))
+    if not selected:
+        raise ValidationError({FIELDS_PARAM: ["Select at least one field."]})
+    return tuple(name for name in available if name in selected)
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin taking a `fields=` argument: only those fields are
+    serialized. `Meta.field_columns` maps each field to the model columns
+    (or `relation__column` lookups) it reads, so `restrict_queryset()` can
+    load nothing else.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def field_names(cls):
+        return tuple(cls.Meta.field_columns)
+
+    @classmethod
+    def restrict_queryset(cls, queryset, fields, always=()):
+        """
+        Join the relations and load only the columns `fields` (every field
+        when None) need, plus `always` (e.g. the pagination ordering).
+        """
+        columns = cls.Meta.field_columns
+        lookups = [lookup for name in (fields or columns) for lookup in columns[name]]
+        relations = sorted({lookup.rsplit('__', 1)[0] for lookup in lookups if '__' in lookup})
+        if relations:
+            # A bare select_related() would follow every foreign key.
+            queryset = queryset.select_related(*relations)
+        return queryset.only(*dict.fromkeys([*always, *lookups]))
+
+
+def requested_columns(request, columns):
+    """
+    `(header, lookup)` export columns narrowed by `?fields=` / `?exclude=`
+    on the headers.
+    """
+    selected = requested_fields(request, [header for header, _ in columns])
+    if selected is None:
+        return columns
+    return [column for column in columns if column[0] in selected]
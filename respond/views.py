@@ -0,0 +1,22 @@
+from rest_framework.views import APIView
+
+from .profiling import timed
+
+
+class ProfiledAPIView(APIView):
+    """
+    APIView reporting its authentication and permission checks to the
+    current profile. The API's views subclass it instead of `APIView`.
+    """
+
+    def perform_authentication(self, request):
+        with timed('auth'):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with timed('permissions'):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with timed('permissions'):
+            super().check_object_permissions(request, obj)